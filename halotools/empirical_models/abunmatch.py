@@ -6,8 +6,6 @@ and conditional abundance matching (CAM).
 """
 import numpy as np
 
-from scipy.stats import pearsonr
-from scipy.optimize import minimize_scalar
 from astropy.extern import six
 from abc import ABCMeta, abstractmethod, abstractproperty
 
@@ -15,6 +13,7 @@ from . import model_defaults
 from . import model_helpers
 from .smhm_components import PrimGalpropModel
 from . import smhm_components
+from .smhm_components import LogNormalScatterModel
 
 from ..utils.array_utils import array_like_length as custom_len
 from ..sim_manager import sim_defaults
@@ -25,10 +24,234 @@ from ..utils import array_utils
 from warnings import warn
 from functools import partial
 
-__all__ = ['ConditionalAbunMatch']
+__all__ = ['AbunMatchSmHm', 'ConditionalAbunMatch']
+
+def _noisy_rank_correlation(noise_weight):
+    """ Spearman rank-order correlation coefficient between a uniform random variable 
+    :math:`U` and :math:`(1-w)U + wV`, where :math:`V` is an independent uniform random 
+    variable and :math:`w` is the ``noise_weight``, :math:`0 \\leq w \\leq 1`. 
+
+    Writing :math:`r = w / (1-w)`, the correlation is 
+    :math:`1 - r^{2}/2 + r^{3}/5` for :math:`r \\leq 1`, 
+    and :math:`1/r - 3/10r^{2}` for :math:`r \\geq 1`. 
+    """
+    noise_weight = np.atleast_1d(noise_weight).astype(float)
+    result = np.zeros_like(noise_weight)
+
+    weak_noise = noise_weight <= 0.5
+    r = noise_weight[weak_noise]/(1. - noise_weight[weak_noise])
+    result[weak_noise] = 1. - r*r/2. + r*r*r/5.
+
+    strong_noise = ~weak_noise
+    inverse_r = (1. - noise_weight[strong_noise])/noise_weight[strong_noise]
+    result[strong_noise] = inverse_r - 0.3*inverse_r*inverse_r
+
+    return result
+
+def _noisy_rank_kendall_tau(noise_weight):
+    """ Kendall rank-order correlation coefficient between a uniform random variable 
+    :math:`U` and :math:`(1-w)U + wV`, where :math:`V` is an independent uniform random 
+    variable and :math:`w` is the ``noise_weight``, :math:`0 \\leq w \\leq 1`. 
+
+    Writing :math:`r = w / (1-w)`, the correlation is 
+    :math:`1 - 2r/3 + r^{2}/6` for :math:`r \\leq 1`, 
+    and :math:`2/3r - 1/6r^{2}` for :math:`r \\geq 1`. 
+    """
+    noise_weight = np.atleast_1d(noise_weight).astype(float)
+    result = np.zeros_like(noise_weight)
+
+    weak_noise = noise_weight <= 0.5
+    r = noise_weight[weak_noise]/(1. - noise_weight[weak_noise])
+    result[weak_noise] = 1. - 2.*r/3. + r*r/6.
+
+    strong_noise = ~weak_noise
+    inverse_r = (1. - noise_weight[strong_noise])/noise_weight[strong_noise]
+    result[strong_noise] = 2.*inverse_r/3. - inverse_r*inverse_r/6.
+
+    return result
+
+# Calibration tables used by ConditionalAbunMatch to convert the desired correlation 
+# strength into the weight of the noise added to the ranks. 
+# Both correlations decrease monotonically from 1 to 0 as the weight increases from 0 to 1. 
+_cam_noise_weight_table = np.linspace(0, 1, 2001)
+_cam_correlation_table = _noisy_rank_correlation(_cam_noise_weight_table)
+_cam_kendall_tau_table = _noisy_rank_kendall_tau(_cam_noise_weight_table)
+
+def _cam_noise_weight(correlation_strength, num_gals=None):
+    """ Weight of the noise that produces the absolute value of 
+    ``correlation_strength`` as the Spearman rank-order correlation coefficient. 
+
+    Parameters 
+    ----------
+    correlation_strength : array_like 
+        Desired correlation strength in each bin, between -1 and 1. 
+
+    num_gals : array_like, optional 
+        Number of galaxies in each bin. If passed, the noise weight of each bin 
+        is calibrated so that the desired correlation strength is the expected value 
+        of the Spearman coefficient of a sample of ``num_gals`` galaxies, 
+        :math:`\\rho_{S} + 3(\\tau - \\rho_{S})/(n+1)`, 
+        rather than the correlation of an infinite sample, :math:`\\rho_{S}`. 
+        The two differ appreciably only for sparsely populated bins. 
+        Default is None. 
+
+    Returns 
+    -------
+    noise_weight : array 
+        Noise weight in each bin, between 0 and 1. 
+    """
+    correlation_strength = np.abs(np.atleast_1d(correlation_strength)).astype(float)
+    if num_gals is None:
+        return np.interp(correlation_strength, 
+            _cam_correlation_table[::-1], _cam_noise_weight_table[::-1])
+
+    # Build the monotonically decreasing calibration table of each bin, 
+    # one row per bin. Bins with fewer than 2 galaxies have no defined correlation. 
+    num_gals = np.maximum(np.atleast_1d(num_gals), 2).astype(float)
+    num_gals = num_gals + np.zeros_like(correlation_strength)
+    calibration_table = (
+        ((num_gals[:, np.newaxis]-2)*_cam_correlation_table + 3*_cam_kendall_tau_table) / 
+        (num_gals[:, np.newaxis]+1))
+
+    # Invert each row by linear interpolation between the bracketing entries
+    idx = np.sum(calibration_table >= correlation_strength[:, np.newaxis], axis=1)
+    idx = np.clip(idx, 1, len(_cam_noise_weight_table)-1)
+    rows = np.arange(len(correlation_strength))
+    corr_high = calibration_table[rows, idx-1]
+    corr_low = calibration_table[rows, idx]
+    weight_low = _cam_noise_weight_table[idx-1]
+    weight_high = _cam_noise_weight_table[idx]
+    return weight_low + (
+        (corr_high - correlation_strength)*(weight_high - weight_low)/(corr_high - corr_low))
+
+
+def _cumulative_abundance(log_abcissa, differential_abundance):
+    """ Cumulative abundance :math:`n(>x)` of a population whose differential abundance 
+    :math:`dn/d\\log_{10}x` is tabulated at the increasing points ``log_abcissa``. 
+    The integral is computed by the midpoint rule, so that the cumulative abundance 
+    is strictly positive at every tabulated point. 
+    Operates on the last axis of ``differential_abundance``, 
+    so that a batch of abundance functions is integrated at once. 
+    """
+    widths = np.gradient(np.asarray(log_abcissa, dtype=float))
+    counts = differential_abundance*widths
+    return np.cumsum(counts[..., ::-1], axis=-1)[..., ::-1] - counts/2.
+
+def _batch_interp(x, xp, fp):
+    """ Linearly interpolate each row of a batch of tabulated functions, 
+    linearly extrapolating beyond the ends of the table. 
+
+    ``xp`` and ``fp`` have shape (Nbatch, Npts), with each row of ``xp`` increasing. 
+    ``x`` has shape (Nx, ) or (Nbatch, Nx); the result has shape (Nbatch, Nx). 
+    """
+    x = np.zeros((xp.shape[0], 1)) + x
+    left = np.sum(xp[:, np.newaxis, :] <= x[:, :, np.newaxis], axis=2) - 1
+    left = np.clip(left, 0, xp.shape[1]-2)
+    rows = np.arange(xp.shape[0])[:, np.newaxis]
+    x0, x1 = xp[rows, left], xp[rows, left+1]
+    y0, y1 = fp[rows, left], fp[rows, left+1]
+    return y0 + (x - x0)*(y1 - y0)/(x1 - x0)
+
+def _abundance_matched_mean_relation(log_haloprop, halo_abundance, 
+    log_galprop, galaxy_abundance, scatter, num_iterations):
+    """ Mean relation :math:`\\langle\\log_{10}galprop\\rangle` as a function of 
+    :math:`\\log_{10}haloprop` that reproduces a batch of galaxy abundance functions 
+    in the presence of log-normal scatter. 
+
+    The galaxy abundance function is iteratively deconvolved: at each step, 
+    the halos are matched to the deconvolved abundance function without scatter, 
+    the resulting mean relation is convolved with the scatter, 
+    and the deconvolved abundance function is rescaled by the ratio of the 
+    input abundance function to the convolved prediction, 
+    smoothed by the scatter. 
+    Only the range of the galaxy property hosted by the tabulated halos, 
+    away from the least massive halo, is deconvolved, 
+    so that halo tables with a resolution limit do not make the iterations diverge. 
+
+    Parameters 
+    ----------
+    log_haloprop : array 
+        Length-Nh array of increasing values of the halo property. 
+
+    halo_abundance : array 
+        Length-Nh array of the differential halo abundance at ``log_haloprop``. 
+
+    log_galprop : array 
+        Length-Ng array of increasing values of the galaxy property. 
+
+    galaxy_abundance : array 
+        Array of shape (Nbatch, Ng) of strictly positive differential galaxy abundances. 
+
+    scatter : array 
+        Length-Nbatch array of the log-normal scatter in dex. 
+
+    num_iterations : int 
+        Number of deconvolution iterations. 
+
+    Returns 
+    -------
+    mean_log_galprop : array 
+        Array of shape (Nbatch, Nh). 
+    """
+    log_halo_cumulative_abundance = np.log10(
+        _cumulative_abundance(log_haloprop, halo_abundance))
+    halo_counts = halo_abundance*np.gradient(log_haloprop)
+
+    def match_without_scatter(deconvolved_abundance):
+        # Cumulative abundances decrease with increasing galprop, 
+        # so the tables are reversed to make the abcissa of each row increasing 
+        log_galaxy_cumulative_abundance = np.log10(
+            _cumulative_abundance(log_galprop, deconvolved_abundance))
+        return _batch_interp(log_halo_cumulative_abundance, 
+            log_galaxy_cumulative_abundance[:, ::-1], 
+            np.zeros_like(deconvolved_abundance) + log_galprop[::-1])
+
+    # Galaxies more abundant than the entire halo population cannot be hosted 
+    # by the tabulated halos, e.g., below the resolution limit of a halo catalog. 
+    # The abundance function is only deconvolved in the range of galprop that can be hosted, 
+    # since elsewhere the ratio of the input to the convolved abundance diverges. 
+    hostable = (_cumulative_abundance(log_galprop, galaxy_abundance) <= 
+        10**log_halo_cumulative_abundance[0])
+
+    has_scatter = scatter > 0
+    sigma = np.where(has_scatter, scatter, 1.)[:, np.newaxis, np.newaxis]
+
+    z = (log_galprop[:, np.newaxis] - log_galprop)/sigma
+    smoothing_kernel = np.exp(-z*z/2.)*np.gradient(log_galprop)
+
+    deconvolved_abundance = np.array(galaxy_abundance, dtype=float)
+    for __ in range(num_iterations*np.any(has_scatter)):
+        mean_log_galprop = match_without_scatter(deconvolved_abundance)
+        z = (log_galprop - mean_log_galprop[:, :, np.newaxis])/sigma
+        kernel = np.exp(-z*z/2.)/(np.sqrt(2*np.pi)*sigma)
+        convolved_abundance = np.einsum('i,bij->bj', halo_counts, kernel)
+
+        # Near the least massive tabulated halo, the convolved abundance misses 
+        # the scatter of the absent lower-mass halos, so the deconvolution is restricted 
+        # to galprop more than two scatter widths above its mean galprop 
+        complete = hostable & (log_galprop >= mean_log_galprop[:, :1] + 2*sigma[:, :, 0])
+
+        ratio = np.ones_like(deconvolved_abundance)
+        well_defined = (has_scatter[:, np.newaxis] & complete & 
+            (convolved_abundance > 0) & np.isfinite(convolved_abundance))
+        ratio[well_defined] = (
+            galaxy_abundance[well_defined]/convolved_abundance[well_defined])
+        # Smoothing the ratio with the scatter kernel, as in Richardson-Lucy 
+        # deconvolution, prevents the iterations from amplifying oscillations 
+        deconvolved_abundance *= (
+            np.einsum('bjk,bk->bj', smoothing_kernel, ratio)/np.sum(smoothing_kernel, axis=2))
+        np.maximum(deconvolved_abundance, np.finfo(float).tiny, out=deconvolved_abundance)
+
+    return match_without_scatter(deconvolved_abundance)
+
 
 class AbunMatchSmHm(PrimGalpropModel):
     """ Stellar-to-halo-mass relation based on traditional abundance matching. 
+
+    The mean relation is determined by deconvolving the input galaxy abundance function 
+    for the log-normal scatter, so that the model reproduces the input 
+    abundance function when scatter is included. The mean relation is tabulated 
+    on a grid of the halo property, so that `mean_stellar_mass` is a cheap lookup. 
     """
 
     def __init__(self, galaxy_abundance_abcissa, galaxy_abundance_ordinates, 
@@ -47,6 +270,10 @@ class AbunMatchSmHm(PrimGalpropModel):
             The most common two cases are where ``galaxy_abundance_abcissa`` stores either 
             stellar mass or luminosity, in which case ``galaxy_abundance_ordinates`` would 
             simply be the stellar mass function or the luminosity function, respectively. 
+            Number densities are differential per dex of the galaxy property, 
+            and must be strictly positive. 
+            An array of shape (Nbatch, Ng) may be passed to tabulate the mean relation of 
+            a batch of abundance functions at once; the first row governs the model. 
 
         galaxy_abundance_abcissa : array_like
             Length-Ng array storing the property of the galaxies for which the 
@@ -61,9 +288,11 @@ class AbunMatchSmHm(PrimGalpropModel):
             Length-Nh array storing the comoving number density of subhalos.
             The value ``subhalo_abundance_ordinates[i]`` gives the comoving number density 
             of subhalos of property ``subhalo_abundance_abcissa[i]``. 
+            Number densities are differential per dex of the subhalo property. 
             If keyword arguments ``subhalo_abundance_ordinates`` 
             and ``subhalo_abundance_abcissa`` are not passed, 
-            then keyword arguments ``prim_haloprop_key`` and ``halos`` must be passed. 
+            then either the ``snapshot`` keyword argument, or 
+            the ``halos`` and ``Lbox`` keyword arguments must be passed. 
 
         subhalo_abundance_abcissa : array_like, optional keyword argument 
             Length-Nh array storing the stellar mass of subhalos. 
@@ -71,11 +300,33 @@ class AbunMatchSmHm(PrimGalpropModel):
             of subhalos of property ``subhalo_abundance_abcissa[i]``. 
             If keyword arguments ``subhalo_abundance_ordinates`` 
             and ``subhalo_abundance_abcissa`` are not passed, 
-            then keyword arguments ``prim_haloprop_key`` and ``halos`` must be passed. 
+            then either the ``snapshot`` keyword argument, or 
+            the ``halos`` and ``Lbox`` keyword arguments must be passed. 
+
+        snapshot : object, optional keyword argument 
+            Simulation snapshot with ``halos`` and ``Lbox`` attributes, 
+            such as `~halotools.sim_manager.ProcessedSnapshot`. 
+            The sorted ``prim_haloprop_key`` column is cached on the snapshot, 
+            so that models built from the same snapshot share the halo abundance. 
+
+        halos : object, optional keyword argument 
+            Data table storing the subhalo catalog. 
+
+        Lbox : float, optional keyword argument 
+            Box size of the simulation storing ``halos``, in Mpc/h. 
 
         scatter_level : float, optional keyword argument 
             Level of constant scatter in dex. Default is 0.2. 
 
+        Npts_halo_abundance_table : int, optional keyword argument 
+            Number of points of the grid of ``prim_haloprop_key`` 
+            on which the mean relation is tabulated when the halo abundance 
+            is measured from a halo catalog. Default is 200. 
+
+        num_deconvolution_iterations : int, optional keyword argument 
+            Number of iterations used to deconvolve the galaxy abundance 
+            for the scatter. Default is 20. 
+
         input_param_dict : dict, optional keyword argument
             Dictionary containing values for the parameters specifying the model.
             If none is passed, the `Moster13SmHm` instance will be initialized to 
@@ -86,12 +337,172 @@ class AbunMatchSmHm(PrimGalpropModel):
         kwargs['scatter_abcissa'] = [12]
         kwargs['scatter_ordinates'] = [scatter_level]
 
+        galprop_key = kwargs.get('galprop_key', 'stellar_mass')
+        if galprop_key != 'stellar_mass':
+            setattr(self, 'mean_'+galprop_key, self.mean_stellar_mass)
+
         super(AbunMatchSmHm, self).__init__(**kwargs)
 
         self.publications = ['arXiv:0903.4682', 'arXiv:1205.5807']
 
+        idx_sorted = np.argsort(galaxy_abundance_abcissa)
+        self.galaxy_abundance_abcissa = np.asarray(
+            galaxy_abundance_abcissa, dtype=float)[idx_sorted]
+        self.galaxy_abundance_ordinates = np.atleast_2d(np.asarray(
+            galaxy_abundance_ordinates, dtype=float))[:, idx_sorted]
+
+        self.num_deconvolution_iterations = kwargs.get('num_deconvolution_iterations', 20)
+        self._build_halo_abundance_table(**kwargs)
+        self._update_mean_relation_table()
+
+    def _build_halo_abundance_table(self, **kwargs):
+        """ Private method binding the differential abundance of subhalos, 
+        ``self.halo_abundance_ordinates``, tabulated at the values of 
+        :math:`\\log_{10}` ``prim_haloprop`` stored in ``self.halo_abundance_abcissa``. 
+        """
+        if ('subhalo_abundance_abcissa' in kwargs.keys()) & (
+            'subhalo_abundance_ordinates' in kwargs.keys()):
+            idx_sorted = np.argsort(kwargs['subhalo_abundance_abcissa'])
+            self.halo_abundance_abcissa = np.log10(np.asarray(
+                kwargs['subhalo_abundance_abcissa'], dtype=float)[idx_sorted])
+            self.halo_abundance_ordinates = np.asarray(
+                kwargs['subhalo_abundance_ordinates'], dtype=float)[idx_sorted]
+            return
+
+        if 'snapshot' in kwargs.keys():
+            snapshot = kwargs['snapshot']
+            if not hasattr(snapshot, '_sorted_log_haloprop_cache'):
+                snapshot._sorted_log_haloprop_cache = {}
+            try:
+                sorted_log_haloprop = snapshot._sorted_log_haloprop_cache[self.prim_haloprop_key]
+            except KeyError:
+                sorted_log_haloprop = np.sort(np.log10(snapshot.halos[self.prim_haloprop_key]))
+                snapshot._sorted_log_haloprop_cache[self.prim_haloprop_key] = sorted_log_haloprop
+            volume = snapshot.Lbox**3
+        elif ('halos' in kwargs.keys()) & ('Lbox' in kwargs.keys()):
+            sorted_log_haloprop = np.sort(np.log10(kwargs['halos'][self.prim_haloprop_key]))
+            volume = kwargs['Lbox']**3
+        else:
+            raise KeyError("AbunMatchSmHm requires either the subhalo_abundance_abcissa and "
+                "subhalo_abundance_ordinates keyword arguments, \n"
+                "the snapshot keyword argument, or the halos and Lbox keyword arguments")
+
+        # The sorted halo property gives the number of halos in each bin 
+        # with a single search of the bin edges 
+        Npts = kwargs.get('Npts_halo_abundance_table', 200)
+        bin_edges = np.linspace(sorted_log_haloprop[0], sorted_log_haloprop[-1], Npts+1)
+        idx_bin_edges = np.searchsorted(sorted_log_haloprop, bin_edges)
+        idx_bin_edges[-1] = len(sorted_log_haloprop)
+        bin_counts = np.diff(idx_bin_edges)
+        self.halo_abundance_abcissa = (bin_edges[1:] + bin_edges[:-1])/2.
+        self.halo_abundance_ordinates = bin_counts/(volume*np.diff(bin_edges))
+
+    def build_mean_relation_table(self, galaxy_abundance_ordinates, scatter_level):
+        """ Tabulate the abundance-matched mean relation for a batch 
+        of galaxy abundance functions and levels of scatter. 
+
+        Parameters 
+        ----------
+        galaxy_abundance_ordinates : array_like 
+            Array of shape (Nbatch, Ng) storing galaxy abundance functions 
+            tabulated at ``self.galaxy_abundance_abcissa``. 
+
+        scatter_level : float or array_like 
+            Level of scatter in dex, either constant or a length-Nbatch array. 
+
+        Returns 
+        -------
+        mean_relation_table : object 
+            `~halotools.empirical_models.model_helpers.TabulatedFunctionFamily` 
+            whose i^th function gives :math:`\\langle\\log_{10}galprop\\rangle` 
+            of the i^th abundance function 
+            as a function of :math:`\\log_{10}` ``prim_haloprop``. 
+
+        Examples 
+        --------
+        >>> log_sm = np.linspace(9, 12, 50)
+        >>> smf = 10**(-2 - (log_sm - 9) - 10**(log_sm - 11))
+        >>> model = AbunMatchSmHm(10**log_sm, smf, subhalo_abundance_abcissa=np.logspace(10, 15, 100), subhalo_abundance_ordinates=np.logspace(-1, -6, 100))
+        >>> table = model.build_mean_relation_table([smf, 2*smf], [0.1, 0.2])
+        """
+        galaxy_abundance_ordinates = np.atleast_2d(
+            np.asarray(galaxy_abundance_ordinates, dtype=float))
+        if np.any(galaxy_abundance_ordinates <= 0):
+            raise ValueError("Galaxy abundances must be strictly positive")
+        scatter_level = (np.zeros(galaxy_abundance_ordinates.shape[0]) + 
+            np.asarray(scatter_level, dtype=float))
+
+        mean_log_galprop = _abundance_matched_mean_relation(
+            self.halo_abundance_abcissa, self.halo_abundance_ordinates, 
+            np.log10(self.galaxy_abundance_abcissa), galaxy_abundance_ordinates, 
+            scatter_level, self.num_deconvolution_iterations)
+
+        return model_helpers.TabulatedFunctionFamily(
+            self.halo_abundance_abcissa, mean_log_galprop)
+
+    def _update_mean_relation_table(self):
+        """ Private method tabulating the mean relation of the input abundance functions 
+        whenever the level of scatter in ``self.param_dict`` has changed. 
+        """
+        scatter_level = self.param_dict[self.scatter_model._get_param_key(0)]
+        if getattr(self, '_mean_relation_scatter_level', None) != scatter_level:
+            self.mean_relation_table = self.build_mean_relation_table(
+                self.galaxy_abundance_ordinates, scatter_level)
+            self._mean_relation_scatter_level = scatter_level
+
     def mean_stellar_mass(self, **kwargs):
-        return None
+        """ Return the mean stellar mass of the galaxies living in the input halos. 
+
+        Parameters 
+        ----------
+        prim_haloprop : array, optional keyword argument 
+            Array of mass-like variable governing stellar mass. 
+            If ``prim_haloprop`` is not passed, then either ``halos`` or ``galaxy_table`` 
+            keyword arguments must be passed. 
+
+        halos : object, optional keyword argument 
+            Data table storing halo catalog. 
+            If ``halos`` is not passed, then either ``prim_haloprop`` or ``galaxy_table`` 
+            keyword arguments must be passed. 
+
+        galaxy_table : object, optional keyword argument 
+            Data table storing galaxy catalog. 
+            If ``galaxy_table`` is not passed, then either ``prim_haloprop`` or ``halos`` 
+            keyword arguments must be passed. 
+
+        input_param_dict : dict, optional
+            dictionary of parameters governing the model. If not passed, 
+            values bound to ``self`` will be chosen. 
+
+        abundance_function_index : int, optional keyword argument 
+            Row of ``galaxy_abundance_ordinates`` whose mean relation is returned. 
+            Default is 0. 
+
+        Returns 
+        -------
+        mstar : array_like 
+            Array containing stellar masses living in the input halos. 
+        """
+        model_helpers.update_param_dict(self, **kwargs)
+
+        # Retrieve the array storing the mass-like variable
+        if 'galaxy_table' in kwargs.keys():
+            key = model_defaults.host_haloprop_prefix+self.prim_haloprop_key
+            mass = kwargs['galaxy_table'][key]
+        elif 'halos' in kwargs.keys():
+            mass = kwargs['halos'][self.prim_haloprop_key]
+        elif 'prim_haloprop' in kwargs.keys():
+            mass = kwargs['prim_haloprop']
+        else:
+            raise KeyError("Must pass one of the following keyword arguments to mean_occupation:\n"
+                "``halos``, ``prim_haloprop``, or ``galaxy_table``")
+
+        self._update_mean_relation_table()
+
+        log_mass = np.log10(np.atleast_1d(mass)).astype(float)
+        func_indices = np.zeros(len(log_mass), dtype=int) + kwargs.get(
+            'abundance_function_index', 0)
+        return 10.**self.mean_relation_table(log_mass, func_indices)
 
 class ConditionalAbunMatch(model_helpers.GalPropModel):
     """ Class to produce any CAM-style model of a galaxy property, such as age matching.  
@@ -146,6 +557,9 @@ class ConditionalAbunMatch(model_helpers.GalPropModel):
         tol : float, optional keyword argument 
             Tolerance for the difference between the actual and desired 
             correlation strength. Default is 0.01. 
+            The noise level attaining the desired correlation strength is read off 
+            a precomputed calibration table, which is accurate to much better than 
+            the default tolerance, and so ``tol`` is not used by the model. 
 
         minimum_sampling_requirement : int, optional keyword argument 
             Minimum number of galaxies in the ``prim_galprop_key`` bin required to 
@@ -312,6 +726,12 @@ class ConditionalAbunMatch(model_helpers.GalPropModel):
             in which case the `_mc_galprop` method determines 
             this information for itself (at a performance cost). 
 
+        seed : int or random number generator, optional keyword argument 
+            Random number seed, or random number generator such as 
+            `numpy.random.RandomState`, used to generate the Monte Carlo realization. 
+            See `~halotools.utils.array_utils.get_random_state`. Default is None, 
+            in which case the global numpy random state is used. 
+
         Returns 
         -------
         output_galprop : array 
@@ -341,82 +761,58 @@ class ConditionalAbunMatch(model_helpers.GalPropModel):
         self.add_new_haloprops(galaxy_table)
 
         # All at once, draw all the randoms we will need
-        np.random.seed(seed=seed)
-        all_randoms = np.random.random(len(galaxy_table)*2)
+        random_state = array_utils.get_random_state(seed)
+        all_randoms = random_state.uniform(0, 1, len(galaxy_table)*2)
         galprop_cumprob = all_randoms[0:len(galaxy_table)]
         galprop_scatter = all_randoms[len(galaxy_table):]
 
         # Initialize the output array
         output_galprop = np.zeros(len(galaxy_table))
 
-        # Determine binning and loop range
+        # Determine the prim_galprop bin of every galaxy. 
+        # Galaxies not covered by any galaxy_table_slice_array entry 
+        # are flagged with -1 and keep a zero output value. 
         if 'galaxy_table_slice_array' not in kwargs.keys():
             binned_prim_galprop = np.digitize(
                 galaxy_table[self.prim_galprop_key], 
                 self.prim_galprop_bins)
-            prim_galprop_loop_range = set(binned_prim_galprop)
         else:
-            prim_galprop_loop_range = range(len(self.one_point_lookup_table))
-
-        for i in prim_galprop_loop_range:
-
-            # Determine the slice corresponding to the i^th prim_galprop bin
-            if 'galaxy_table_slice_array' not in kwargs.keys():
-                idx_bini = np.where(binned_prim_galprop==i)[0]
-                num_bini = len(idx_bini)
-            else:
-                idx_bini = kwargs['galaxy_table_slice_array'][i]
-                num_bini = len(galaxy_table[idx_bini])
-
-            if len(idx_bini) > 0:
-                # Fetch the appropriate number of randoms
-                # for the i^th prim_galprop bin
-                galprop_cumprob_bini = galprop_cumprob[idx_bini]
-                galprop_scatter_bini = galprop_scatter[idx_bini]
-
-                # Fetch the halos in the i^th prim_galprop bin, 
-                # and determine how they are sorted
-                haloprop_bini = galaxy_table[idx_bini][operative_sec_haloprop_key]
-                idx_sorted_haloprop_bini = np.argsort(haloprop_bini)
-
-                galprop_bini = self._condition_matched_galprop(
-                    haloprop_bini[idx_sorted_haloprop_bini], 
-                    galprop_cumprob_bini, i, galprop_scatter_bini, self.tol)
-
-                # Assign the final values to the 
-                # appropriately sorted subarray of output_galprop
-                output_galprop[idx_bini[idx_sorted_haloprop_bini]] = galprop_bini
+            binned_prim_galprop = np.zeros(len(galaxy_table), dtype=int) - 1
+            for i, idx_bini in enumerate(kwargs['galaxy_table_slice_array']):
+                binned_prim_galprop[idx_bini] = i
+        idx_binned = np.where(binned_prim_galprop >= 0)[0]
+        binned_prim_galprop = binned_prim_galprop[idx_binned]
+
+        # Rank the galaxies by sec_haloprop within each bin. 
+        # A single lexsort groups the galaxies by bin, and within each bin 
+        # orders them by sec_haloprop, in reverse order for anti-correlated bins 
+        correlation_strength = self.correlation_strength[binned_prim_galprop]
+        correlation_sign = np.where(correlation_strength < 0, -1, 1)
+        sec_haloprop = np.asarray(galaxy_table[operative_sec_haloprop_key])[idx_binned]
+        idx_sorted_haloprop = np.lexsort(
+            (correlation_sign*sec_haloprop, binned_prim_galprop))
+
+        # Rank the galaxies by the noisy cumulative probability within each bin. 
+        # The noise weight of each bin is read off the calibration table 
+        # for the number of galaxies in the bin, so that no optimization is required. 
+        num_gals_per_bin = np.bincount(binned_prim_galprop, 
+            minlength=len(self.correlation_strength))
+        noise_weight = _cam_noise_weight(self.correlation_strength, 
+            num_gals_per_bin)[binned_prim_galprop]
+        cumprob = galprop_cumprob[idx_binned]
+        noisy_cumprob = (1. - noise_weight)*cumprob + noise_weight*galprop_scatter[idx_binned]
+        idx_sorted_noisy_cumprob = np.lexsort((noisy_cumprob, binned_prim_galprop))
+
+        # Both sorts group the galaxies into the same contiguous blocks of bins, 
+        # so the galaxy with the n^th-ranked sec_haloprop in a bin is assigned the 
+        # galprop of the n^th-ranked noisy cumulative probability in the same bin
+        galprop = model_helpers.call_func_table(self.one_point_lookup_table, 
+            cumprob[idx_sorted_noisy_cumprob], 
+            binned_prim_galprop[idx_sorted_noisy_cumprob])
+        output_galprop[idx_binned[idx_sorted_haloprop]] = galprop
 
         return output_galprop
 
-    def _condition_matched_galprop(self, sorted_haloprop, galprop_cumprob, 
-        ibin, randoms, tol):
-
-        def compute_pearson_difference(r):
-            new_randoms = galprop_cumprob + r*randoms
-            idx_sorted = np.argsort(new_randoms)
-            galprop = (
-                self.one_point_lookup_table[ibin](galprop_cumprob[idx_sorted]))
-            return abs(pearsonr(galprop, sorted_haloprop)[0]-abs(self.correlation_strength[ibin]))
-
-        if hasattr(self, 'correlation_strength'):
-            result = minimize_scalar(compute_pearson_difference, tol=tol)
-            new_randoms = galprop_cumprob + result.x*randoms
-            idx_sorted = np.argsort(new_randoms)
-            galprop = (
-                self.one_point_lookup_table[ibin](galprop_cumprob[idx_sorted]))
-        else:
-            # Zero scatter case
-            idx_sorted = np.argsort(galprop_cumprob)
-            galprop = (
-                self.one_point_lookup_table[ibin](galprop_cumprob[idx_sorted]))
-
-        if self.correlation_strength[ibin] < 0:
-            return galprop[::-1]
-        else:
-            return galprop
-
-
     def build_one_point_lookup_table(self, **kwargs):
         """
         Method computes lookup tables of the cumulative ``galprop`` PDF 
@@ -433,45 +829,67 @@ class ConditionalAbunMatch(model_helpers.GalPropModel):
         prim_galprop_bins : array, required keyword argument 
             Array used to bin ``input_galaxy_table`` by ``prim_galprop_key``. 
 
+        Npts_lookup_table : int, optional keyword argument 
+            Number of cumulative probabilities on which the ``galprop`` 
+            quantiles of each bin are tabulated. 
+            Default is set by ``Npts_prob_table`` in `~halotools.empirical_models.model_defaults`. 
+
+        Notes 
+        -----
+        The lookup tables of all bins are stored together in ``self.one_point_lookup_table``, 
+        a `~halotools.empirical_models.model_helpers.TabulatedFunctionFamily` 
+        whose i^th function gives the ``galprop`` quantile in the i^th bin 
+        as a function of cumulative probability. 
         """
         galaxy_table = kwargs['input_galaxy_table']
         prim_galprop_bins = kwargs['prim_galprop_bins']
+        Npts_lookup_table = kwargs.get('Npts_lookup_table', model_defaults.Npts_prob_table)
+        num_bins = len(prim_galprop_bins)+1
 
-        self.one_point_lookup_table = np.zeros(
-            len(prim_galprop_bins)+1, dtype=object)
-
+        # Sort the galaxies by galprop within each bin with a single sort, 
+        # so that the galaxies of bin i occupy the slice 
+        # bin_start[i]:bin_start[i]+num_gals_per_bin[i] of sorted_galprop
         binned_prim_galprop = np.digitize(
             galaxy_table[self.prim_galprop_key], 
             self.prim_galprop_bins)
-
-        for i in range(len(self.one_point_lookup_table)):
-            idx_bini = np.where(binned_prim_galprop == i)[0]
-            if model_helpers.custom_len(idx_bini) > self.minimum_sampling:
-                gals_bini = galaxy_table[idx_bini]
-                abcissa = np.arange(len(gals_bini))/float(len(gals_bini)-1)
-                ordinates = np.sort(gals_bini[self.galprop_key])
-                self.one_point_lookup_table[i] = (
-                    model_helpers.custom_spline(abcissa, ordinates, k=2)
-                    )
-
-        # For all empty lookup tables, fill them with the nearest lookup table
-        unfilled_lookup_table_idx = np.where(
-            self.one_point_lookup_table == 0)[0]
-        filled_lookup_table_idx = np.where(
-            self.one_point_lookup_table != 0)[0]
-
-        if len(unfilled_lookup_table_idx) > 0:
+        galprop = np.asarray(galaxy_table[self.galprop_key], dtype=float)
+        idx_sorted = np.lexsort((galprop, binned_prim_galprop))
+        sorted_galprop = galprop[idx_sorted]
+        num_gals_per_bin = np.bincount(binned_prim_galprop, minlength=num_bins)
+        bin_start = np.cumsum(num_gals_per_bin) - num_gals_per_bin
+
+        filled_bins = np.where(num_gals_per_bin > self.minimum_sampling)[0]
+        if len(filled_bins) == 0:
+            raise ValueError("None of the bins of prim_galprop_bins contain more than " + 
+                str(self.minimum_sampling) + " galaxies of input_galaxy_table")
+
+        # The j^th galaxy of a bin with n galaxies has cumulative probability j/(n-1). 
+        # Linearly interpolate the sorted galprop of every filled bin 
+        # onto a common grid of cumulative probabilities. 
+        cumprob = np.linspace(0, 1, Npts_lookup_table)
+        num_gals = num_gals_per_bin[filled_bins][:, np.newaxis]
+        position = cumprob*(num_gals-1)
+        left = np.minimum(position.astype(int), num_gals-2)
+        frac = position - left
+        left += bin_start[filled_bins][:, np.newaxis]
+        filled_ordinates = (
+            (1-frac)*sorted_galprop[left] + frac*sorted_galprop[left+1])
+
+        # Each unfilled bin uses the table of the nearest sufficiently populated bin
+        if len(filled_bins) < num_bins:
             msg = ("When building the one-point lookup table from input_galaxy_table, " + 
                 "there were some bins of prim_galprop_bins that contained fewer than " + 
                 str(self.minimum_sampling)+ " galaxies. In such cases, the lookup table " + 
                 "of the nearest sufficiently populated bin will be chosen.")
             warn(msg)
-        for idx in unfilled_lookup_table_idx:
-            closest_filled_idx_idx = array_utils.find_idx_nearest_val(
-                filled_lookup_table_idx, idx)
-            closest_filled_idx = filled_lookup_table_idx[closest_filled_idx_idx]
-            self.one_point_lookup_table[idx] = (
-                self.one_point_lookup_table[closest_filled_idx])
+        bins = np.arange(num_bins)
+        idx_right = np.minimum(np.searchsorted(filled_bins, bins), len(filled_bins)-1)
+        idx_left = np.maximum(idx_right - 1, 0)
+        use_left = (bins - filled_bins[idx_left]) < (filled_bins[idx_right] - bins)
+        nearest_filled_idx = np.where(use_left, idx_left, idx_right)
+
+        self.one_point_lookup_table = model_helpers.TabulatedFunctionFamily(
+            cumprob, filled_ordinates[nearest_filled_idx])
 
     def _build_param_dict(self, **kwargs):
         """ Method creates ``self.param_dict`` regulating the strength of 
@@ -15,6 +15,7 @@ from scipy.interpolate import UnivariateSpline as spline
 from . import model_defaults, model_helpers, halo_prof_components
 from . import gal_prof_components as gpc
 from ..utils.array_utils import array_like_length as custom_len
+from ..utils.array_utils import get_random_state
 from ..sim_manager import sim_defaults
 
 
@@ -68,7 +69,10 @@ class IsotropicGalProf(halo_prof_components.HaloProfileModel):
         for key in self.prof_param_keys:
             setattr(self, key, getattr(self.halo_prof_model, key))
 
-        self.build_inv_cumu_lookup_table()
+        # Profiles with an analytic inverse of the cumulative mass PDF, e.g., NFW, 
+        # are sampled directly; all others need the lookup table of the halo profile 
+        if not hasattr(self.halo_prof_model, 'inverse_cumulative_mass_PDF'):
+            self.halo_prof_model.build_inv_cumu_lookup_table()
 
         self.publications = self.halo_prof_model.publications
 
@@ -95,9 +99,10 @@ class IsotropicGalProf(halo_prof_components.HaloProfileModel):
             There should be an input ``param_array`` for every parameter in the profile model, 
             all of the same length. 
 
-        seed : int, optional keyword argument
-            Random number seed used to generate Monte Carlo realization. 
-            Default is None. 
+        seed : int or random number generator, optional keyword argument
+            Random number seed, or random number generator such as 
+            `numpy.random.RandomState`, used to generate Monte Carlo realization. 
+            See `~halotools.utils.array_utils.get_random_state`. Default is None. 
 
         Returns 
         -------
@@ -108,9 +113,17 @@ class IsotropicGalProf(halo_prof_components.HaloProfileModel):
         # Draw random values for the cumulative mass PDF         
         # These will be turned into random radial positions 
         # via the method of transformation of random variables
-        if 'seed' in kwargs.keys():
-            np.random.seed(kwargs['seed'])
-        rho = np.random.random(len(args[0]))
+        random_state = get_random_state(kwargs.get('seed', None))
+        rho = random_state.uniform(0, 1, len(args[0]))
+
+        # When the halo profile can be inverted in closed form, 
+        # the transformation is done in a single vectorized call 
+        if hasattr(self.halo_prof_model, 'inverse_cumulative_mass_PDF'):
+            return self.halo_prof_model.inverse_cumulative_mass_PDF(rho, *args)
+
+        # Otherwise we use the lookup table of inverse cumulative mass profile functions 
+        if not hasattr(self.halo_prof_model, 'cumu_inv_func_family'):
+            self.halo_prof_model.build_inv_cumu_lookup_table()
 
         # Discretize each profile parameter for every galaxy
         # Store the collection of arrays in digitized_param_list 
@@ -142,10 +155,11 @@ class IsotropicGalProf(halo_prof_components.HaloProfileModel):
             )
         # Now we have an array of indices for our functions, and we need to evaluate 
         # the i^th function on the i^th element of rho. 
-        # Call the model_helpers module to access generic code for doing this.
+        # All the functions are tabulated on a common grid, 
+        # so this is done with a single vectorized interpolation. 
         # (Remember that the interpolation is being done in log-space)
-        return 10.**model_helpers.call_func_table(
-            self.halo_prof_model.cumu_inv_func_table, np.log10(rho), func_table_indices)
+        return 10.**self.halo_prof_model.cumu_inv_func_family(
+            np.log10(rho), func_table_indices)
 
     def mc_angles(self, Npts, **kwargs):
         """ Returns Npts random points on the unit sphere. 
@@ -155,8 +169,8 @@ class IsotropicGalProf(halo_prof_components.HaloProfileModel):
         Npts : int 
             Number of 3d points to generate
 
-        seed : int, optional keyword argument
-            Random number seed. Default is None. 
+        seed : int or random number generator, optional keyword argument
+            Random number seed or random number generator. Default is None. 
 
         Returns 
         -------
@@ -164,11 +178,10 @@ class IsotropicGalProf(halo_prof_components.HaloProfileModel):
             Length-Npts arrays of the coordinate positions. 
 
         """
-        if 'seed' in kwargs.keys():
-            np.random.seed(kwargs['seed'])
+        random_state = get_random_state(kwargs.get('seed', None))
 
-        cos_t = np.random.uniform(-1.,1.,Npts)
-        phi = np.random.uniform(0,2*np.pi,Npts)
+        cos_t = random_state.uniform(-1.,1.,Npts)
+        phi = random_state.uniform(0,2*np.pi,Npts)
         sin_t = np.sqrt((1.-cos_t*cos_t))
 
         x = sin_t * np.cos(phi)
@@ -185,8 +198,9 @@ class IsotropicGalProf(halo_prof_components.HaloProfileModel):
         galaxy_table : Astropy Table, required keyword argument
             Data table storing a length-Ngals galaxy catalog. 
 
-        seed : int, optional keyword argument 
-            Random number seed used in Monte Carlo realization
+        seed : int or random number generator, optional keyword argument 
+            Random number seed or random number generator used in Monte Carlo realization. 
+            The angles and the radii are drawn from the same stream. 
 
         Returns 
         -------
@@ -201,6 +215,10 @@ class IsotropicGalProf(halo_prof_components.HaloProfileModel):
             halo_prof_components.TrivialProfile) is True:
             return np.zeros_like(x), np.zeros_like(y), np.zeros_like(z)
         else:
+            # Draw angles and radii from a single stream, 
+            # so that an integer seed does not correlate the two 
+            kwargs['seed'] = get_random_state(kwargs.get('seed', None))
+
             # get angles
             Ngals = len(x)
             x, y, z = self.mc_angles(Ngals, **kwargs)
@@ -222,6 +240,49 @@ class IsotropicGalProf(halo_prof_components.HaloProfileModel):
            
         return x, y, z
 
+    def mc_vel(self, **kwargs):
+        """ Method to generate random velocities of galaxies relative to their host halo, 
+        drawn from isotropic Gaussian distributions whose dispersion is given by 
+        the Jeans solution of the halo profile. 
+
+        Parameters 
+        ----------
+        galaxy_table : Astropy Table, required keyword argument
+            Data table storing a length-Ngals galaxy catalog. 
+
+        scaled_radius : array, required keyword argument 
+            Length-Ngals array of halo-centric distances scaled by the halo boundary, 
+            as returned by `mc_pos`. 
+
+        seed : int or random number generator, optional keyword argument 
+            Random number seed or random number generator used in Monte Carlo realization. 
+
+        Returns 
+        -------
+        vx, vy, vz : arrays 
+            Length-Ngals arrays storing a Monte Carlo realization of the galaxy velocities 
+            relative to their host halo, in units of the virial velocity of the halo. 
+            Galaxies whose halo profile model has no ``dimensionless_velocity_dispersion`` method, 
+            such as `~halotools.empirical_models.halo_prof_components.TrivialProfile`, 
+            are at rest relative to their host halo. 
+        """
+        galaxy_table = kwargs['galaxy_table']
+        Ngals = len(galaxy_table)
+
+        if not hasattr(self.halo_prof_model, 'dimensionless_velocity_dispersion'):
+            return np.zeros(Ngals), np.zeros(Ngals), np.zeros(Ngals)
+
+        profile_params = (
+            [galaxy_table[model_defaults.host_haloprop_prefix+profile_param_key] 
+            for profile_param_key in self.halo_prof_model.prof_param_keys]
+            )
+        sigma = self.halo_prof_model.dimensionless_velocity_dispersion(
+            kwargs['scaled_radius'], *profile_params)
+
+        random_state = get_random_state(kwargs.get('seed', None))
+        vx, vy, vz = random_state.normal(0, 1, (3, Ngals))*sigma
+        return vx, vy, vz
+
 
 
 
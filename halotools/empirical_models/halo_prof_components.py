@@ -7,12 +7,16 @@ intra-halo position of mock galaxies.
 
 __all__ = ['HaloProfileModel','TrivialProfile','NFWProfile']
 
+import os
+import hashlib
 from abc import ABCMeta, abstractmethod, abstractproperty
 from functools import partial
 from itertools import product
 
 import numpy as np
 from scipy.interpolate import InterpolatedUnivariateSpline as spline
+from scipy.interpolate import splrep, splev
+from scipy.special import lambertw
 
 from astropy.extern import six
 from astropy import cosmology
@@ -21,10 +25,18 @@ from astropy import units as u
 from . import model_helpers 
 from . import model_defaults
 from . import halo_prof_param_components
+from . import jeans
 
 from ..utils.array_utils import array_like_length as custom_len
 from ..sim_manager import sim_defaults
+from ..sim_manager import cache_config
 
+# In-memory cache of the inverse cumulative mass lookup tables, 
+# shared by all profile model instances in the running process. 
+# Keys are the hashes computed by HaloProfileModel._inv_cumu_lookup_table_key
+_inv_cumu_lookup_table_cache = {}
+_inv_cumu_table_array_keys = (['knots', 'coeffs', 'spline_degree', 
+    'param_array_dimensions', 'logprob_array', 'prob_table_ordinates'])
 
 ##################################################################################
 
@@ -80,7 +92,8 @@ class HaloProfileModel(object):
     def build_inv_cumu_lookup_table(self, 
         logrmin = model_defaults.default_lograd_min, 
         logrmax = model_defaults.default_lograd_max, 
-        Npts_radius_table=model_defaults.Npts_radius_table):
+        Npts_radius_table=model_defaults.Npts_radius_table, 
+        Npts_prob_table=model_defaults.Npts_prob_table, use_cache=True):
         """ Method used to create a lookup table of inverse cumulative mass 
         profile functions. 
 
@@ -98,6 +111,18 @@ class HaloProfileModel(object):
             Number of control points used in the spline. 
             Default is set in `~halotools.empirical_models.model_defaults`. 
 
+        Npts_prob_table : int, optional 
+            Number of points of the common grid in :math:`\\log_{10}\\mathrm{P}` 
+            on which all the inverse functions are tabulated in ``cumu_inv_func_family``. 
+            Default is set in `~halotools.empirical_models.model_defaults`. 
+
+        use_cache : bool, optional 
+            If True, the tables are loaded from the cache whenever 
+            a table with the same profile class, parameter ranges and radius grid 
+            has been built before, either in memory or on disk 
+            in the directory given by `~halotools.sim_manager.cache_config.get_lookup_tables_dir`. 
+            Newly built tables are added to both caches. Default is True. 
+
         Notes 
         ----- 
 
@@ -107,6 +132,8 @@ class HaloProfileModel(object):
 
             * The interpolation is done in log-space. Thus each function object stored in ``cumu_inv_func_table`` operates on :math:`\\log_{10}\\mathrm{P}`, and returns :math:`\\log_{10}r`, where :math:`\\mathrm{P} = \\mathrm{P}_{\\mathrm{NFW}}( < r | c )`, computed by the `cumulative_mass_PDF` method. 
 
+            * The same functions are also tabulated on a common grid in :math:`\\log_{10}\\mathrm{P}`, and stored as a single `~halotools.empirical_models.model_helpers.TabulatedFunctionFamily` bound to ``cumu_inv_func_family``, which is what is used to generate Monte Carlo realizations. 
+
         """
         
         radius_array = np.logspace(logrmin,logrmax,Npts_radius_table)
@@ -127,19 +154,142 @@ class HaloProfileModel(object):
         if len(param_array_list) == 0:
             self.cumu_inv_func_table = np.array([])
             self.func_table_indices = np.array([])
+            self.cumu_inv_func_family = None
         else:
-            func_table = []
+            table_key = self._inv_cumu_lookup_table_key(
+                logrmin, logrmax, Npts_radius_table, Npts_prob_table)
+            if use_cache is True:
+                cached_tables = _load_inv_cumu_lookup_table(table_key)
+                if cached_tables is not None:
+                    self.cumu_inv_func_table = cached_tables['cumu_inv_func_table']
+                    self.func_table_indices = cached_tables['func_table_indices']
+                    self.cumu_inv_func_family = cached_tables['cumu_inv_func_family']
+                    return
+
+            # Each spline is stored by its knots and coefficients, 
+            # so that the entire table can be cached as a few arrays
+            spline_degree = 4
+            knots, coeffs = [], []
+            logprob_min = 0
             for items in product(*param_array_list):
                 table_ordinates = self.cumulative_mass_PDF(radius_array,*items)
                 log_table_ordinates = np.log10(table_ordinates)
-                funcobj = spline(log_table_ordinates, logradius_array, k=4)
-                func_table.append(funcobj)
+                tck = splrep(log_table_ordinates, logradius_array, k=spline_degree, s=0)
+                knots.append(tck[0])
+                coeffs.append(tck[1])
+                logprob_min = min(logprob_min, log_table_ordinates.min())
 
             param_array_dimensions = [len(param_array) for param_array in param_array_list]
-            self.cumu_inv_func_table = np.array(func_table).reshape(param_array_dimensions)
-            self.func_table_indices = (
-                np.arange(np.prod(param_array_dimensions)).reshape(param_array_dimensions)
-                )
+
+            # Tabulate every inverse function on a common grid spanning 
+            # the full range of log10(P) covered by the spline table
+            table_arrays = {'knots': np.array(knots), 'coeffs': np.array(coeffs), 
+                'spline_degree': np.array(spline_degree), 
+                'param_array_dimensions': np.array(param_array_dimensions), 
+                'logprob_array': np.linspace(logprob_min, 0, Npts_prob_table)}
+            tables = _inv_cumu_tables_from_arrays(table_arrays)
+
+            self.cumu_inv_func_table = tables['cumu_inv_func_table']
+            self.func_table_indices = tables['func_table_indices']
+            self.cumu_inv_func_family = tables['cumu_inv_func_family']
+
+            if use_cache is True:
+                _store_inv_cumu_lookup_table(table_key, tables)
+
+    def _inv_cumu_lookup_table_key(self, logrmin, logrmax, Npts_radius_table, Npts_prob_table):
+        """ Private method returning the string used to identify a lookup table in the cache. 
+
+        The lookup table only depends on the profile class, 
+        the range and spacing of each profile parameter, and the grid of radii 
+        and probabilities, and so these define the key. 
+        """
+        param_specs = tuple(
+            (prof_param_key, 
+            float(getattr(self, prof_param_key + '_lookup_table_min')), 
+            float(getattr(self, prof_param_key + '_lookup_table_max')), 
+            float(getattr(self, prof_param_key + '_lookup_table_spacing')))
+            for prof_param_key in self.prof_param_keys)
+
+        key_items = (self.__class__.__module__, self.__class__.__name__, param_specs, 
+            float(logrmin), float(logrmax), int(Npts_radius_table), int(Npts_prob_table))
+
+        return hashlib.md5(repr(key_items).encode('utf-8')).hexdigest()
+
+
+def _inv_cumu_tables_from_arrays(table_arrays):
+    """ Private function building the lookup table objects from the arrays 
+    storing the knots and coefficients of the inverse cumulative mass splines. 
+
+    The returned dictionary contains both the input arrays, which are what is 
+    written to disk, and the function objects bound by 
+    `HaloProfileModel.build_inv_cumu_lookup_table`. 
+    """
+    tables = dict(table_arrays)
+
+    spline_degree = int(table_arrays['spline_degree'])
+    param_array_dimensions = [int(n) for n in table_arrays['param_array_dimensions']]
+
+    func_table = [partial(splev, tck=(t, c, spline_degree)) 
+        for t, c in zip(table_arrays['knots'], table_arrays['coeffs'])]
+    tables['cumu_inv_func_table'] = np.array(func_table).reshape(param_array_dimensions)
+    tables['func_table_indices'] = (
+        np.arange(np.prod(param_array_dimensions)).reshape(param_array_dimensions)
+        )
+
+    # Tabulating the splines on the common grid is the costly step, 
+    # so the tabulated values are stored with the other arrays
+    if 'prob_table_ordinates' in table_arrays:
+        tables['cumu_inv_func_family'] = model_helpers.TabulatedFunctionFamily(
+            table_arrays['logprob_array'], table_arrays['prob_table_ordinates'])
+    else:
+        tables['cumu_inv_func_family'] = model_helpers.TabulatedFunctionFamily.from_func_table(
+            tables['cumu_inv_func_table'], table_arrays['logprob_array'])
+        tables['prob_table_ordinates'] = tables['cumu_inv_func_family'].ordinates
+
+    return tables
+
+def _inv_cumu_lookup_table_fname(table_key):
+    """ Private function returning the name of the file storing the cached lookup table. 
+    """
+    return os.path.join(cache_config.get_lookup_tables_dir(), 
+        'inv_cumu_lookup_table_' + table_key + '.npz')
+
+def _load_inv_cumu_lookup_table(table_key):
+    """ Private function returning the cached lookup table, or None if there is none. 
+
+    The in-memory cache is checked first; a table found on disk is added to it. 
+    """
+    if table_key in _inv_cumu_lookup_table_cache:
+        return _inv_cumu_lookup_table_cache[table_key]
+
+    try:
+        with np.load(_inv_cumu_lookup_table_fname(table_key)) as f:
+            table_arrays = {key: f[key] for key in _inv_cumu_table_array_keys}
+    except (IOError, OSError, EOFError, ValueError, KeyError):
+        # A missing, unreadable or corrupted file just means the table is rebuilt
+        return None
+
+    tables = _inv_cumu_tables_from_arrays(table_arrays)
+    _inv_cumu_lookup_table_cache[table_key] = tables
+    return tables
+
+def _store_inv_cumu_lookup_table(table_key, tables):
+    """ Private function adding the lookup table to the in-memory and on-disk caches. 
+
+    The file is first written to a temporary name and then renamed, 
+    so that concurrent processes never read a partially written table. 
+    Failure to write to disk, e.g., for a read-only cache directory, is not an error. 
+    """
+    _inv_cumu_lookup_table_cache[table_key] = tables
+
+    try:
+        fname = _inv_cumu_lookup_table_fname(table_key)
+        tmp_fname = fname + '.' + str(os.getpid()) + '.tmp'
+        with open(tmp_fname, 'wb') as f:
+            np.savez(f, **{key: tables[key] for key in _inv_cumu_table_array_keys})
+        os.rename(tmp_fname, fname)
+    except (IOError, OSError):
+        pass
 
 
 class TrivialProfile(HaloProfileModel):
@@ -234,8 +384,8 @@ class NFWProfile(HaloProfileModel):
 
         self.NFWmodel_conc = conc_mass_model.__call__
 
-        self.build_inv_cumu_lookup_table()
-
+        # Monte Carlo realizations of NFW radii are drawn with the closed-form 
+        # inverse_cumulative_mass_PDF, so the lookup table is only built on demand 
         self.publications = ['arXiv:9611107', 'arXiv:0002395', 'arXiv:1402.7073']
 
     def g(self, x):
@@ -352,6 +502,168 @@ class NFWProfile(HaloProfileModel):
                 c = args[0]
                 return self.g(c) / self.g(r*c)
 
+    def inverse_cumulative_mass_PDF(self, p, *args):
+        """ Inverse of the cumulative probability distribution of the NFW profile. 
+
+        The enclosed mass of the NFW profile can be inverted analytically 
+        in terms of the principal branch :math:`W_{0}` of the Lambert W function: 
+        writing :math:`m = P / g(c)`, the scaled radius enclosing a fraction 
+        :math:`P` of the halo mass is 
+        :math:`r = -\\left(1 + 1 / W_{0}\\left(-e^{-m-1}\\right)\\right) / c`. 
+        Thus Monte Carlo realizations of the profile require neither 
+        a lookup table nor any interpolation. 
+
+        Parameters 
+        ----------
+        p : array_like 
+            Value of the cumulative mass PDF, so that :math:`0 \\leq P \\leq 1`. 
+
+        c : array_like 
+            Concentration specifying the halo profile. 
+            If an array, should be of the same length 
+            as the input p. 
+
+        Returns 
+        -------
+        r : array_like 
+            Radius scaled by the halo boundary, so that :math:`0 \\leq r \\leq 1`, 
+            for which :math:`P_{\\mathrm{NFW}}(<r | c) = P`. 
+
+        Examples 
+        --------
+        >>> nfw_halo_prof_model = NFWProfile()
+        >>> Npts = 100
+        >>> p = np.linspace(0.01, 1, Npts)
+        >>> conc_array = np.linspace(1, 25, Npts)
+        >>> radius = nfw_halo_prof_model.inverse_cumulative_mass_PDF(p, conc_array)
+        """
+
+        if len(args)==0:
+            raise SyntaxError("Must pass array of concentrations to inverse_cumulative_mass_PDF. \n"
+                "Only received array of cumulative probabilities.")
+        elif (custom_len(args[0]) != 1) & (custom_len(args[0]) != custom_len(p)):
+            raise ValueError("If passing an array of concentrations to "
+                "inverse_cumulative_mass_PDF, the array must have the same length "
+                "as the array of cumulative probabilities")
+
+        p = np.asarray(p, dtype=float)
+        c = np.asarray(args[0], dtype=float)
+
+        m = p / self.g(c)
+
+        # Close to the branch point of W_0, the argument -exp(-m-1) cannot be 
+        # computed accurately, so at small enclosed mass we instead invert the 
+        # leading terms of the series m = (cr)^2/2 - 2(cr)^3/3 + ... 
+        small_mass_limit = 1.e-8
+        w = lambertw(-np.exp(-np.maximum(m, small_mass_limit)-1.), 0).real
+        s = np.sqrt(2.*np.maximum(m, 0))
+        scaled_radius = np.where(m < small_mass_limit, s + 2.*s*s/3., -1. - 1./w)
+        return scaled_radius / c
+
+    def build_velocity_dispersion_lookup_table(self,
+        logrmin = model_defaults.default_lograd_min,
+        logrmax = model_defaults.default_lograd_max,
+        Npts_radius_table=model_defaults.Npts_radius_table):
+        """ Method used to create a lookup table of the one-dimensional velocity dispersion
+        of tracers of the NFW profile on isotropic orbits, in units of the virial velocity
+        :math:`V_{\\mathrm{vir}} = \\sqrt{GM_{\\mathrm{vir}}/R_{\\mathrm{vir}}}`,
+        as a function of concentration and of radius scaled by the halo boundary.
+
+        The Jeans equation is solved by `~halotools.empirical_models.jeans.sigmasq`
+        for all concentrations of the table at once.
+        The profile is continued beyond the halo boundary up to 100 halo radii,
+        beyond which the contribution to the Jeans integral is negligible.
+        The table is bound to ``velocity_dispersion_func_family``,
+        an instance of `~halotools.empirical_models.model_helpers.TabulatedFunctionFamily`
+        with one function of :math:`\\log_{10}r` per entry of ``NFWmodel_conc_lookup_table_bins``.
+
+        Parameters
+        ----------
+        logrmin : float, optional
+            Minimum radius of the table.
+            Default is set in `~halotools.empirical_models.model_defaults`.
+
+        logrmax : float, optional
+            Maximum radius of the table.
+            Default is set in `~halotools.empirical_models.model_defaults`.
+
+        Npts_radius_table : int, optional
+            Number of radii of the table. The Jeans integral is computed
+            on a grid four times as dense.
+            Default is set in `~halotools.empirical_models.model_defaults`.
+        """
+        parmin = self.NFWmodel_conc_lookup_table_min
+        parmax = self.NFWmodel_conc_lookup_table_max
+        dpar = self.NFWmodel_conc_lookup_table_spacing
+        npts_par = int(np.round((parmax-parmin)/dpar))
+        conc = np.linspace(parmin, parmax, npts_par)
+        self.NFWmodel_conc_lookup_table_bins = conc
+
+        radius_array = np.logspace(logrmin, logrmax, Npts_radius_table)
+        logrmax_jeans = logrmax + 2
+        Npts_jeans = int(4*Npts_radius_table*(logrmax_jeans-logrmin)/(logrmax-logrmin))
+        jeans_radius = np.logspace(logrmin, logrmax_jeans, Npts_jeans)
+
+        # Density and enclosed mass in units of the halo boundary and the halo mass,
+        # so that the Jeans solution is in units of G*Mvir/Rvir
+        cx = conc[:, np.newaxis]*jeans_radius
+        density = 1./(cx*(1. + cx)*(1. + cx))
+        enclosed_mass = self.g(conc)[:, np.newaxis]/self.g(cx)
+        sigmasq = jeans.sigmasq(jeans_radius, density, enclosed_mass,
+            rr_compute=radius_array)/jeans.gee
+
+        self.velocity_dispersion_func_family = model_helpers.TabulatedFunctionFamily(
+            np.log10(radius_array), np.sqrt(sigmasq))
+
+    def dimensionless_velocity_dispersion(self, r, *args):
+        """ One-dimensional velocity dispersion of tracers of the NFW profile on isotropic orbits,
+        in units of the virial velocity :math:`V_{\\mathrm{vir}} = \\sqrt{GM_{\\mathrm{vir}}/R_{\\mathrm{vir}}}`.
+
+        The dispersion is bilinearly interpolated in concentration and :math:`\\log_{10}r`
+        from the table built by `build_velocity_dispersion_lookup_table`,
+        which is built the first time the method is called.
+        Inputs beyond the range of the table are clipped to its edges.
+
+        Parameters
+        ----------
+        r : array_like
+            Radius scaled by the halo boundary, so that :math:`0 < r < 1`.
+
+        c : array_like
+            Concentration specifying the halo profile.
+            If an array, should be of the same length as the input r.
+
+        Returns
+        -------
+        sigma : array_like
+            :math:`\\sigma_{\\mathrm{NFW}}(r | c) / V_{\\mathrm{vir}}`.
+
+        Examples
+        --------
+        >>> nfw_halo_prof_model = NFWProfile()
+        >>> Npts = 100
+        >>> radius = np.logspace(-2, 0, Npts)
+        >>> conc_array = np.linspace(1, 25, Npts)
+        >>> sigma = nfw_halo_prof_model.dimensionless_velocity_dispersion(radius, conc_array)
+        """
+        if len(args)==0:
+            raise SyntaxError("Must pass array of concentrations to dimensionless_velocity_dispersion. \n"
+                "Only received array of radii.")
+        if not hasattr(self, 'velocity_dispersion_func_family'):
+            self.build_velocity_dispersion_lookup_table()
+
+        func_family = self.velocity_dispersion_func_family
+        conc_bins = self.NFWmodel_conc_lookup_table_bins
+
+        logr = np.log10(np.maximum(np.asarray(r, dtype=float), np.finfo(float).tiny))
+        logr = np.clip(logr, func_family.abcissa[0], func_family.abcissa[-1])
+        c = np.clip(np.zeros_like(logr) + args[0], conc_bins[0], conc_bins[-1])
+
+        left = np.clip(np.searchsorted(conc_bins, c, side='right') - 1, 0, len(conc_bins)-2)
+        weight = (c - conc_bins[left])/(conc_bins[left+1] - conc_bins[left])
+        return ((1 - weight)*func_family(logr, left) +
+            weight*func_family(logr, left+1))
+
 ##################################################################################
 
 
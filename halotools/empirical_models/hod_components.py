@@ -14,13 +14,13 @@ from copy import copy
 import numpy as np
 import math
 from scipy.special import erf 
-from scipy.stats import poisson
 from scipy.optimize import brentq
 from scipy.interpolate import InterpolatedUnivariateSpline as spline
 
 from . import model_defaults
 from . import model_helpers as model_helpers
 from . import smhm_components
+from . import occupation_sampling
 
 from ..utils.array_utils import array_like_length as custom_len
 from ..  import sim_manager
@@ -71,6 +71,20 @@ class OccupationComponent(model_helpers.GalPropModel):
             initialized with an empty dictionary. 
             The parameters stored in ``self.param_dict`` are the only ones that 
             will be varied in MCMC-type likelihood analyses. 
+
+        mean_function_tabulation : string, optional keyword argument 
+            If ``grid`` or ``unique``, `mean_occupation` is evaluated on a table 
+            of the primary halo property that is computed once per halo catalog, 
+            rather than on every halo. See 
+            `~halotools.empirical_models.model_helpers.tabulate_mean_function`. 
+            Only appropriate for occupations that depend on the halos 
+            exclusively through ``prim_haloprop_key``. 
+            Default is None, for exact evaluation. 
+
+        Npts_mean_function_table : int, optional keyword argument 
+            Number of points of the log-mass grid used when 
+            ``mean_function_tabulation`` is ``grid``. 
+            Default is set in the `~halotools.empirical_models.model_defaults` module. 
         """
         super(OccupationComponent, self).__init__(galprop_key='occupation')
 
@@ -91,8 +105,15 @@ class OccupationComponent(model_helpers.GalPropModel):
             raise SyntaxError("Any sub-class of OccupationComponent must "
                 "implement a method named %s " % required_method_name)
 
+        if kwargs.get('mean_function_tabulation', None) is not None:
+            self.mean_occupation = model_helpers.tabulate_mean_function(
+                self.mean_occupation, self.prim_haloprop_key, 
+                method=kwargs['mean_function_tabulation'], 
+                Npts=kwargs.get('Npts_mean_function_table', 
+                    model_defaults.Npts_mean_function_table))
+
 
-    def mc_occupation(self, seed=None, **kwargs):
+    def mc_occupation(self, seed=None, out=None, **kwargs):
         """ Method to generate Monte Carlo realizations of the abundance of galaxies. 
 
         Parameters
@@ -116,9 +137,15 @@ class OccupationComponent(model_helpers.GalPropModel):
             Dictionary of parameters governing the model. 
             If not passed, values bound to ``self`` will be chosen. 
 
-        seed : int, optional keyword argument 
-            Random number seed used to generate the Monte Carlo realization. 
-            Default is None. 
+        seed : int or random number generator, optional keyword argument 
+            Random number seed, or random number generator such as 
+            `numpy.random.RandomState`, used to generate the Monte Carlo realization. 
+            See `~halotools.utils.array_utils.get_random_state`. Default is None, 
+            in which case the global numpy random state is used. 
+
+        out : array, optional keyword argument 
+            Pre-allocated integer array into which the realization is written. 
+            Default is None, in which case a new array is allocated. 
 
         Returns
         -------
@@ -127,14 +154,16 @@ class OccupationComponent(model_helpers.GalPropModel):
         """ 
         first_occupation_moment = self.mean_occupation(**kwargs)
         if self.occupation_bound == 1:
-            return self._nearest_integer_distribution(first_occupation_moment, seed=seed, **kwargs)
+            return self._nearest_integer_distribution(first_occupation_moment, 
+                seed=seed, out=out, **kwargs)
         elif self.occupation_bound == float("inf"):
-            return self._poisson_distribution(first_occupation_moment, seed=seed, **kwargs)
+            return self._poisson_distribution(first_occupation_moment, 
+                seed=seed, out=out, **kwargs)
         else:
             raise KeyError("The only permissible values of occupation_bound for instances "
                 "of OccupationComponent are unity and infinity.")
 
-    def _nearest_integer_distribution(self, first_occupation_moment, seed=None, **kwargs):
+    def _nearest_integer_distribution(self, first_occupation_moment, seed=None, out=None, **kwargs):
         """ Nearest-integer distribution used to draw Monte Carlo occupation statistics 
         for central-like populations with only permissible galaxy per halo.
 
@@ -143,8 +172,14 @@ class OccupationComponent(model_helpers.GalPropModel):
         first_occupation_moment : array
             Array giving the first moment of the occupation distribution function. 
 
-        seed : int, optional keyword argument 
-            Random number seed used to generate the Monte Carlo realization. 
+        seed : int or random number generator, optional keyword argument 
+            Random number seed, or random number generator such as 
+            `numpy.random.RandomState`, used to generate the Monte Carlo realization. 
+            See `~halotools.utils.array_utils.get_random_state`. Default is None, 
+            in which case the global numpy random state is used. 
+
+        out : array, optional keyword argument 
+            Pre-allocated integer array into which the realization is written. 
             Default is None. 
 
         Returns
@@ -152,11 +187,10 @@ class OccupationComponent(model_helpers.GalPropModel):
         mc_abundance : array
             Integer array giving the number of galaxies in each of the input halos. 
         """
-        np.random.seed(seed=seed)
-        mc_generator = np.random.random(custom_len(first_occupation_moment))
-        return np.where(mc_generator < first_occupation_moment, 1, 0)
+        return occupation_sampling.nearest_integer_occupation(
+            first_occupation_moment, seed=seed, out=out)
 
-    def _poisson_distribution(self, first_occupation_moment, seed=None, **kwargs):
+    def _poisson_distribution(self, first_occupation_moment, seed=None, out=None, **kwargs):
         """ Poisson distribution used to draw Monte Carlo occupation statistics 
         for satellite-like populations in which per-halo abundances are unbounded. 
 
@@ -165,8 +199,14 @@ class OccupationComponent(model_helpers.GalPropModel):
         first_occupation_moment : array
             Array giving the first moment of the occupation distribution function. 
 
-        seed : int, optional keyword argument 
-            Random number seed used to generate the Monte Carlo realization. 
+        seed : int or random number generator, optional keyword argument 
+            Random number seed, or random number generator such as 
+            `numpy.random.RandomState`, used to generate the Monte Carlo realization. 
+            See `~halotools.utils.array_utils.get_random_state`. Default is None, 
+            in which case the global numpy random state is used. 
+
+        out : array, optional keyword argument 
+            Pre-allocated integer array into which the realization is written. 
             Default is None. 
 
         Returns
@@ -174,12 +214,8 @@ class OccupationComponent(model_helpers.GalPropModel):
         mc_abundance : array
             Integer array giving the number of galaxies in each of the input halos. 
         """
-        np.random.seed(seed=seed)
-        # The scipy built-in Poisson number generator raises an exception 
-        # if its input is zero, so here we impose a simple workaround
-        first_occupation_moment = np.where(first_occupation_moment <=0, 
-            model_defaults.default_tiny_poisson_fluctuation, first_occupation_moment)
-        return poisson.rvs(first_occupation_moment)
+        return occupation_sampling.poisson_occupation(
+            first_occupation_moment, seed=seed, out=out)
 
     @abstractmethod
     def mean_occupation(self):
@@ -290,6 +326,7 @@ class Zheng07Cens(OccupationComponent):
             else:
                 self.param_dict[key] = published_param_dict[key]
 
+    @model_helpers.memoize_on_param_dict()
     def mean_occupation(self, **kwargs):
         """ Expected number of central galaxies in a halo of mass halo_mass.
         See Equation 2 of arXiv:0703457.
@@ -504,6 +541,8 @@ class Leauthaud11Cens(OccupationComponent):
 
         self.publications = ['arXiv:1103.2077', 'arXiv:1104.0928']
 
+    @model_helpers.memoize_on_param_dict(attr_names=('threshold', ), 
+        submodel_names=('smhm_model', ))
     def mean_occupation(self, **kwargs):
         """ Expected number of central galaxies in a halo of mass halo_mass.
         See Equation 8 of arXiv:1103.2077.
@@ -682,6 +721,7 @@ class Kravtsov04Sats(OccupationComponent):
                 warnings.warn("Satellite and Central luminosity tresholds do not match")
             #
 
+    @model_helpers.memoize_on_param_dict(submodel_names=('central_occupation_model', ))
     def mean_occupation(self, **kwargs):
         """Expected number of satellite galaxies in a halo of mass logM.
         See Equation 5 of arXiv:0703457.
@@ -913,6 +953,8 @@ class Leauthaud11Sats(OccupationComponent):
 
         self.publications = self.central_occupation_model.publications
 
+    @model_helpers.memoize_on_param_dict(attr_names=('threshold', 'modulate_with_cenocc'), 
+        submodel_names=('central_occupation_model', ))
     def mean_occupation(self, **kwargs):
         """ Expected number of central galaxies in a halo of mass halo_mass.
         See Equation 12-14 of arXiv:1103.2077.
@@ -9,174 +9,225 @@ Author: Surhud More (surhudkicp@gmail.com), Kavli IPMU
 
 Bugs: Report to the above email address
 
+All functions are vectorized: the profiles of a batch of halos can be passed
+as arrays of shape (Nhalos, Npts) tabulated on a common grid of radii,
+and every integral is computed on that grid, for all halos and all output radii at once.
+
 """
-# = \\frac{4\\pi G N_{sat}(r | M) M(<r)}{r^{2}}
 
-__all__ = ['dsigmasq','sigmasq']
+__all__ = ['dsigmasq', 'sigmasq', 'sigmasq_los']
 
-import scipy.integrate as si
-import scipy.interpolate as sint
-from scipy import interpolate
 import numpy as np
-from math import *
-from pylab import *
+
+from . import model_defaults
 
 # Some physical constants
+# Gravitational constant in units of Mpc (km/s)^2 / Msun
 gee=4.2994E-9
 
-def dsigmasq(rrp,nsat_spl,massprof_spl,norm):
-    """ Integrand of the spherical Jeans equation:
-
-    :math:`\\frac{d\\sigma^2(r|M)}{dr} = \\frac{4\\pi G N_{sat}(r | M) M(<r)}{r^{2}}`
+def _log_interp_weights(x, xp):
+    """ Private function returning the indices and weights that linearly interpolate
+    in :math:`\\log r` a function tabulated on the increasing grid ``xp`` at the points ``x``,
+    together with a mask of the points lying within the grid.
+    Every function tabulated on ``xp`` is then interpolated
+    as ``f[..., left]*(1-weight) + f[..., left+1]*weight``.
+    """
+    log_xp = np.log(xp)
+    log_x = np.log(np.maximum(x, np.finfo(float).tiny))
+    left = np.clip(np.searchsorted(log_xp, log_x, side='right') - 1, 0, len(xp)-2)
+    weight = (log_x - log_xp[left])/(log_xp[left+1] - log_xp[left])
+    inside = (x >= xp[0]) & (x <= xp[-1])
+    return left, weight, inside
+
+def _log_interp(f, left, weight, inside):
+    """ Private function interpolating the last axis of ``f``
+    with the output of `_log_interp_weights`. Points outside the grid are set to zero.
+    """
+    result = np.take(f, left, axis=-1)*(1-weight) + np.take(f, left+1, axis=-1)*weight
+    return np.where(inside, result, 0.)
 
-    Parameters 
+def _cumulative_jeans_integral(rr, nsat, massprof):
+    """ Private function returning :math:`N_{sat}(r)\\sigma^{2}(r)`
+    on the grid ``rr``, computed as the cumulative trapezoidal integral in :math:`\\log r`
+    of `dsigmasq` from ``rr`` to the outermost radius of the grid.
+    """
+    integrand = dsigmasq(rr, nsat, massprof)*rr
+    segments = 0.5*(integrand[..., 1:] + integrand[..., :-1])*np.diff(np.log(rr))
+    cumulative_integral = np.zeros_like(integrand)
+    cumulative_integral[..., :-1] = np.cumsum(segments[..., ::-1], axis=-1)[..., ::-1]
+    return cumulative_integral
+
+def _check_profiles(rr, nsat, massprof):
+    """ Private function enforcing the shapes of the tabulated profiles.
+    """
+    rr = np.asarray(rr, dtype=float)
+    nsat = np.asarray(nsat, dtype=float)
+    massprof = np.asarray(massprof, dtype=float)
+    if (rr.ndim != 1) or (len(rr) < 2) or np.any(rr <= 0) or np.any(np.diff(rr) <= 0):
+        raise ValueError("rr must be a one-dimensional, monotonically increasing "
+            "array of positive radii")
+    if (nsat.shape[-1] != len(rr)) or (massprof.shape[-1] != len(rr)):
+        raise ValueError("The last dimension of nsat and massprof "
+            "must have the same length as rr")
+    return rr, nsat, massprof
+
+def dsigmasq(rr, nsat, massprof):
+    """ Integrand of the spherical Jeans equation for isotropic orbits:
+
+    :math:`-\\frac{d[N_{sat}(r|M)\\sigma^2(r|M)]}{dr} = \\frac{G N_{sat}(r | M) M(<r)}{r^{2}}`
+
+    Parameters
     ----------
-    rrp : array_like 
-        An array with radii at which dsigma^s(r|M) needs to be computed
+    rr : array_like
+        Radii in Mpc at which the integrand is computed.
 
-    nsat_spl : array_like
-        Spline with the number density distribution of satellites
+    nsat : array_like
+        Number density of satellites at the radii ``rr``.
+        Profiles of a batch of halos are passed as an array of shape (Nhalos, len(rr)).
 
-    massprof_spl : array_like
-        Spline with the mass profile M(<r)
+    massprof : array_like
+        Mass within the radii ``rr``, in Msun,
+        of the same shape as ``nsat``.
 
-    Returns 
+    Returns
     -------
     result : array_like
-        d[Sigma^2(r|M)]
+        :math:`-d[N_{sat}\\sigma^2(r|M)]/dr`
 
     """
-    nsat_part=nsat_spl(rrp)
-    mass_part=massprof_spl(rrp)
-    return norm*nsat_part*4*np.pi*gee*mass_part/rrp^2
+    rr = np.asarray(rr, dtype=float)
+    return np.asarray(nsat)*gee*np.asarray(massprof)/(rr*rr)
 
-def sigmasq(rr, nsat, massprof, rr_compute):
-    """ 3d velocity dispersion profile of a tracer population, 
+def sigmasq(rr, nsat, massprof, rr_compute=None):
+    """ One-dimensional velocity dispersion profile of a tracer population on isotropic orbits,
     computed by integrating `dsigmasq`:
 
-    :math:`\\sigma^2(r|M) = \\frac{1}{N_{sat}(r|M)}\\int_{r}^{\\infty}dr'\\frac{d\\sigma^{2}(r'|M)}{dr'}`
+    :math:`\\sigma^2(r|M) = \\frac{1}{N_{sat}(r|M)}\\int_{r}^{r_{max}}dr'\\frac{G N_{sat}(r' | M) M(<r')}{r'^{2}}`
+
+    The integral is evaluated for all radii at once as a cumulative trapezoidal
+    integral in :math:`\\log r` on the grid ``rr``, whose outermost radius is :math:`r_{max}`.
+    The three-dimensional velocity dispersion is :math:`3\\sigma^2`.
 
-    Parameters 
+    Parameters
     ----------
     rr : array_like
-        An array with radii at which the the number density distribution of
-        satellites :math:`N_{sat}(r)` and the mass profile :math:`M(<r)` are calculated
+        Logarithmically spaced, increasing radii in Mpc at which the number density distribution of
+        satellites :math:`N_{sat}(r)` and the mass profile :math:`M(<r)` are tabulated.
 
     nsat : array_like
-        Number density of satellites at the input radii rr
+        Number density of satellites at the input radii rr.
+        Profiles of a batch of halos are passed as an array of shape (Nhalos, len(rr)).
 
     massprof : array_like
-        Mass within a given radius r
+        Mass within a given radius r, in Msun, of the same shape as ``nsat``.
 
-    rr_compute : array_like
-        Radii at which sigma^2 should be computed
+    rr_compute : array_like, optional
+        Radii at which sigma^2 should be computed,
+        common to all halos of the batch. Default is ``rr``.
 
-    Returns 
+    Returns
     -------
     res_arr : array_like
-        :math:`\\sigma^{2}` (rr_compute | nsat, massprof), returned in units of (km/s)^2
-
+        :math:`\\sigma^{2}` (rr_compute | nsat, massprof), returned in units of (km/s)^2,
+        of shape nsat.shape[:-1] + (len(rr_compute), ).
+        Radii outside the grid, or where ``nsat`` vanishes, are assigned zero.
+
+    Examples
+    --------
+    >>> rr = np.logspace(-3, 0, 100)
+    >>> nsat = rr**-2
+    >>> massprof = np.array([1.e12, 1.e13])[:, np.newaxis]*rr
+    >>> sigma2 = sigmasq(rr, nsat, massprof, rr_compute = np.logspace(-2, -1, 5))
     """
+    rr, nsat, massprof = _check_profiles(rr, nsat, massprof)
+    if rr_compute is None:
+        rr_compute = rr
+    rr_compute = np.asarray(rr_compute, dtype=float)
 
-    # Do not raise a bounds error, but just assume the value to be zero when
-    # out of bounds
-    nsat_spl=sint.interp1d(rr,nsat,bounds_error=0,fill_value=0,kind='cubic')
-    massprof_spl=sint.interp1d(rr,massprof,bounds_error=0,fill_value=0,kind='cubic')
+    nsat_sigmasq = _cumulative_jeans_integral(rr, nsat, massprof)
 
-    res_arr=rr_compute*0.0
+    left, weight, inside = _log_interp_weights(rr_compute, rr)
+    nsat_compute = _log_interp(nsat, left, weight, inside)
+    nsat_sigmasq_compute = _log_interp(nsat_sigmasq, left, weight, inside)
 
-    for i in range(rr_compute.size):
-        norm=1./nsat_spl(rr_compute[i])
-        res,err=si.quad(dsigmasq,rr_compute[i],rr[-1],epsrel=1E-3,args=(nsat_spl,massprof_spl,norm))
-        res_arr[i]=res
+    positive = nsat_compute > 0
+    return np.where(positive,
+        nsat_sigmasq_compute/np.where(positive, nsat_compute, 1.), 0.)
 
-    return res_arr
-
-"""
+def sigmasq_los(rr, nsat, massprof, rap_compute, los_integral_limit=np.inf,
+    Npts_los_integration_table=model_defaults.Npts_los_integration_table):
+    """ Line-of-sight velocity dispersion profile of a tracer population on isotropic orbits.
 
-Implemented integration equation:
-sigma_los^2(rap|M) = N/D
-D = \int_rap^{Rvir} nsat(r'|M) 2r'/(r'^2-rap^2)^{1/2} dr'
+    Implemented integration equation:
 
-Returns dnsat at a distance rr,rr+drr from the center and where the line of
-sight distance is rap
+    :math:`\\sigma_{los}^2(R|M) = N/D`
 
-:Parameters:
+    :math:`N = \\int_R^{r_{lim}} N_{sat}(r'|M) \\sigma^2(r'|M) \\frac{2r'}{(r'^2-R^2)^{1/2}} dr'`
 
--    rr: An array with radii at which dnsat needs to be calculated
--    rap: The fixed projected radius at which dnsat is calculated
--    nsat_spl: Spline with the number density distribution of satellites
-
-"""
-def dnsat(rr,rap,nsat_spl):
-    return nsat_spl(rr)*2*rr/(rr**2-rap**2)**0.5
-
-"""
+    :math:`D = \\int_R^{r_{lim}} N_{sat}(r'|M) \\frac{2r'}{(r'^2-R^2)^{1/2}} dr'`
 
-Implemented integration equation:
-sigma_los^2(rap|M) = N/D
-N = \int_rap^{Rvir} nsat(r'|M) sigmasq(r|M) 2r'/(r'^2-rap^2)^{1/2} dr'
+    Both projections are computed in terms of the line-of-sight distance
+    :math:`z = (r'^2-R^2)^{1/2}`, so that the integrands have no singularity at :math:`r'=R`,
+    with a trapezoidal rule on a grid of :math:`z` that is refined towards :math:`z=0`.
+    All projected radii and all halos of the batch are computed at once.
 
-Returns dN, which needs to be integrated in order to obtain the numerator of the
-line of sight velocity dispersion
-
-:Parameters:
-
--    rr: An array with radii at which the the number density distribution of
-     satellites and the mass profile (M[<rr]) are calculated
--    rap: The fixed projected radius at which dnsat is calculated
--    nsat_spl: Spline with the number density distribution of satellites
--    sigmasq_spl: Spline with the sigma^2(r) is initialized
-
-"""
-def dsigmasq_los(rr,rap,nsat_spl,sigmasq_spl):
-    return sigmasq_spl(rr)*nsat_spl(rr)*2*rr/(rr**2-rap**2)**0.5
-
-"""
-
-Implemented integration equation:
-sigma_los^2(rap|M) = N/D
-N = \int_rap^{Rvir} nsat(r'|M) sigmasq(r|M) 2r'/(r'^2-rap^2)^{1/2} dr'
-D = \int_rap^{Rvir} nsat(r'|M) 2r'/(r'^2-rap^2)^{1/2} dr'
-
-The integral limit can be changed to an appropriate number other than Rvir if
-desired
-
-:Parameters:
+    Parameters
+    ----------
+    rr : array_like
+        Logarithmically spaced, increasing radii in Mpc at which the number density distribution of
+        satellites and the mass profile (M[<rr]) are tabulated.
+        You can provide rr in units of Rvir, too.
 
--    rr: An array with radii at which the the number density distribution of
-     satellites and the mass profile (M[<rr]) are calculated, you can provide rr
-     in units of Rvir, too
--    nsat: Number density of satellites at a given radius rr
--    massprof: Mass within a given radius rr
--    rap_compute: Radii at which sigma^2_los should be computed
--    los_integral_limit: Provide the line-of-sight integral limit, default is
-     the maximum of rr. If rr is in units of Rvir and you want to integrate to
-     Rvir, then provide los_integral_limit=1
+    nsat : array_like
+        Number density of satellites at the radii ``rr``.
+        Profiles of a batch of halos are passed as an array of shape (Nhalos, len(rr)).
 
-:Returns:
+    massprof : array_like
+        Mass within the radii ``rr``, in Msun, of the same shape as ``nsat``.
 
--    res_arr: Sigma^2_los(rap_compute|nsat,massprof) in (km/s)^2
+    rap_compute : array_like
+        Projected radii at which :math:`\\sigma^2_{los}` should be computed,
+        common to all halos of the batch.
 
-:Examples:
+    los_integral_limit : float, optional
+        Line-of-sight integral limit :math:`r_{lim}`. Default is the maximum of rr.
+        If rr is in units of Rvir and you want to integrate to Rvir,
+        then provide los_integral_limit=1.
 
-"""
-def sigmasq_los(rr, nsat, massprof, rap_compute, los_integral_limit=np.inf):
+    Npts_los_integration_table : int, optional
+        Number of points of the line-of-sight integrals.
+        Default is set in `~halotools.empirical_models.model_defaults`.
 
-    if(los_integral_limit==np.inf):
-        los_integral_limit=rr[-1]
+    Returns
+    -------
+    res_arr : array_like
+        :math:`\\sigma^2_{los}` (rap_compute | nsat, massprof) in (km/s)^2,
+        of shape nsat.shape[:-1] + (len(rap_compute), ).
+        Projected radii beyond the integral limit are assigned zero.
+
+    Examples
+    --------
+    >>> rr = np.logspace(-3, 0, 100)
+    >>> nsat = rr**-2
+    >>> massprof = np.array([1.e12, 1.e13])[:, np.newaxis]*rr
+    >>> sigma2_los = sigmasq_los(rr, nsat, massprof, np.logspace(-2, -1, 5))
+    """
+    rr, nsat, massprof = _check_profiles(rr, nsat, massprof)
+    los_integral_limit = min(los_integral_limit, rr[-1])
+    rap_compute = np.atleast_1d(rap_compute).astype(float)
 
-    # First obtain the spline for nsat(r)
-    nsat_spl=sint.interp1d(rr,nsat,bounds_error=0,fill_value=0,kind='cubic')
+    nsat_sigmasq = _cumulative_jeans_integral(rr, nsat, massprof)
 
-    # Then obtain the spline for sigma^2(r)
-    sigmasq_r=sigmasq(rr,nsat,massprof,rr)
-    sigmasq_spl=sint.interp1d(rr,sigmasq_r,bounds_error=0,fill_value=0,kind='cubic')
+    # Line-of-sight distances z = zmax*u^2, so that dz = 2*zmax*u*du
+    u = np.linspace(0, 1, Npts_los_integration_table)
+    zmax = np.sqrt(np.maximum(los_integral_limit**2 - rap_compute**2, 0))
+    z = zmax[:, np.newaxis]*u*u
+    jacobian = 2*zmax[:, np.newaxis]*u
+    r = np.sqrt(rap_compute[:, np.newaxis]**2 + z*z)
 
-    sigmasq_los_res=rap_compute*0.0
-    for i in range(rr_compute.size):
-        denominator,err=si.quad(dnsat,rap_compute[i],los_integral_limit,epsrel=1E-3,args=(rap_compute[i],nsat_spl))
-        numerator,err=si.quad(dsigmasq_los,rap_compute[i],los_integral_limit,epsrel=1E-3,args=(rap_compute[i],nsat_spl,sigmasq_spl))
-        sigmasq_los_res[i]=numerator/denominator
+    left, weight, inside = _log_interp_weights(r, rr)
+    numerator = np.trapz(_log_interp(nsat_sigmasq, left, weight, inside)*jacobian, u, axis=-1)
+    denominator = np.trapz(_log_interp(nsat, left, weight, inside)*jacobian, u, axis=-1)
 
-    return sigmasq_los_res
+    positive = denominator > 0
+    return np.where(positive, numerator/np.where(positive, denominator, 1.), 0.)
@@ -9,20 +9,143 @@ Currently only composite HOD models are supported.
 """
 
 import numpy as np
+import multiprocessing
+from collections import OrderedDict
 
 from astropy.extern import six
+from astropy.table import Table
 from abc import ABCMeta, abstractmethod, abstractproperty
 
-from astropy.table import Table 
-
 from . import model_helpers as model_helpers
 from . import model_defaults
 
 from ..sim_manager import sim_defaults
+from ..utils.table_utils import GalaxyTable
+from ..utils.array_utils import spawn_seeds, get_random_state
 
 __all__ = ['MockFactory', 'HodMockFactory', 'SubhaloMockFactory']
 __author__ = ['Andrew Hearin']
 
+# Mock being populated by the worker processes of HodMockFactory.populate. 
+# Worker processes inherit this reference when they are forked, 
+# which avoids pickling the model and halo catalog for every chunk. 
+_mock_being_populated = None
+
+def _populate_halo_chunk(args):
+    """ Private function called by the worker processes of `HodMockFactory.populate`. 
+    Defined at module level so that it can be passed to `multiprocessing.Pool`. 
+    """
+    first_halo, last_halo, chunk_seed = args
+    return _mock_being_populated._populate_halo_chunk(first_halo, last_halo, chunk_seed)
+
+def _host_halo_cut(halos, particle_mass, halocut_funcobj=None):
+    """ Private function returning the halos populated by `HodMockFactory`. 
+
+    Only host halos are selected, since HOD-style models populate host halos, 
+    together with a conservative mvir completeness cut. 
+    This can be relaxed by changing sim_defaults.Num_ptcl_requirement. 
+    Any additional cuts are made by ``halocut_funcobj``. 
+    """
+    cutoff_mvir = sim_defaults.Num_ptcl_requirement*particle_mass
+    halo_cut = (halos['upid']==-1) & (halos['mvir'] > cutoff_mvir)
+    halos = halos[halo_cut]
+
+    if halocut_funcobj is not None:
+        halos = halocut_funcobj(halos=halos)
+    return halos
+
+def _preprocessed_halos_key(snapshot, model, new_haloprop_func_dict):
+    """ Private function returning the key of the pre-processed halo catalog 
+    in the cache bound to the snapshot. 
+
+    The cut catalog depends only on the cut definitions, and the new columns 
+    only on the function objects creating them, so these define the key. 
+    Function objects are compared by identity, 
+    or for bound methods by the identity of the instance and function. 
+    The behaviour of a bound method usually depends on the attributes of its instance, 
+    e.g., the ``redshift``, ``cosmology`` and ``conc_mass_model`` of 
+    `~halotools.empirical_models.ConcMass`, so the current values of these attributes 
+    are also part of the key (see `_funcobj_state`). Any other change 
+    to the behaviour of these functions requires ``use_cache=False``. 
+    """
+    new_haloprop_funcs = tuple(
+        (key, func, _funcobj_state(func)) 
+        for key, func in sorted(new_haloprop_func_dict.items(), key = lambda item: item[0]))
+    prof_param_funcs = tuple(
+        (key, getattr(model, key + '_halos'), 
+            _funcobj_state(getattr(model, key + '_halos'))) 
+        for key in sorted(model.prof_param_keys))
+    halocut_funcobj = getattr(model, 'halocut_funcobj', None)
+
+    return (sim_defaults.Num_ptcl_requirement, snapshot.particle_mass, 
+        halocut_funcobj, _funcobj_state(halocut_funcobj), 
+        new_haloprop_funcs, prof_param_funcs)
+
+def _preprocessed_halos(snapshot, model, new_haloprop_func_dict={}, use_cache=False):
+    """ Private function returning the halo catalog of ``snapshot`` pre-processed for ``model``: 
+    the host halos selected by `_host_halo_cut`, with new columns for the 
+    new halo properties and the halo profile parameters of the model. 
+
+    The catalog is returned in a dictionary, under the ``halos`` key, together with 
+    a ``halo_columns`` dictionary in which contiguous arrays of its columns may be stored. 
+    Other quantities derived from the catalog may be memoized in the same dictionary, 
+    e.g., the halo pair counts of `~halotools.empirical_models.TabulatedHodClustering`. 
+    If ``use_cache`` is True, the dictionary is memoized on the snapshot, 
+    keyed by `_preprocessed_halos_key`. The cache keeps the 
+    ``model_defaults.preprocessed_halos_cache_size`` most recently used catalogs. 
+    """
+    cache_key = _preprocessed_halos_key(snapshot, model, new_haloprop_func_dict)
+    if use_cache is True:
+        if not hasattr(snapshot, '_preprocessed_halos_cache'):
+            snapshot._preprocessed_halos_cache = OrderedDict()
+        cache = snapshot._preprocessed_halos_cache
+        if cache_key in cache:
+            # Move the catalog to the end of the queue of most recently used catalogs
+            preprocessed_halos = cache.pop(cache_key)
+            cache[cache_key] = preprocessed_halos
+            return preprocessed_halos
+
+    # Select host halos above the completeness limit, 
+    # and make any additional cuts requested by the composite model
+    halos = _host_halo_cut(snapshot.halos, snapshot.particle_mass, 
+        getattr(model, 'halocut_funcobj', None))
+
+    ### Create new columns of the halo catalog, if applicable
+    for new_haloprop_key, new_haloprop_func in new_haloprop_func_dict.items():
+        halos[new_haloprop_key] = new_haloprop_func(halos=halos)
+
+    # Create new columns for the halo catalog associated with each 
+    # parameter of each halo profile model, e.g., 'NFWmodel_conc'. 
+    # New column names are the keys of the halo_prof_func_dict dictionary; 
+    # new column values are computed by the function objects in halo_prof_func_dict 
+    for halo_prof_param_key in model.prof_param_keys:
+        method_name = halo_prof_param_key + '_halos'
+        method_behavior = getattr(model, method_name)
+        halos[halo_prof_param_key] = method_behavior(halos=halos)
+
+    preprocessed_halos = {'halos': halos, 'halo_columns': {}}
+    if use_cache is True:
+        cache[cache_key] = preprocessed_halos
+        while len(cache) > model_defaults.preprocessed_halos_cache_size:
+            cache.popitem(last=False)
+    return preprocessed_halos
+
+def _funcobj_state(funcobj):
+    """ Private function returning a hashable summary of the state 
+    on which the behaviour of a function object depends, used in the keys of 
+    the cache of pre-processed halo catalogs. 
+
+    For a bound method, this is the state of its instance returned by 
+    `~halotools.empirical_models.model_helpers._component_state`, e.g., 
+    the ``redshift``, ``cosmology`` and ``conc_mass_model`` of 
+    `~halotools.empirical_models.ConcMass`. 
+    For other function objects the summary is empty. 
+    """
+    instance = getattr(funcobj, '__self__', None)
+    if (instance is None) or (not hasattr(instance, '__dict__')):
+        return ()
+    return model_helpers._component_state(instance)
+
 @six.add_metaclass(ABCMeta)
 class MockFactory(object):
     """ Abstract base class responsible for populating a simulation 
@@ -32,6 +155,10 @@ class MockFactory(object):
     Concrete sub-classes of `MockFactory` such as `HodMockFactory` and 
     `SubhaloMockFactory` are the objects used 
     to populate simulations with galaxies. 
+
+    The mock population is stored in the ``galaxy_table`` attribute, 
+    a columnar `~halotools.utils.table_utils.GalaxyTable`; 
+    use its ``to_astropy_table`` method if an Astropy Table is needed. 
     """
     def __init__(self, **kwargs):
         """
@@ -85,7 +212,7 @@ class MockFactory(object):
         if 'halocut_funcobj' in kwargs.keys():
             self.halocut_funcobj = kwargs['halocut_funcobj']
 
-        self.galaxy_table = Table() 
+        self.galaxy_table = GalaxyTable(gal_types=getattr(self, 'gal_types', None))
 
     @abstractmethod
     def populate(self, **kwargs):
@@ -228,16 +355,22 @@ class HodMockFactory(MockFactory):
             if the keyword argument ``new_haloprop_func_dict`` passed to `HodMockFactory` 
             contains a key that already appears in the ``new_haloprop_func_dict`` bound to 
             ``model``, and exception will be raised. 
+
+        use_cache : boolean, optional keyword argument 
+            If set to ``True``, the pre-processed halo catalog is shared with 
+            every other `HodMockFactory` built from the same ``snapshot`` 
+            with the same cuts, new halo properties and halo profile functions. 
+            See `preprocess_halo_catalog`. Default is ``False``. 
         """
 
         super(HodMockFactory, self).__init__(populate=populate, **kwargs)
 
-        self.preprocess_halo_catalog()
+        self.preprocess_halo_catalog(use_cache=kwargs.get('use_cache', False))
 
         if populate is True:
-            self.populate()
+            self.populate(seed=kwargs.get('seed', None))
 
-    def preprocess_halo_catalog(self, **kwargs):
+    def preprocess_halo_catalog(self, use_cache=False, **kwargs):
         """ Method to pre-process a halo catalog upon instantiation of 
         the mock object. This pre-processing includes identifying the 
         catalog columns that will be used by the model to create the mock, 
@@ -246,6 +379,20 @@ class HodMockFactory(MockFactory):
 
         Parameters 
         ----------
+        use_cache : bool, optional 
+            If True, the cut halo catalog and its new columns are memoized 
+            in a dictionary bound to the ``snapshot``, keyed by the cut definitions 
+            and by the function objects computing the new halo properties 
+            and halo profile parameters, together with the scalar and cosmology 
+            attributes of the instances of bound methods, such as the ``redshift`` 
+            of the concentration-mass model. Any other mock of the same snapshot 
+            with the same key reuses the catalog, together with the contiguous arrays 
+            of the halo properties inherited by the ``galaxy_table``. 
+            Each mock has its own ``halos`` table, so that columns may be added to it, 
+            but the values of the existing columns are shared, and should not be modified. 
+            The snapshot keeps the ``model_defaults.preprocessed_halos_cache_size`` 
+            most recently used catalogs. Default is False. 
+
         logrmin : float, optional 
             Minimum radius used to build the lookup table for the halo profile. 
             Default is set in `~halotools.empirical_models.model_defaults`. 
@@ -260,44 +407,88 @@ class HodMockFactory(MockFactory):
 
         """
 
-        ################ Make cuts on halo catalog ################
-        # Select host halos only, since this is an HOD-style model
-        host_halo_cut = (self.halos['upid']==-1)
-        self.halos = self.halos[host_halo_cut]
-
-        # make a conservative mvir completeness cut 
-        # This can be relaxed by changing sim_defaults.Num_ptcl_requirement
-        cutoff_mvir = sim_defaults.Num_ptcl_requirement*self.snapshot.particle_mass
-        mass_cut = (self.halos['mvir'] > cutoff_mvir)
-        self.halos = self.halos[mass_cut]
-
-        # Make any additional cuts requested by the composite model
-        if hasattr(self.model, 'halocut_funcobj'):
-            self.halos = self.model.halocut_funcobj(halos=self.halos)
-        ############################################################
-
-        ### Create new columns of the halo catalog, if applicable
         if hasattr(self, 'new_haloprop_func_dict'):
-            for new_haloprop_key, new_haloprop_func in self.new_haloprop_func_dict.iteritems():
-                self.halos[new_haloprop_key] = new_haloprop_func(halos=self.halos)
-                self.additional_haloprops.append(new_haloprop_key)
+            new_haloprop_func_dict = self.new_haloprop_func_dict
+        else:
+            new_haloprop_func_dict = {}
+
+        preprocessed_halos = _preprocessed_halos(self.snapshot, self.model, 
+            new_haloprop_func_dict, use_cache)
+        self._preprocessed_halos = preprocessed_halos
+        if use_cache is True:
+            # Each mock has its own table, whose columns are shared with the cached catalog, 
+            # so that adding columns to the halos of one mock does not affect the others 
+            self.halos = Table(preprocessed_halos['halos'], copy=False)
+        else:
+            self.halos = preprocessed_halos['halos']
 
-        # Create new columns for the halo catalog associated with each 
-        # parameter of each halo profile model, e.g., 'NFWmodel_conc'. 
-        # New column names are the keys of the halo_prof_func_dict dictionary; 
-        # new column values are computed by the function objects in halo_prof_func_dict 
-        for halo_prof_param_key in self.model.prof_param_keys:
-            method_name = halo_prof_param_key + '_halos'
-            method_behavior = getattr(self.model, method_name)
-            self.halos[halo_prof_param_key] = method_behavior(halos=self.halos)
-            self.additional_haloprops.append(halo_prof_param_key)
+        self.additional_haloprops.extend(new_haloprop_func_dict.keys())
+        self.additional_haloprops.extend(self.model.prof_param_keys)
 
         self.model.build_halo_prof_lookup_tables(**kwargs)
 
-    def populate(self, **kwargs):
+        # Store contiguous numpy arrays of every halo property inherited by 
+        # the galaxy_table. These arrays only depend on the snapshot and the cuts above, 
+        # and serve as the sources of the lazy halo_ columns of every galaxy_table 
+        halo_columns = preprocessed_halos['halo_columns']
+        self._halo_columns = {}
+        for halocatkey in self.additional_haloprops:
+            if halocatkey not in halo_columns:
+                halo_columns[halocatkey] = np.ascontiguousarray(self.halos[halocatkey])
+            self._halo_columns[halocatkey] = halo_columns[halocatkey]
+        self._galaxy_buffers = {}
+        self._buffer_capacity = 0
+
+    def populate(self, reuse_buffers=False, num_chunks=1, N_threads=1, seed=None, **kwargs):
         """ Method populating halos with mock galaxies. 
+
+        Parameters 
+        ----------
+        reuse_buffers : bool, optional keyword argument 
+            If set to ``True``, the galaxy properties are written into 
+            pre-allocated arrays that persist between calls to `populate`, 
+            and only the occupations, profile parameters, positions and velocities are redrawn. 
+            This is the appropriate choice when repeatedly re-populating 
+            the same snapshot, e.g., in an MCMC. In this mode the columns of 
+            ``galaxy_table`` are views into the buffers, and so will be overwritten 
+            by the next call to `populate`; copy the table if you need to keep it. 
+            Default is ``False``. 
+
+        num_chunks : int, optional keyword argument 
+            If larger than one, the halo catalog is divided into ``num_chunks`` 
+            contiguous chunks that are populated independently, each with its own 
+            random number stream spawned from ``seed``. The galaxies of each gal_type 
+            are concatenated in chunk order, so that for fixed ``seed`` and ``num_chunks`` 
+            the mock does not depend on ``N_threads``. Default is 1. 
+
+        N_threads : int, optional keyword argument 
+            Number of processes used to populate the chunks. 
+            If set to 'max', use all available cores. 
+            Worker processes are forked, and so must inherit the state of the parent. 
+            Default is 1. 
+
+        seed : int or random number generator, optional keyword argument 
+            Random number seed, or random number generator such as 
+            `numpy.random.RandomState`, from which every Monte Carlo realization 
+            of the model components is drawn. When populating in chunks, 
+            the streams of the chunks are spawned from ``seed``. 
+            Default is None, in which case the global numpy random state is used. 
         """
-        self.allocate_memory()
+        if (num_chunks != 1) or (N_threads != 1):
+            if reuse_buffers is True:
+                raise ValueError("The reuse_buffers option of populate "
+                    "cannot be combined with num_chunks or N_threads")
+            self._populate_in_chunks(num_chunks, N_threads, seed)
+            return 
+
+        random_state = get_random_state(seed)
+
+        if reuse_buffers is True:
+            self._populate_from_buffers(random_state)
+            return 
+
+        self.allocate_memory(seed=random_state)
+        halo_indices = np.arange(len(self.halos))
 
         # Loop over all gal_types in the model 
         for gal_type in self.gal_types:
@@ -308,17 +499,15 @@ class HodMockFactory(MockFactory):
             # gal_type_slice is a slice object
 
             # For the gal_type_slice indices of 
-            # the pre-allocated array self.gal_type, 
-            # set each string-type entry equal to the gal_type string
-            self.galaxy_table['gal_type'][gal_type_slice] = (
-                np.repeat(gal_type, self._total_abundance[gal_type],axis=0))
-
-            # Store all other relevant host halo properties into their 
-            # appropriate pre-allocated array 
-            for halocatkey in self.additional_haloprops:
-                galpropkey = model_defaults.host_haloprop_prefix+halocatkey
-                self.galaxy_table[galpropkey][gal_type_slice] = np.repeat(
-                    self.halos[halocatkey], self._occupation[gal_type], axis=0)
+            # the pre-allocated array of gal_type codes, 
+            # set each entry equal to the integer code of gal_type
+            self.galaxy_table.gal_type_codes[gal_type_slice] = (
+                self.gal_types.index(gal_type))
+
+            # Store the index of the host halo of each galaxy. 
+            # All host halo properties are inherited lazily through this index
+            self.galaxy_table[GalaxyTable.host_index_key][gal_type_slice] = np.repeat(
+                halo_indices, self._occupation[gal_type], axis=0)
 
             # Call the galaxy profile components
             for prof_param_key in self.model.prof_param_keys:
@@ -335,7 +524,18 @@ class HodMockFactory(MockFactory):
             self.galaxy_table['y'][gal_type_slice], \
             self.galaxy_table['z'][gal_type_slice] = (
                 getattr(self.model, pos_method_name)(
-                    galaxy_table=self.galaxy_table[gal_type_slice])
+                    galaxy_table=self.galaxy_table[gal_type_slice], seed=random_state)
+                )
+
+            # Assign velocities, before the periodic boundary conditions 
+            # are enforced on the positions 
+            vel_method_name = 'vel_'+gal_type
+
+            self.galaxy_table['vx'][gal_type_slice], \
+            self.galaxy_table['vy'][gal_type_slice], \
+            self.galaxy_table['vz'][gal_type_slice] = (
+                getattr(self.model, vel_method_name)(
+                    galaxy_table=self.galaxy_table[gal_type_slice], seed=random_state)
                 )
                 
         # Positions are now assigned to all populations. 
@@ -351,7 +551,7 @@ class HodMockFactory(MockFactory):
             mask = self.model.galaxy_selection_func(self.galaxy_table)
             self.galaxy_table = self.galaxy_table[mask]
 
-    def allocate_memory(self):
+    def allocate_memory(self, seed=None):
         """ Method allocates the memory for all the numpy arrays 
         that will store the information about the mock. 
         These arrays are bound directly to the mock object. 
@@ -359,9 +559,52 @@ class HodMockFactory(MockFactory):
         The main bookkeeping devices generated by this method are 
         ``_occupation`` and ``_gal_type_indices``. 
 
+        Parameters 
+        ----------
+        seed : int or random number generator, optional keyword argument 
+            Random number seed or random number generator 
+            used to draw the occupations. Default is None. 
         """
 
-        self.galaxy_table = Table() 
+        self.galaxy_table = GalaxyTable(gal_types=self.gal_types)
+
+        self._draw_occupations(seed)
+
+        # Allocate memory for the index of the host halo of each galaxy. 
+        # All additional halo properties, including profile parameters 
+        # of the halos such as 'halo_NFWmodel_conc', are only materialized 
+        # in the galaxy_table when they are first accessed 
+        self.galaxy_table[GalaxyTable.host_index_key] = np.zeros(self.Ngals, dtype='i8')
+        self._add_lazy_haloprops(self.galaxy_table)
+
+        # Separately allocate memory for the values of the (possibly biased)
+        # galaxy profile parameters such as 'gal_NFWmodel_conc'
+        for galcatkey in self.model.prof_param_keys:
+            self.galaxy_table[galcatkey] = np.zeros(self.Ngals, dtype = 'f4')
+
+        self.galaxy_table['gal_type'] = np.zeros(self.Ngals, dtype='i2')
+
+        phase_space_keys = ['x', 'y', 'z', 'vx', 'vy', 'vz']
+        for key in phase_space_keys:
+            self.galaxy_table[key] = np.zeros(self.Ngals, dtype = 'f4')
+
+    def _draw_occupations(self, random_state, reuse_buffers=False):
+        """ Private method calling the occupation components of the model 
+        to draw a Monte Carlo realization of the abundance of each gal_type, 
+        and setting up the ``_occupation``, ``_total_abundance`` and 
+        ``_gal_type_indices`` bookkeeping devices. 
+
+        If ``reuse_buffers`` is True, the occupations are written into 
+        persistent length-Nhalos integer arrays rather than newly allocated ones. 
+        """
+        if reuse_buffers is True:
+            if not hasattr(self, '_occupation_buffers'):
+                self._occupation_buffers = {}
+                for gal_type in self.gal_types:
+                    self._occupation_buffers[gal_type] = np.zeros(len(self.halos), dtype=int)
+            occupation_buffers = self._occupation_buffers
+        else:
+            occupation_buffers = {}
 
         self._occupation = {}
         self._total_abundance = {}
@@ -369,13 +612,12 @@ class HodMockFactory(MockFactory):
 
         first_galaxy_index = 0
         for gal_type in self.gal_types:
-            #print("Working on gal_type %s" % gal_type)
-            #
             occupation_func_name = 'mc_occupation_'+gal_type
             occupation_func = getattr(self.model, occupation_func_name)
             # Call the component model to get a MC 
             # realization of the abundance of gal_type galaxies
-            self._occupation[gal_type] = occupation_func(halos=self.halos)
+            self._occupation[gal_type] = occupation_func(halos=self.halos, 
+                seed=random_state, out=occupation_buffers.get(gal_type, None))
 
             # Now use the above result to set up the indexing scheme
             self._total_abundance[gal_type] = (
@@ -388,25 +630,229 @@ class HodMockFactory(MockFactory):
                 first_galaxy_index, last_galaxy_index)
             first_galaxy_index = last_galaxy_index
 
-        self.Ngals = np.sum(self._total_abundance.values())
+        self.Ngals = first_galaxy_index
 
-        # Allocate memory for all additional halo properties, 
-        # including profile parameters of the halos such as 'halo_NFWmodel_conc'
-        for halocatkey in self.additional_haloprops:
-            galpropkey = model_defaults.host_haloprop_prefix+halocatkey
-            self.galaxy_table[galpropkey] = np.zeros(self.Ngals, 
-                dtype = self.halos[halocatkey].dtype)
+    def _allocate_buffers(self):
+        """ Private method ensuring that the persistent galaxy buffers used by 
+        `populate` with ``reuse_buffers=True`` can hold ``self.Ngals`` galaxies. 
+
+        Memory is only re-allocated when the current realization does not fit. 
+        For models in which every gal_type has a finite ``occupation_bound``, 
+        the buffers are sized to the strict upper bound on the number of galaxies, 
+        and so are allocated exactly once. Otherwise the buffers are 
+        over-allocated by 50% to make re-allocations rare. 
+        """
+        if self.Ngals <= self._buffer_capacity:
+            return 
+
+        Nhalos = len(self.halos)
+        occupation_bounds = [self.model.occupation_bound[gal_type] 
+            for gal_type in self.gal_types]
+        if np.all(np.isfinite(occupation_bounds)):
+            capacity = int(np.sum(occupation_bounds)*Nhalos)
+        else:
+            capacity = int(1.5*self.Ngals)
+        capacity = max(capacity, self.Ngals)
+
+        self._galaxy_buffers = {}
+        self._galaxy_buffers[GalaxyTable.host_index_key] = np.zeros(capacity, dtype='i8')
 
-        # Separately allocate memory for the values of the (possibly biased)
-        # galaxy profile parameters such as 'gal_NFWmodel_conc'
         for galcatkey in self.model.prof_param_keys:
-            self.galaxy_table[galcatkey] = np.zeros(self.Ngals, dtype = 'f4')
+            self._galaxy_buffers[galcatkey] = np.zeros(capacity, dtype = 'f4')
 
-        self.galaxy_table['gal_type'] = np.zeros(self.Ngals, dtype=object)
+        self._galaxy_buffers['gal_type'] = np.zeros(capacity, dtype='i2')
 
         phase_space_keys = ['x', 'y', 'z', 'vx', 'vy', 'vz']
         for key in phase_space_keys:
-            self.galaxy_table[key] = np.zeros(self.Ngals, dtype = 'f4')
+            self._galaxy_buffers[key] = np.zeros(capacity, dtype = 'f4')
+
+        self._buffer_capacity = capacity
+
+    def _add_lazy_haloprops(self, galaxy_table):
+        """ Private method registering every entry of ``additional_haloprops`` 
+        as a lazy ``halo_``-prefixed column of the input galaxy_table. 
+        """
+        for halocatkey in self.additional_haloprops:
+            galpropkey = model_defaults.host_haloprop_prefix+halocatkey
+            galaxy_table.add_lazy_column(galpropkey, self._halo_columns[halocatkey])
+
+    def _populate_from_buffers(self, random_state):
+        """ Private method implementing `populate` with ``reuse_buffers=True``. 
+
+        The halo catalog is never touched beyond the call to the occupation components: 
+        the host halo index of each galaxy is written into the persistent buffers, 
+        host halo properties are gathered lazily from the cached ``_halo_columns``, 
+        and the model components operate on views of the buffers. 
+        """
+        self._draw_occupations(random_state, reuse_buffers=True)
+        self._allocate_buffers()
+
+        Ngals = self.Ngals
+        halo_indices = np.arange(len(self.halos))
+
+        # Wrap the filled portion of the buffers without copying
+        self.galaxy_table = GalaxyTable(gal_types=self.gal_types)
+        for key, buf in self._galaxy_buffers.items():
+            self.galaxy_table[key] = buf[:Ngals]
+        self._add_lazy_haloprops(self.galaxy_table)
+
+        for gal_type in self.gal_types:
+            gal_type_slice = self._gal_type_indices[gal_type]
+            gal_type_table = self.galaxy_table[gal_type_slice]
+
+            gal_type_table.gal_type_codes[:] = self.gal_types.index(gal_type)
+            gal_type_table[GalaxyTable.host_index_key][:] = np.repeat(
+                halo_indices, self._occupation[gal_type])
+
+            # Call the galaxy profile components
+            for prof_param_key in self.model.prof_param_keys:
+                method_name = prof_param_key + '_' + gal_type
+                method_behavior = getattr(self.model, method_name)
+                gal_type_table[prof_param_key][:] = (
+                    method_behavior(galaxy_table = gal_type_table)
+                    )
+
+            # Assign positions 
+            pos_method_name = 'pos_'+gal_type
+            x, y, z = getattr(self.model, pos_method_name)(galaxy_table=gal_type_table, 
+                seed=random_state)
+            gal_type_table['x'][:] = x
+            gal_type_table['y'][:] = y
+            gal_type_table['z'][:] = z
+
+            # Assign velocities 
+            vel_method_name = 'vel_'+gal_type
+            vx, vy, vz = getattr(self.model, vel_method_name)(galaxy_table=gal_type_table, 
+                seed=random_state)
+            gal_type_table['vx'][:] = vx
+            gal_type_table['vy'][:] = vy
+            gal_type_table['vz'][:] = vz
+
+        # Enforce the periodic boundary conditions in-place for all populations at once
+        for key in ['x', 'y', 'z']:
+            coords = self.galaxy_table[key]
+            np.mod(coords, self.snapshot.Lbox, out=coords)
+
+        if hasattr(self.model, 'galaxy_selection_func'):
+            mask = self.model.galaxy_selection_func(self.galaxy_table)
+            self.galaxy_table = self.galaxy_table[mask]
+
+    def _populate_halo_chunk(self, first_halo, last_halo, seed):
+        """ Private method populating the halos with indices in the range 
+        [first_halo, last_halo) using its own random number stream. 
+
+        Returns 
+        -------
+        chunk : dict 
+            Dictionary whose keys are gal_types. Each value is a dictionary storing 
+            the host halo index, profile parameters, positions and velocities of the 
+            gal_type galaxies of the chunk. 
+        """
+        random_state = get_random_state(seed)
+
+        halos = self.halos[first_halo:last_halo]
+        halo_indices = np.arange(first_halo, last_halo)
+
+        chunk = {}
+        for gal_type in self.gal_types:
+            occupation_func = getattr(self.model, 'mc_occupation_'+gal_type)
+            occupation = occupation_func(halos=halos, seed=random_state)
+
+            gal_type_table = GalaxyTable(gal_types=self.gal_types)
+            gal_type_table[GalaxyTable.host_index_key] = np.repeat(halo_indices, occupation)
+            self._add_lazy_haloprops(gal_type_table)
+            for key in ['x', 'y', 'z']:
+                gal_type_table[key] = np.zeros(len(gal_type_table), dtype='f4')
+
+            for prof_param_key in self.model.prof_param_keys:
+                method_name = prof_param_key + '_' + gal_type
+                method_behavior = getattr(self.model, method_name)
+                gal_type_table[prof_param_key] = np.asarray(
+                    method_behavior(galaxy_table = gal_type_table), dtype='f4')
+
+            pos_method_name = 'pos_'+gal_type
+            x, y, z = getattr(self.model, pos_method_name)(galaxy_table=gal_type_table, 
+                seed=random_state)
+            gal_type_table['x'][:] = x
+            gal_type_table['y'][:] = y
+            gal_type_table['z'][:] = z
+
+            vel_method_name = 'vel_'+gal_type
+            vx, vy, vz = getattr(self.model, vel_method_name)(galaxy_table=gal_type_table, 
+                seed=random_state)
+
+            chunk[gal_type] = {GalaxyTable.host_index_key: 
+                gal_type_table[GalaxyTable.host_index_key], 'x': x, 'y': y, 'z': z, 
+                'vx': vx, 'vy': vy, 'vz': vz}
+            for prof_param_key in self.model.prof_param_keys:
+                chunk[gal_type][prof_param_key] = gal_type_table[prof_param_key]
+
+        return chunk
+
+    def _populate_in_chunks(self, num_chunks, N_threads, seed):
+        """ Private method implementing `populate` with 
+        ``num_chunks`` or ``N_threads`` different from one. 
+        """
+        global _mock_being_populated
+
+        if N_threads == 'max':
+            N_threads = multiprocessing.cpu_count()
+        if not isinstance(N_threads, int):
+            raise ValueError("N_threads argument must be an integer number or 'max'")
+
+        Nhalos = len(self.halos)
+        chunk_edges = np.linspace(0, Nhalos, num_chunks+1).astype(int)
+        chunk_seeds = spawn_seeds(seed, num_chunks)
+        args = list(zip(chunk_edges[:-1], chunk_edges[1:], chunk_seeds))
+
+        if N_threads == 1:
+            chunks = [self._populate_halo_chunk(*arg) for arg in args]
+        else:
+            _mock_being_populated = self
+            pool = multiprocessing.Pool(N_threads)
+            try:
+                chunks = pool.map(_populate_halo_chunk, args)
+            finally:
+                pool.close()
+                pool.join()
+                _mock_being_populated = None
+
+        # Concatenate the chunks in deterministic order: 
+        # by gal_type, and by chunk within each gal_type 
+        self._total_abundance = {}
+        self._gal_type_indices = {}
+        first_galaxy_index = 0
+        for gal_type in self.gal_types:
+            self._total_abundance[gal_type] = sum(
+                len(chunk[gal_type]['x']) for chunk in chunks)
+            last_galaxy_index = first_galaxy_index + self._total_abundance[gal_type]
+            self._gal_type_indices[gal_type] = slice(first_galaxy_index, last_galaxy_index)
+            first_galaxy_index = last_galaxy_index
+        self.Ngals = first_galaxy_index
+
+        self.galaxy_table = GalaxyTable(gal_types=self.gal_types)
+        keys = ([GalaxyTable.host_index_key, 'x', 'y', 'z', 'vx', 'vy', 'vz'] + 
+            list(self.model.prof_param_keys))
+        for key in keys:
+            self.galaxy_table[key] = np.concatenate([chunk[gal_type][key] 
+                for gal_type in self.gal_types for chunk in chunks])
+        for key in ['x', 'y', 'z']:
+            self.galaxy_table[key] = model_helpers.enforce_periodicity_of_box(
+                self.galaxy_table[key].astype('f4'), self.snapshot.Lbox)
+        for key in ['vx', 'vy', 'vz']:
+            self.galaxy_table[key] = self.galaxy_table[key].astype('f4')
+
+        self.galaxy_table['gal_type'] = np.zeros(self.Ngals, dtype='i2')
+        for gal_type in self.gal_types:
+            self.galaxy_table.gal_type_codes[self._gal_type_indices[gal_type]] = (
+                self.gal_types.index(gal_type))
+
+        self._add_lazy_haloprops(self.galaxy_table)
+
+        if hasattr(self.model, 'galaxy_selection_func'):
+            mask = self.model.galaxy_selection_func(self.galaxy_table)
+            self.galaxy_table = self.galaxy_table[mask]
+
 
 
 class SubhaloMockFactory(MockFactory):
@@ -465,7 +911,7 @@ class SubhaloMockFactory(MockFactory):
         self.precompute_galprops()
 
         if populate is True:
-            self.populate()
+            self.populate(seed=kwargs.get('seed', None))
 
     def preprocess_halo_catalog(self):
         """ Method to pre-process a halo catalog upon instantiation of 
@@ -490,12 +936,12 @@ class SubhaloMockFactory(MockFactory):
 
         for key in self.additional_haloprops:
             newkey = model_defaults.host_haloprop_prefix + key
-            self.galaxy_table[newkey] = self.halos[key]
+            self.galaxy_table[newkey] = np.array(self.halos[key])
 
         phase_space_keys = ['x', 'y', 'z', 'vx', 'vy', 'vz']
         for newkey in phase_space_keys:
             oldkey = model_defaults.host_haloprop_prefix + newkey
-            self.galaxy_table[newkey] = self.galaxy_table[oldkey]
+            self.galaxy_table[newkey] = self.galaxy_table[oldkey].copy()
 
         self.galaxy_table['galid'] = np.arange(len(self.galaxy_table))
 
@@ -507,14 +953,25 @@ class SubhaloMockFactory(MockFactory):
                     component_model.gal_type_func(galaxy_table=self.galaxy_table)
                     )
 
-    def populate(self):
+    def populate(self, seed=None):
         """ Method populating subhalos with mock galaxies. 
+
+        Parameters 
+        ----------
+        seed : int or random number generator, optional keyword argument 
+            Random number seed, or random number generator such as 
+            `numpy.random.RandomState`, from which every Monte Carlo realization 
+            of the model components is drawn. Default is None, 
+            in which case the global numpy random state is used. 
         """
+        random_state = get_random_state(seed)
+
         for galprop_key in self.model.galprop_list:
             
             model_func_name = 'mc_'+galprop_key
             model_func = getattr(self.model, model_func_name)
-            self.galaxy_table[galprop_key] = model_func(galaxy_table=self.galaxy_table)
+            self.galaxy_table[galprop_key] = model_func(galaxy_table=self.galaxy_table, 
+                seed=random_state)
 
         if hasattr(self.model, 'galaxy_selection_func'):
             mask = self.model.galaxy_selection_func(self.galaxy_table)
@@ -14,12 +14,6 @@ from astropy import cosmology
 default_luminosity_threshold = -20
 default_stellar_mass_threshold = 10.5
 
-# Small numerical value passed to the scipy Poisson number generator. 
-# Used when executing a Monte Carlo realization of a Poission distribution 
-# whose mean is formally zero, which causes the built-in 
-# scipy method to raise an exception.
-default_tiny_poisson_fluctuation = 1.e-20
-
 # The numpy.digitize command has an annoying convention 
 # such that if the value of the array being digitized, x, 
 # is exactly equal to the bin boundary of the uppermost bin, 
@@ -35,6 +29,21 @@ max_permitted_conc = 30.0
 default_dconc = 0.025
 
 Npts_radius_table = 101
+Npts_prob_table = 500
+
+# Maximum number of pre-processed halo catalogs memoized on a snapshot 
+# by HodMockFactory when use_cache=True
+preprocessed_halos_cache_size = 4
+
+# Number of points of the log-mass grid on which mean occupations and 
+# mean galaxy properties are tabulated when mean_function_tabulation='grid'
+Npts_mean_function_table = 1000
+
+# Number of bins of the primary halo property, number of bins of halo separation,
+# and number of line-of-sight points used by TabulatedHodClustering
+num_halo_mass_bins_pair_table = 50
+Npts_pair_separation_table = 200
+Npts_los_integration_table = 500
 default_lograd_min = -4
 default_lograd_max = 0
 conc_mass_model = 'dutton_maccio14'
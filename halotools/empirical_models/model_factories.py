@@ -19,6 +19,7 @@ from . import mock_factories
 from . import preloaded_hod_blueprints
 from . import gal_prof_factory
 from . import halo_prof_components
+from . import jeans
 
 from ..sim_manager.read_nbody import ProcessedSnapshot
 from ..sim_manager.generate_random_sim import FakeSim
@@ -68,10 +69,14 @@ class ModelFactory(object):
             Class instance of `~halotools.sim_manager.ProcessedSnapshot`. 
             This object contains the halo catalog and its metadata.  
 
+        seed : int or random number generator, optional keyword argument 
+            Random number seed or random number generator passed to 
+            the ``populate`` method of the mock. Default is None. 
+
         """
 
         if hasattr(self, 'mock'):
-            self.mock.populate()
+            self.mock.populate(seed=kwargs.get('seed', None))
         else:
             if 'snapshot' in kwargs.keys():
                 snapshot = kwargs['snapshot']
@@ -485,6 +490,12 @@ class HodModelFactory(ModelFactory):
             new_method_behavior = partial(self.mc_pos, gal_type = gal_type)
             setattr(self, new_method_name, new_method_behavior)
 
+            ### Create a method to assign Monte Carlo-realized 
+            # velocities to each gal_type
+            new_method_name = 'vel_'+gal_type
+            new_method_behavior = partial(self.mc_vel, gal_type = gal_type)
+            setattr(self, new_method_name, new_method_behavior)
+
         for prof_param_key in self.prof_param_keys:
             for gal_type in self.gal_types:
                 gal_prof_param_method_name = prof_param_key+'_'+gal_type
@@ -508,6 +519,10 @@ class HodModelFactory(ModelFactory):
         gal_type : string, required keyword argument
             Name of the galaxy population. 
 
+        seed : int or random number generator, optional keyword argument 
+            Random number seed or random number generator 
+            passed to the profile component. Default is None. 
+
         Returns 
         -------
         x, y, z : array_like 
@@ -524,7 +539,8 @@ class HodModelFactory(ModelFactory):
         galaxy_table = kwargs['galaxy_table']
         gal_type = kwargs['gal_type']
         gal_prof_model = self.model_blueprint[gal_type]['profile']
-        x, y, z = gal_prof_model.mc_pos(galaxy_table=galaxy_table)
+        x, y, z = gal_prof_model.mc_pos(galaxy_table=galaxy_table, 
+            seed=kwargs.get('seed', None))
 
         # Re-scale the halo-centric distance by the halo boundary
         halo_boundary_key = model_defaults.host_haloprop_prefix + gal_prof_model.halo_boundary
@@ -542,16 +558,203 @@ class HodModelFactory(ModelFactory):
 
         return x, y, z
 
+    def mc_vel(self, **kwargs):
+        """ Method used to generate Monte Carlo realizations of galaxy velocities. 
+
+        The component model draws the velocity of each galaxy relative to its host halo 
+        in units of the virial velocity, 
+        :math:`V_{\\mathrm{vir}} = \\sqrt{GM_{\\mathrm{vir}}/R_{\\mathrm{vir}}}`, 
+        from the velocity dispersion at the halo-centric distance of the galaxy. 
+        This method re-scales the output of the component model by the virial velocity, 
+        and adds the bulk velocity of the host halo. 
+
+        Parameters 
+        ----------
+        galaxy_table : Astropy Table, required keyword argument
+            Data table storing a length-Ngals galaxy catalog, 
+            with positions assigned by `mc_pos`. As the halo-centric distance 
+            is computed from the difference between the galaxy and host halo positions, 
+            the periodic boundary conditions must not yet have been enforced. 
+
+        gal_type : string, required keyword argument
+            Name of the galaxy population. 
+
+        seed : int or random number generator, optional keyword argument 
+            Random number seed or random number generator 
+            passed to the profile component. Default is None. 
+
+        Returns 
+        -------
+        vx, vy, vz : array_like 
+            Length-Ngals arrays of velocities in km/s. 
+
+        Notes 
+        -----
+        This method is not directly called by 
+        `~halotools.empirical_models.mock_factories.HodMockFactory`. 
+        Instead, the `_set_primary_behaviors` method calls functools.partial 
+        to create a ``vel_gal_type`` method for each ``gal_type`` in the model. 
+
+        """
+        galaxy_table = kwargs['galaxy_table']
+        gal_type = kwargs['gal_type']
+        gal_prof_model = self.model_blueprint[gal_type]['profile']
+
+        # As in mc_pos, the halo boundary is stored in kpc/h
+        halo_boundary_key = model_defaults.host_haloprop_prefix + gal_prof_model.halo_boundary
+        halo_radius = np.asarray(galaxy_table[halo_boundary_key], dtype=float)/1000.
+
+        halo_pos_keys = [model_defaults.host_haloprop_prefix+key for key in ['x', 'y', 'z']]
+        dx, dy, dz = [np.asarray(galaxy_table[key]) - np.asarray(galaxy_table[halo_key]) 
+            for key, halo_key in zip(['x', 'y', 'z'], halo_pos_keys)]
+        scaled_radius = np.sqrt(dx*dx + dy*dy + dz*dz)/halo_radius
+
+        vx, vy, vz = gal_prof_model.mc_vel(galaxy_table=galaxy_table, 
+            scaled_radius=scaled_radius, seed=kwargs.get('seed', None))
+
+        halo_mass_key = model_defaults.host_haloprop_prefix + gal_prof_model.prim_haloprop_key
+        virial_velocity = np.sqrt(jeans.gee*galaxy_table[halo_mass_key]/halo_radius)
+        vx = vx*virial_velocity + galaxy_table[model_defaults.host_haloprop_prefix+'vx']
+        vy = vy*virial_velocity + galaxy_table[model_defaults.host_haloprop_prefix+'vy']
+        vz = vz*virial_velocity + galaxy_table[model_defaults.host_haloprop_prefix+'vz']
+
+        return vx, vy, vz
+
     def build_halo_prof_lookup_tables(self, **kwargs):
         """ Method to create a lookup table 
         used to generate Monte Carlo realizations of 
         radial profiles of galaxies. 
 
+        Profile models with an analytic ``inverse_cumulative_mass_PDF`` method, 
+        such as `~halotools.empirical_models.NFWProfile`, do not need a lookup table, 
+        and are skipped. 
+
         """
 
         for gal_type in self.gal_types:
             halo_prof_model = self.model_blueprint[gal_type]['profile'].halo_prof_model
-            halo_prof_model.build_inv_cumu_lookup_table(**kwargs)
+            if not hasattr(halo_prof_model, 'inverse_cumulative_mass_PDF'):
+                halo_prof_model.build_inv_cumu_lookup_table(**kwargs)
+
+    def expected_number_density(self, num_halo_mass_bins=None, **kwargs):
+        """ Method computes the number density of galaxies predicted by the model 
+        directly from the first occupation moments of the halos, 
+        without populating a mock. 
+
+        Parameters 
+        ----------
+        halos : table, optional keyword argument 
+            Catalog of the halos to be populated, 
+            such as the pre-processed ``halos`` of a mock. 
+            The catalog is used as passed, so subhalos and halos below the 
+            completeness limit should already have been removed. 
+            If passed, ``Lbox`` must also be passed. 
+
+        Lbox : float, optional keyword argument 
+            Box size of the simulation storing ``halos``, in Mpc/h. 
+
+        snapshot : object, optional keyword argument 
+            Class instance of `~halotools.sim_manager.ProcessedSnapshot`. 
+            The halos of the snapshot are subject to the same cuts as 
+            those made by `~halotools.empirical_models.HodMockFactory`, 
+            so that only the host halos that would be populated are included. 
+            The pre-processed catalog is shared with the mocks of the snapshot 
+            created with ``use_cache=True``. 
+            If neither ``halos`` nor ``snapshot`` are passed, 
+            the pre-processed halos of ``self.mock`` are used, 
+            so that the prediction applies to the halos populated by `populate_mock`. 
+
+        num_halo_mass_bins : int, optional 
+            If None, the first occupation moments are summed over every halo. 
+            Otherwise, the halos are binned into ``num_halo_mass_bins`` bins 
+            of :math:`\\log_{10}` ``prim_haloprop``, and the first occupation moments 
+            are only evaluated at the mean mass of each bin. 
+            The binned halo abundance is computed once per halo catalog, 
+            so that each subsequent call costs only ``num_halo_mass_bins`` evaluations. 
+            Default is None. 
+
+        Returns 
+        -------
+        number_density : float 
+            Comoving number density of all galaxies in units of :math:`(h/Mpc)^{3}`. 
+
+        satellite_fraction : float 
+            Fraction of the galaxies belonging to the gal_types 
+            with unbounded occupations. 
+
+        gal_type_number_density : dict 
+            Keys are ``self.gal_types``, values are the number density of each gal_type. 
+
+        Examples 
+        --------
+        >>> blueprint = preloaded_hod_blueprints.Kravtsov04_blueprint()
+        >>> model = HodModelFactory(blueprint)
+        >>> fake_sim = FakeSim()
+        >>> ngals, fsat, ngals_dict = model.expected_number_density(snapshot=fake_sim)
+        """
+        if 'halos' in kwargs.keys():
+            halos = kwargs['halos']
+            Lbox = kwargs['Lbox']
+        elif 'snapshot' in kwargs.keys():
+            halos = mock_factories._preprocessed_halos(kwargs['snapshot'], self, 
+                use_cache=True)['halos']
+            Lbox = kwargs['snapshot'].Lbox
+        elif hasattr(self, 'mock'):
+            halos = self.mock.halos
+            Lbox = self.mock.snapshot.Lbox
+        else:
+            raise KeyError("Must pass either the halos and Lbox keyword arguments, "
+                "or the snapshot keyword argument, \n"
+                "or first call populate_mock to create a mock")
+
+        gal_type_number_density = {}
+        for gal_type in self.gal_types:
+            mean_occupation = getattr(self, 'mean_occupation_'+gal_type)
+            if num_halo_mass_bins is None:
+                num_gals = np.sum(mean_occupation(halos=halos))
+            else:
+                prim_haloprop_key = (
+                    self.model_blueprint[gal_type]['occupation'].prim_haloprop_key)
+                mass, num_halos = self._binned_halo_abundance(
+                    halos, prim_haloprop_key, num_halo_mass_bins)
+                num_gals = np.sum(num_halos*mean_occupation(prim_haloprop=mass))
+            gal_type_number_density[gal_type] = num_gals/Lbox**3
+
+        number_density = sum(gal_type_number_density.values())
+        num_sats = sum(gal_type_number_density[gal_type] 
+            for gal_type in self.gal_types if self.occupation_bound[gal_type] > 1)
+        if number_density > 0:
+            satellite_fraction = num_sats/number_density
+        else:
+            satellite_fraction = 0.
+
+        return number_density, satellite_fraction, gal_type_number_density
+
+    def _binned_halo_abundance(self, halos, prim_haloprop_key, num_halo_mass_bins):
+        """ Private method returning the mean ``prim_haloprop`` and the number of halos 
+        in each non-empty bin of :math:`\\log_{10}` ``prim_haloprop``. 
+        The result is memoized on the identity of the input halo catalog. 
+        """
+        if not hasattr(self, '_binned_halo_abundance_cache'):
+            self._binned_halo_abundance_cache = {}
+        cache_key = (prim_haloprop_key, num_halo_mass_bins)
+        if cache_key in self._binned_halo_abundance_cache:
+            cached_halos, mass, num_halos = self._binned_halo_abundance_cache[cache_key]
+            if cached_halos is halos:
+                return mass, num_halos
+
+        log_mass = np.log10(halos[prim_haloprop_key])
+        bins = np.linspace(log_mass.min(), log_mass.max(), num_halo_mass_bins+1)
+        bin_idx = np.minimum(np.searchsorted(bins, log_mass, side='right') - 1, 
+            num_halo_mass_bins - 1)
+        num_halos = np.bincount(bin_idx, minlength=num_halo_mass_bins)
+        sum_log_mass = np.bincount(bin_idx, weights=log_mass, minlength=num_halo_mass_bins)
+        occupied = num_halos > 0
+        num_halos = num_halos[occupied]
+        mass = 10.**(sum_log_mass[occupied]/num_halos)
+
+        self._binned_halo_abundance_cache[cache_key] = (halos, mass, num_halos)
+        return mass, num_halos
 
     def _set_init_param_dict(self):
         """ Method used to build a dictionary of parameters for the composite model. 
@@ -8,18 +8,22 @@ used by many of the hod model components.
 
 __all__ = (
     ['GalPropModel', 'solve_for_polynomial_coefficients', 'polynomial_from_table', 
-    'enforce_periodicity_of_box', 'update_param_dict']
+    'enforce_periodicity_of_box', 'update_param_dict', 'TabulatedFunctionFamily', 
+    'memoize_on_param_dict', 'tabulate_mean_function']
     )
 
 import numpy as np
 from copy import copy
+from functools import wraps
 
 from scipy.interpolate import InterpolatedUnivariateSpline as spline
 
 from . import model_defaults
 from ..utils.array_utils import array_like_length as custom_len
+from ..utils.cosmology_utils import cosmology_key
 
 from astropy.extern import six
+from astropy import cosmology
 from abc import ABCMeta
 
 @six.add_metaclass(ABCMeta)
@@ -265,6 +269,110 @@ def custom_spline(table_abcissa, table_ordinates, k=0):
         spline_function = spline(table_abcissa, table_ordinates, k=k)
         return spline_function
 
+class TabulatedFunctionFamily(object):
+    """ Family of one-dimensional functions tabulated on a common abcissa. 
+
+    The ordinates of all the functions are stored in a single two-dimensional array, 
+    so that evaluating the i^th function on the i^th point of an input array 
+    requires no loop over function objects. Between the tabulated points 
+    the functions are linearly interpolated; beyond the ends of the abcissa 
+    they are linearly extrapolated from the outermost pair of points. 
+
+    """
+
+    def __init__(self, abcissa, ordinates):
+        """
+        Parameters 
+        ----------
+        abcissa : array_like 
+            Length-Npts array of strictly increasing points 
+            on which every function has been tabulated. 
+
+        ordinates : array_like 
+            Array of shape (Nfuncs, Npts) storing the tabulated values. 
+            The i^th row gives the values of the i^th function on ``abcissa``. 
+
+        Examples 
+        --------
+        >>> abcissa = np.linspace(0, 1, 100)
+        >>> ordinates = np.array([abcissa, abcissa**2, abcissa**3])
+        >>> func_family = TabulatedFunctionFamily(abcissa, ordinates)
+        >>> x = np.array([0.5, 0.5, 0.5, 0.25])
+        >>> result = func_family(x, np.array([0, 1, 2, 1]))
+        """
+        self.abcissa = np.asarray(abcissa, dtype=float)
+        self.ordinates = np.atleast_2d(np.asarray(ordinates, dtype=float))
+
+        if custom_len(self.abcissa) < 2:
+            raise ValueError("TabulatedFunctionFamily requires at least two abcissa points")
+        if np.any(np.diff(self.abcissa) <= 0):
+            raise ValueError("The abcissa of TabulatedFunctionFamily must be strictly increasing")
+        if self.ordinates.shape[1] != len(self.abcissa):
+            raise ValueError("Each row of ordinates must have the same length as the abcissa \n"
+                " len(abcissa) = %i and ordinates.shape = %s" % 
+                (len(self.abcissa), str(self.ordinates.shape)))
+
+    @classmethod 
+    def from_func_table(cls, func_table, abcissa):
+        """ Tabulate a collection of callable function objects on a common abcissa. 
+
+        Parameters 
+        ----------
+        func_table : array_like 
+            Array of function objects, e.g., the table of splines used by 
+            `call_func_table`. Multi-dimensional arrays are flattened, 
+            so that function indices are the same as the flat indices of ``func_table``. 
+
+        abcissa : array_like 
+            Length-Npts array of strictly increasing points 
+            on which every function will be evaluated. 
+
+        Returns 
+        -------
+        func_family : object 
+            Instance of `TabulatedFunctionFamily`. 
+        """
+        abcissa = np.asarray(abcissa, dtype=float)
+        ordinates = np.array([f(abcissa) for f in np.ravel(func_table)])
+        return cls(abcissa, ordinates)
+
+    def __len__(self):
+        return self.ordinates.shape[0]
+
+    def __call__(self, x, func_indices):
+        """ Evaluate the appropriate function of the family on each input point. 
+
+        Parameters 
+        ----------
+        x : array_like 
+            Length-Npts array of points at which to evaluate the functions. 
+
+        func_indices : array_like 
+            Length-Npts array of integers between 0 and Nfuncs-1 
+            giving the row of the function operating on each element of ``x``. 
+
+        Returns 
+        -------
+        out : array_like 
+            Length-Npts array of the interpolated function values. 
+        """
+        x = np.asarray(x, dtype=float)
+        func_indices = np.asarray(func_indices)
+
+        # Find the left edge of the abcissa interval bracketing each point, 
+        # using the outermost intervals for points beyond the tabulated range 
+        left = np.searchsorted(self.abcissa, x) - 1
+        left = np.clip(left, 0, len(self.abcissa) - 2)
+
+        x0 = self.abcissa[left]
+        x1 = self.abcissa[left+1]
+        flat_indices = func_indices*self.ordinates.shape[1] + left
+        flat_ordinates = self.ordinates.ravel()
+        y0 = flat_ordinates[flat_indices]
+        y1 = flat_ordinates[flat_indices+1]
+
+        return y0 + (x - x0)*(y1 - y0)/(x1 - x0)
+
 def call_func_table(func_table, abcissa, func_indices):
     """ Returns the output of an array of functions evaluated at a set of input points 
     if the indices of required functions is known. 
@@ -272,7 +380,9 @@ def call_func_table(func_table, abcissa, func_indices):
     Parameters 
     ----------
     func_table : array_like 
-        Length k array of function objects
+        Length k array of function objects, 
+        or a `TabulatedFunctionFamily` storing k tabulated functions, 
+        in which case the evaluation is fully vectorized. 
 
     abcissa : array_like 
         Length Npts array of points at which to evaluate the functions. 
@@ -289,6 +399,9 @@ def call_func_table(func_table, abcissa, func_indices):
         abcissa element. 
 
     """
+    if isinstance(func_table, TabulatedFunctionFamily):
+        return func_table(abcissa, func_indices)
+
     func_argsort = func_indices.argsort()
     func_ranges = list(np.searchsorted(func_indices[func_argsort], range(len(func_table))))
     func_ranges.append(None)
@@ -363,11 +476,210 @@ def update_param_dict(obj, **kwargs):
         if key in input_param_dict.keys():
             obj.param_dict[key] = input_param_dict[key]
 
+# Maximum number of results memoized per method by memoize_on_param_dict
+_max_memoized_results = 4
+
+def _component_state(component, _visited=None):
+    """ Private function returning a hashable summary of the state of a model component 
+    on which the behaviour of its methods may depend, used in the keys of memoized results. 
+
+    The summary holds the current value of every attribute of ``component`` 
+    that is a number, string, tuple or cosmology, e.g., the ``redshift`` 
+    of `~halotools.empirical_models.smhm_components.Moster13SmHm`, 
+    together with the summary of every attribute that is itself a model component 
+    with a ``param_dict``, e.g., the ``smhm_model`` of 
+    `~halotools.empirical_models.hod_components.Leauthaud11Cens`. 
+    Cosmologies are represented by the exact values of their parameters, 
+    see `~halotools.utils.cosmology_key`. 
+    Larger attributes such as arrays and lists are not included. 
+    """
+    if _visited is None:
+        _visited = set()
+    _visited.add(id(component))
+
+    state = []
+    for key, value in sorted(vars(component).items(), key = lambda item: item[0]):
+        if isinstance(value, (bool, int, float, tuple) + six.string_types):
+            try:
+                hash(value)
+            except TypeError:
+                value = repr(value)
+            state.append((key, value))
+        elif isinstance(value, cosmology.FLRW):
+            state.append((key, cosmology_key(value)))
+        elif (hasattr(value, 'param_dict') and hasattr(value, '__dict__') 
+            and id(value) not in _visited):
+            state.append((key, _component_state(value, _visited)))
+    return tuple(state)
+
+def memoize_on_param_dict(attr_names=(), submodel_names=()):
+    """ Decorator memoizing a method of a model component 
+    that computes a function of the primary halo property, 
+    such as ``mean_occupation`` or ``mean_stellar_mass``. 
+
+    Results are keyed by the values of ``param_dict``, 
+    after updating them according to ``input_param_dict``, 
+    together with the identity of the input array of the primary halo property, 
+    the values of any other keyword arguments, and the scalar attributes 
+    of the component and of its sub-components, such as the ``redshift`` 
+    of a stellar-to-halo-mass model (see `_component_state`). 
+    Repeated calls on the same halos with unchanged parameters, e.g., 
+    the centrals of a composite model when only satellite parameters vary, 
+    then return the stored result without recomputing it. 
 
+    Parameters 
+    ----------
+    attr_names : tuple, optional 
+        Names of additional attributes of the component, such as ``threshold``, 
+        whose values the method depends on. Default is an empty tuple. 
 
+    submodel_names : tuple, optional 
+        Names of attributes storing other model components, such as 
+        ``central_occupation_model``, whose ``param_dict`` the method depends on. 
+        Default is an empty tuple. 
 
+    Notes 
+    -----
+    Input halo arrays are identified by the objects themselves, 
+    so arrays modified in place between calls are not detected. 
+    Memoized results are read-only. 
+    """
+    def decorator(func):
+        cache_name = '_memoized_' + func.__name__
+
+        @wraps(func)
+        def wrapper(self, **kwargs):
+            submodels = [getattr(self, name, None) for name in submodel_names]
+            submodels = [self] + [model for model in submodels if hasattr(model, 'param_dict')]
+            for model in submodels:
+                update_param_dict(model, **kwargs)
+
+            # Retrieve the array storing the mass-like variable
+            if 'galaxy_table' in kwargs.keys():
+                key = model_defaults.host_haloprop_prefix+self.prim_haloprop_key
+                mass = kwargs['galaxy_table'][key]
+            elif 'halos' in kwargs.keys():
+                mass = kwargs['halos'][self.prim_haloprop_key]
+            else:
+                mass = kwargs.get('prim_haloprop', None)
+            if not isinstance(mass, np.ndarray):
+                return func(self, **kwargs)
+
+            other_kwargs = [(key, value) for key, value in kwargs.items() 
+                if key not in ('input_param_dict', 'halos', 'galaxy_table', 'prim_haloprop')]
+            memo_key = (
+                tuple(tuple(sorted(model.param_dict.items())) for model in submodels), 
+                tuple(getattr(self, name, None) for name in attr_names), 
+                _component_state(self), 
+                tuple(sorted(other_kwargs)))
+            try:
+                hash(memo_key)
+            except TypeError:
+                return func(self, **kwargs)
+
+            memoized_results = self.__dict__.setdefault(cache_name, [])
+            for memoized_key, memoized_mass, result in memoized_results:
+                if (memoized_mass is mass) and (memoized_key == memo_key):
+                    return result
+
+            result = func(self, **kwargs)
+            if isinstance(result, np.ndarray):
+                result.flags.writeable = False
+                memoized_results.append((memo_key, mass, result))
+                del memoized_results[:-_max_memoized_results]
+            return result
+
+        return wrapper
+    return decorator
+
+def tabulate_mean_function(mean_function, prim_haloprop_key, 
+    method='grid', Npts=model_defaults.Npts_mean_function_table):
+    """ Wrap a function of the primary halo property, such as ``mean_occupation``, 
+    so that it is evaluated on a table of halo properties rather than on every halo. 
+
+    The table, and the mapping from the table to the input halos, 
+    depend only on the input halos, and so are computed once per halo catalog. 
+    Each subsequent call evaluates ``mean_function`` only on the table, 
+    which combined with `memoize_on_param_dict` makes repeated calls 
+    with unchanged parameters essentially free. 
 
+    Parameters 
+    ----------
+    mean_function : function object 
+        Function accepting ``prim_haloprop``, ``halos`` or ``galaxy_table`` 
+        keyword arguments, and depending on the halos only through 
+        the primary halo property. 
+
+    prim_haloprop_key : string 
+        Column name of the primary halo property. 
+
+    method : string, optional 
+        If ``grid``, ``mean_function`` is evaluated on ``Npts`` points 
+        evenly spaced in :math:`\\log_{10}` ``prim_haloprop`` spanning the input halos, 
+        and linearly interpolated. 
+        If ``unique``, ``mean_function`` is evaluated exactly on the unique values of 
+        ``prim_haloprop``, which is preferable for catalogs with many repeated values, 
+        e.g., halo masses quantized by the particle mass. 
+        Default is ``grid``. 
+
+    Npts : int, optional 
+        Number of points in the table for the ``grid`` method. 
+        Default is set by ``Npts_mean_function_table`` in 
+        `~halotools.empirical_models.model_defaults`. 
 
+    Returns 
+    -------
+    tabulated_function : function object 
+        Function with the same call signature as ``mean_function``. 
+    """
+    if method not in ('grid', 'unique'):
+        raise ValueError("The method of tabulate_mean_function must be either "
+            "``grid`` or ``unique``, received %s" % str(method))
+
+    table_cache = {}
+
+    @wraps(mean_function)
+    def tabulated_function(**kwargs):
+        # Retrieve the array storing the mass-like variable
+        if 'galaxy_table' in kwargs.keys():
+            key = model_defaults.host_haloprop_prefix+prim_haloprop_key
+            mass = kwargs['galaxy_table'][key]
+        elif 'halos' in kwargs.keys():
+            mass = kwargs['halos'][prim_haloprop_key]
+        else:
+            mass = kwargs.get('prim_haloprop', None)
+        if (not isinstance(mass, np.ndarray)) or (np.ndim(mass) != 1) or (len(mass) == 0):
+            return mean_function(**kwargs)
+
+        # Build the table and the mapping onto the input halos 
+        # only when a new array of halos is passed 
+        if table_cache.get('mass') is not mass:
+            table_cache.clear()
+            log_mass = np.log10(mass)
+            log_mass_min, log_mass_max = log_mass.min(), log_mass.max()
+            if (method == 'unique') or (log_mass_min == log_mass_max):
+                table_mass, inverse = np.unique(np.asarray(mass), return_inverse=True)
+                table_cache['inverse'] = inverse
+            else:
+                log_mass_table = np.linspace(log_mass_min, log_mass_max, Npts)
+                dlog_mass = log_mass_table[1] - log_mass_table[0]
+                left = np.minimum(((log_mass - log_mass_min)/dlog_mass).astype(int), Npts-2)
+                table_cache['left'] = left
+                table_cache['weight'] = (log_mass - log_mass_table[left])/dlog_mass
+                table_mass = 10.**log_mass_table
+            table_cache['table_mass'] = table_mass
+            table_cache['mass'] = mass
+
+        other_kwargs = {key: value for key, value in kwargs.items() 
+            if key not in ('halos', 'galaxy_table', 'prim_haloprop')}
+        table = np.asarray(mean_function(prim_haloprop=table_cache['table_mass'], **other_kwargs))
+
+        if 'inverse' in table_cache:
+            return table[table_cache['inverse']]
+        else:
+            left = table_cache['left']
+            result = np.take(table, left)
+            result += table_cache['weight']*np.take(np.diff(table), left)
+            return result
 
-
-
+    return tabulated_function
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+
+This module contains vectorized functions used to draw
+Monte Carlo realizations of per-halo galaxy abundances
+from the first moment of the occupation distribution.
+
+Every function accepts an explicit random number generator
+through the ``seed`` argument, and can write its result into
+a pre-allocated integer array passed as ``out``, so that
+repeatedly re-populating the same halo catalog does not
+require re-allocating the occupation arrays.
+
+"""
+
+__all__ = (['nearest_integer_occupation', 'poisson_occupation',
+    'negative_binomial_occupation', 'binomial_occupation']
+    )
+
+import numpy as np
+
+from ..utils.array_utils import get_random_state
+
+def _prepare_output(first_occupation_moment, out):
+    """ Private function returning the array into which the occupations will be written.
+    """
+    if out is None:
+        return np.zeros(len(first_occupation_moment), dtype=int)
+    elif len(out) != len(first_occupation_moment):
+        raise ValueError("The out array must have the same length "
+            "as the first_occupation_moment array")
+    else:
+        return out
+
+def nearest_integer_occupation(first_occupation_moment, seed=None, out=None):
+    """ Draw occupations from the nearest-integer distribution,
+    appropriate for central-like populations with at most one galaxy per halo.
+
+    Parameters
+    ----------
+    first_occupation_moment : array
+        Length-Nhalos array giving the first moment of the occupation distribution.
+        Values are interpreted as the probability that the halo hosts a galaxy.
+
+    seed : int or random number generator, optional
+        Random number seed, or random number generator such as
+        `numpy.random.RandomState`.
+        See `~halotools.utils.array_utils.get_random_state`. Default is None.
+
+    out : array, optional
+        Length-Nhalos integer array into which the result is written.
+        Default is None, in which case a new array is allocated.
+
+    Returns
+    -------
+    occupation : array
+        Length-Nhalos integer array of zeros and ones.
+
+    Examples
+    --------
+    >>> first_moment = np.linspace(0, 1, 100)
+    >>> ncen = nearest_integer_occupation(first_moment, seed=43)
+    """
+    first_occupation_moment = np.atleast_1d(first_occupation_moment)
+    out = _prepare_output(first_occupation_moment, out)
+    random_state = get_random_state(seed)
+
+    out[:] = random_state.uniform(0, 1, len(first_occupation_moment)) < first_occupation_moment
+    return out
+
+def poisson_occupation(first_occupation_moment, seed=None, out=None):
+    """ Draw occupations from a Poisson distribution,
+    appropriate for satellite-like populations with unbounded per-halo abundances.
+
+    Parameters
+    ----------
+    first_occupation_moment : array
+        Length-Nhalos array giving the first moment of the occupation distribution.
+        Non-positive values result in zero galaxies.
+
+    seed : int or random number generator, optional
+        Random number seed, or random number generator such as
+        `numpy.random.RandomState`.
+        See `~halotools.utils.array_utils.get_random_state`. Default is None.
+
+    out : array, optional
+        Length-Nhalos integer array into which the result is written.
+        Default is None, in which case a new array is allocated.
+
+    Returns
+    -------
+    occupation : array
+        Length-Nhalos integer array of galaxy abundances.
+
+    Examples
+    --------
+    >>> first_moment = np.logspace(-2, 1, 100)
+    >>> nsat = poisson_occupation(first_moment, seed=43)
+    """
+    first_occupation_moment = np.atleast_1d(first_occupation_moment)
+    out = _prepare_output(first_occupation_moment, out)
+    random_state = get_random_state(seed)
+
+    # The numpy Poisson sampler returns zero for a zero-valued mean,
+    # so only negative values need special treatment
+    out[:] = random_state.poisson(np.maximum(first_occupation_moment, 0))
+    return out
+
+def negative_binomial_occupation(first_occupation_moment, dispersion, seed=None, out=None):
+    """ Draw occupations from a negative binomial distribution,
+    appropriate for satellite populations whose per-halo abundances are
+    more variable than a Poisson distribution.
+
+    The variance of the distribution is
+    :math:`\\langle N \\rangle + \\alpha\\langle N \\rangle^{2}`,
+    where :math:`\\alpha` is the ``dispersion``. Draws are made as a
+    gamma-Poisson mixture, so that ``dispersion`` need not be
+    the inverse of an integer.
+
+    Parameters
+    ----------
+    first_occupation_moment : array
+        Length-Nhalos array giving the first moment of the occupation distribution.
+        Non-positive values result in zero galaxies.
+
+    dispersion : float or array
+        Strictly positive value of :math:`\\alpha`.
+        In the limit of vanishing dispersion the Poisson distribution is recovered.
+
+    seed : int or random number generator, optional
+        Random number seed, or random number generator such as
+        `numpy.random.RandomState`.
+        See `~halotools.utils.array_utils.get_random_state`. Default is None.
+
+    out : array, optional
+        Length-Nhalos integer array into which the result is written.
+        Default is None, in which case a new array is allocated.
+
+    Returns
+    -------
+    occupation : array
+        Length-Nhalos integer array of galaxy abundances.
+
+    Examples
+    --------
+    >>> first_moment = np.logspace(-2, 1, 100)
+    >>> nsat = negative_binomial_occupation(first_moment, 0.2, seed=43)
+    """
+    first_occupation_moment = np.atleast_1d(first_occupation_moment)
+    out = _prepare_output(first_occupation_moment, out)
+    random_state = get_random_state(seed)
+
+    dispersion = np.asarray(dispersion, dtype=float)
+    if np.any(dispersion <= 0):
+        raise ValueError("The dispersion of the negative binomial distribution "
+            "must be strictly positive")
+
+    # The numpy gamma sampler raises an exception for a zero-valued scale,
+    # so draws are only made for halos with a positive mean
+    mean = first_occupation_moment
+    dispersion = np.zeros_like(mean, dtype=float) + dispersion
+    positive = mean > 0
+    poisson_mean = random_state.gamma(1./dispersion[positive],
+        mean[positive]*dispersion[positive])
+    out[:] = 0
+    out[positive] = random_state.poisson(poisson_mean)
+    return out
+
+def binomial_occupation(first_occupation_moment, num_trials, seed=None, out=None):
+    """ Draw occupations from a binomial distribution,
+    appropriate for populations whose per-halo abundances are bounded by
+    ``num_trials`` and are less variable than a Poisson distribution.
+
+    Parameters
+    ----------
+    first_occupation_moment : array
+        Length-Nhalos array giving the first moment of the occupation distribution.
+        Values are clipped to the range [0, ``num_trials``].
+
+    num_trials : int or array
+        Maximum number of galaxies per halo. Halos with zero trials have zero galaxies.
+
+    seed : int or random number generator, optional
+        Random number seed, or random number generator such as
+        `numpy.random.RandomState`.
+        See `~halotools.utils.array_utils.get_random_state`. Default is None.
+
+    out : array, optional
+        Length-Nhalos integer array into which the result is written.
+        Default is None, in which case a new array is allocated.
+
+    Returns
+    -------
+    occupation : array
+        Length-Nhalos integer array of galaxy abundances.
+
+    Examples
+    --------
+    >>> first_moment = np.linspace(0, 4, 100)
+    >>> ngals = binomial_occupation(first_moment, 4, seed=43)
+    """
+    first_occupation_moment = np.atleast_1d(first_occupation_moment)
+    out = _prepare_output(first_occupation_moment, out)
+    random_state = get_random_state(seed)
+
+    # Halos with zero trials have zero probability, 
+    # rather than the undefined ratio of the first moment to the number of trials
+    num_trials = np.zeros_like(first_occupation_moment, dtype=int) + np.asarray(num_trials)
+    has_trials = num_trials > 0
+    probability = np.zeros_like(first_occupation_moment, dtype=float)
+    probability[has_trials] = np.clip(
+        first_occupation_moment[has_trials]/num_trials[has_trials], 0, 1)
+    out[:] = random_state.binomial(num_trials, probability)
+    return out
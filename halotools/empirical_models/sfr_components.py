@@ -12,6 +12,7 @@ from scipy.interpolate import UnivariateSpline as spline
 
 import model_defaults
 from ..utils.array_utils import array_like_length as custom_len
+from ..utils.array_utils import get_random_state
 import model_helpers as model_helpers
 
 from astropy.extern import six
@@ -106,9 +107,11 @@ class BinaryGalpropModel(model_helpers.GalPropModel):
             Dictionary of parameters governing the model. 
             If not passed, the values already bound to ``self`` will be used. 
 
-        seed : int, optional keyword argument 
-            Random number seed used to generate the Monte Carlo realization.
-            Default is None. 
+        seed : int or random number generator, optional keyword argument 
+            Random number seed, or random number generator such as 
+            `numpy.random.RandomState`, used to generate the Monte Carlo realization. 
+            See `~halotools.utils.array_utils.get_random_state`. Default is None, 
+            in which case the global numpy random state is used. 
 
         Returns 
         -------
@@ -116,11 +119,11 @@ class BinaryGalpropModel(model_helpers.GalPropModel):
             Array storing the values of the primary galaxy property 
             of the galaxies living in the input halos. 
         """
-        np.random.seed(seed=seed)
+        random_state = get_random_state(seed)
 
         mean_func = getattr(self, 'mean_'+self.galprop_key+'_fraction')
         mean_galprop_fraction = mean_func(**kwargs)
-        mc_generator = np.random.random(custom_len(mean_galprop_fraction))
+        mc_generator = random_state.uniform(0, 1, custom_len(mean_galprop_fraction))
         return np.where(mc_generator < mean_galprop_fraction, True, False)
 
 class BinaryGalpropInterpolModel(BinaryGalpropModel):
@@ -12,6 +12,7 @@ from . import model_defaults
 from . import model_helpers as model_helpers
 
 from ..utils.array_utils import array_like_length as custom_len
+from ..utils.array_utils import get_random_state
 from ..sim_manager import sim_defaults 
 
 from warnings import warn
@@ -159,8 +160,11 @@ class LogNormalScatterModel(object):
             If ``galaxy_table`` is not passed, then either ``prim_haloprop`` or ``halos`` 
             keyword arguments must be passed. 
 
-        seed : int, optional keyword argument 
-            Random number seed. Default is None. 
+        seed : int or random number generator, optional keyword argument 
+            Random number seed, or random number generator such as 
+            `numpy.random.RandomState`. 
+            See `~halotools.utils.array_utils.get_random_state`. Default is None, 
+            in which case the global numpy random state is used. 
 
         Returns 
         -------
@@ -171,9 +175,9 @@ class LogNormalScatterModel(object):
 
         scatter_scale = self.mean_scatter(**kwargs)
 
-        np.random.seed(seed=seed)
+        random_state = get_random_state(seed)
             
-        return np.random.normal(loc=0, scale=scatter_scale)
+        return random_state.normal(loc=0, scale=scatter_scale)
 
     def _setup_interpol(self, **kwargs):
         """ Private method used to initialize the behavior of the interpolating function. 
@@ -200,11 +204,14 @@ class LogNormalScatterModel(object):
         If this method is not called after updating ``self.param_dict``, 
         changes in ``self.param_dict`` will not alter the model behavior. 
         """
-        self.ordinates = (
+        ordinates = (
             [self.param_dict[self._get_param_key(ipar)] 
             for ipar in range(len(self.abcissa))]
             )
-        self._setup_interpol()
+        # Rebuilding the spline is only necessary when the parameters have changed
+        if list(ordinates) != list(self.ordinates):
+            self.ordinates = ordinates
+            self._setup_interpol()
 
     def _initialize_param_dict(self):
         """ Private method used to initialize ``self.param_dict``. 
@@ -287,6 +294,18 @@ class PrimGalpropModel(model_helpers.GalPropModel):
             if the keyword argument ``new_haloprop_func_dict`` passed to `MockFactory` 
             contains a key that already appears in the ``new_haloprop_func_dict`` bound to 
             ``model``, and exception will be raised. 
+
+        mean_function_tabulation : string, optional keyword argument 
+            If ``grid`` or ``unique``, the ``mean_galprop`` method is evaluated on a table 
+            of the primary halo property that is computed once per halo catalog, 
+            rather than on every halo. See 
+            `~halotools.empirical_models.model_helpers.tabulate_mean_function`. 
+            Default is None, for exact evaluation. 
+
+        Npts_mean_function_table : int, optional keyword argument 
+            Number of points of the log-mass grid used when 
+            ``mean_function_tabulation`` is ``grid``. 
+            Default is set in the `~halotools.empirical_models.model_defaults` module. 
         """
         self.galprop_key = galprop_key
         self.prim_haloprop_key = prim_haloprop_key
@@ -318,6 +337,13 @@ class PrimGalpropModel(model_helpers.GalPropModel):
             raise SyntaxError("Any sub-class of PrimGalpropModel must "
                 "implement a method named %s " % required_method_name)
 
+        if kwargs.get('mean_function_tabulation', None) is not None:
+            setattr(self, required_method_name, model_helpers.tabulate_mean_function(
+                getattr(self, required_method_name), self.prim_haloprop_key, 
+                method=kwargs['mean_function_tabulation'], 
+                Npts=kwargs.get('Npts_mean_function_table', 
+                    model_defaults.Npts_mean_function_table)))
+
         # If the sub-class did not implement their own Monte Carlo method mc_galprop, 
         # then use _mc_galprop and give it the usual name
         if not hasattr(self, 'mc_'+self.galprop_key):
@@ -379,6 +405,10 @@ class PrimGalpropModel(model_helpers.GalPropModel):
             Dictionary of parameters governing the model. 
             If not passed, the values already bound to ``self`` will be used. 
 
+        seed : int or random number generator, optional keyword argument 
+            Passed to the ``scatter_realization`` method of the scatter model. 
+            Default is None. 
+
         Returns 
         -------
         prim_galprop : array_like 
@@ -454,6 +484,7 @@ class Moster13SmHm(PrimGalpropModel):
 
         self.publications = ['arXiv:0903.4682', 'arXiv:1205.5807']
 
+    @model_helpers.memoize_on_param_dict(attr_names=('redshift', ))
     def mean_stellar_mass(self, **kwargs):
         """ Return the stellar mass of a central galaxy as a function 
         of the input halos.  
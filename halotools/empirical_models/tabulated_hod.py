@@ -0,0 +1,518 @@
+# -*- coding: utf-8 -*-
+"""
+Module containing `TabulatedHodClustering`, an engine predicting
+the two-point clustering of HOD models without populating a mock.
+
+Halos are divided into bins of the primary halo property.
+Once per halo catalog, the pair counts of halos are tabulated
+for every pair of mass bins, and convolved with the radial profiles
+of the galaxies within their halos. For any set of model parameters,
+the expected galaxy pair counts are then weighted sums over pairs of mass bins,
+with weights given by the first occupation moments of the bins.
+"""
+
+__all__ = ['TabulatedHodClustering']
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from . import model_defaults
+from . import halo_prof_components
+from . import mock_factories
+
+
+def _shell_overlap_cdf(s, d, u):
+    """ Private function returning the probability that the separation
+    between a point at distance ``d`` from the origin and
+    a point at distance ``u`` from the origin,
+    with the direction of the latter isotropically distributed,
+    is smaller than ``s``. All inputs are broadcast against each other.
+    """
+    s, d, u = np.broadcast_arrays(s, d, u)
+    lower = np.abs(d - u)
+    upper = d + u
+    denominator = np.maximum(4.*d*u, np.finfo(float).tiny)
+    with np.errstate(over='ignore'):
+        fraction = (s*s - lower*lower)/denominator
+    return np.where(s >= upper, 1., np.where(s <= lower, 0., fraction))
+
+def _halo_mass_bins(prim_haloprop, num_halo_mass_bins):
+    """ Private function binning halos in :math:`\\log_{10}` ``prim_haloprop``.
+
+    Returns the bin index of each halo, counting only the non-empty bins,
+    together with the mean ``prim_haloprop`` and the number of halos in each non-empty bin.
+    The mean is taken in :math:`\\log_{10}`, as in
+    `~halotools.empirical_models.HodModelFactory.expected_number_density`.
+    """
+    log_mass = np.log10(prim_haloprop)
+    bins = np.linspace(log_mass.min(), log_mass.max(), num_halo_mass_bins+1)
+    bin_idx = np.minimum(np.searchsorted(bins, log_mass, side='right') - 1,
+        num_halo_mass_bins - 1)
+    num_halos = np.bincount(bin_idx, minlength=num_halo_mass_bins)
+    sum_log_mass = np.bincount(bin_idx, weights=log_mass, minlength=num_halo_mass_bins)
+    occupied = num_halos > 0
+    occupied_idx = np.cumsum(occupied) - 1
+    num_halos = num_halos[occupied]
+    mass = 10.**(sum_log_mass[occupied]/num_halos)
+    return occupied_idx[bin_idx], mass, num_halos
+
+
+class TabulatedHodClustering(object):
+    """ Engine predicting the real-space two-point correlation function,
+    and the projected two-point correlation function,
+    of an HOD model from tabulated pair counts of halos.
+
+    Populating a mock and counting the pairs of its galaxies
+    costs a time that grows with the number of galaxies.
+    Instead, `TabulatedHodClustering` bins the halos in mass,
+    and tabulates once per halo catalog the number of pairs of halos
+    in each pair of mass bins, together with the distribution of the
+    separations of galaxy pairs within single halos.
+    The pair counts expected for a given ``param_dict`` are then
+    weighted sums of these tables over pairs of mass bins,
+    which only require the first occupation moment of each gal_type
+    evaluated at the mean mass of each bin.
+
+    The predictions are the expectation values of the pair counts
+    of the mocks made by `~halotools.empirical_models.HodMockFactory`,
+    up to the binning of the halos in mass:
+    galaxy types with an ``occupation_bound`` of one are drawn from
+    the nearest-integer distribution, unbounded types from a Poisson distribution,
+    and the occupations of different gal_types are independent.
+    """
+
+    def __init__(self, model, rbins,
+        num_halo_mass_bins=model_defaults.num_halo_mass_bins_pair_table,
+        Npts_pair_separation_table=model_defaults.Npts_pair_separation_table,
+        Npts_radius_table=model_defaults.Npts_radius_table, **kwargs):
+        """
+        Parameters
+        ----------
+        model : object
+            Instance of `~halotools.empirical_models.HodModelFactory`.
+            All the occupation components must share the same ``prim_haloprop_key``,
+            and the halo profile of every gal_type must be either
+            `~halotools.empirical_models.halo_prof_components.TrivialProfile`,
+            or a profile with analytic ``cumulative_mass_PDF`` and
+            ``inverse_cumulative_mass_PDF`` methods, such as
+            `~halotools.empirical_models.halo_prof_components.NFWProfile`.
+
+        rbins : array_like
+            Boundaries of the bins of three-dimensional separation, in Mpc/h,
+            in which the pairs are counted.
+
+        halos : table, optional keyword argument
+            Catalog of the halos to be populated,
+            such as the pre-processed ``halos`` of a mock.
+            The catalog is used as passed, so subhalos and halos below the
+            completeness limit should already have been removed.
+            If passed, ``Lbox`` must also be passed.
+
+        Lbox : float, optional keyword argument
+            Box size of the simulation storing ``halos``, in Mpc/h.
+
+        snapshot : object, optional keyword argument
+            Class instance of `~halotools.sim_manager.ProcessedSnapshot`.
+            The halos of the snapshot are subject to the same cuts as
+            those made by `~halotools.empirical_models.HodMockFactory`,
+            so that only the host halos that would be populated are included.
+            If neither ``halos`` nor ``snapshot`` are passed,
+            the pre-processed halos of ``model.mock`` are used,
+            so that the predictions apply to the mocks made by ``model.populate_mock``.
+            Unless ``halos`` are passed, the halo pair counts are memoized
+            with the pre-processed halo catalog, so that any other engine
+            of the same catalog reuses them.
+
+        num_halo_mass_bins : int, optional
+            Number of bins of :math:`\\log_{10}` ``prim_haloprop``.
+            Default is set in `~halotools.empirical_models.model_defaults`.
+
+        Npts_pair_separation_table : int, optional
+            Number of logarithmically spaced bins of halo separation
+            on which the halo pair counts are convolved with the galaxy profiles.
+            Default is set in `~halotools.empirical_models.model_defaults`.
+
+        Npts_radius_table : int, optional
+            Number of quantiles of the galaxy profiles used in the convolutions.
+            Default is set in `~halotools.empirical_models.model_defaults`.
+
+        Examples
+        --------
+        >>> from halotools.empirical_models import Kravtsov04
+        >>> from halotools.sim_manager import FakeSim
+        >>> model = Kravtsov04()
+        >>> fake_sim = FakeSim()
+        >>> rbins = np.logspace(-1, 1, 10)
+        >>> engine = TabulatedHodClustering(model, rbins, snapshot=fake_sim)
+        >>> xi = engine.tpcf()
+
+        Once the engine is built, the predictions of any other set of parameters are cheap:
+
+        >>> model.param_dict['logMmin_centrals'] += 0.1
+        >>> xi = engine.tpcf()
+        """
+        self.model = model
+        self.gal_types = list(model.gal_types)
+
+        if 'halos' in kwargs.keys():
+            halos = kwargs['halos']
+            self.Lbox = kwargs['Lbox']
+            preprocessed_halos = None
+        elif 'snapshot' in kwargs.keys():
+            preprocessed_halos = mock_factories._preprocessed_halos(kwargs['snapshot'],
+                model, use_cache=True)
+            halos = preprocessed_halos['halos']
+            self.Lbox = kwargs['snapshot'].Lbox
+        elif hasattr(model, 'mock'):
+            preprocessed_halos = model.mock._preprocessed_halos
+            halos = model.mock.halos
+            self.Lbox = model.mock.snapshot.Lbox
+        else:
+            raise KeyError("Must pass either the halos and Lbox keyword arguments, "
+                "or the snapshot keyword argument, \n"
+                "or first call populate_mock to create a mock")
+
+        prim_haloprop_keys = set(
+            model.model_blueprint[gal_type]['occupation'].prim_haloprop_key
+            for gal_type in self.gal_types)
+        if len(prim_haloprop_keys) != 1:
+            raise ValueError("TabulatedHodClustering requires all occupation components "
+                "to share the same prim_haloprop_key")
+        self.prim_haloprop_key = prim_haloprop_keys.pop()
+
+        halo_boundary_keys = set(
+            model.model_blueprint[gal_type]['profile'].halo_boundary
+            for gal_type in self.gal_types)
+        if len(halo_boundary_keys) != 1:
+            raise ValueError("TabulatedHodClustering requires all profile components "
+                "to share the same halo_boundary")
+        halo_boundary_key = halo_boundary_keys.pop()
+
+        self.rbins = np.asarray(rbins, dtype=float)
+        if (self.rbins.ndim != 1) or (len(self.rbins) < 2) or (self.rbins[0] < 0) or (
+            np.any(np.diff(self.rbins) <= 0)):
+            raise ValueError("rbins must be a monotonically increasing array "
+                "of non-negative separations")
+
+        # As in HodModelFactory.mc_pos, the halo boundary is stored in kpc/h
+        halo_radius = np.asarray(halos[halo_boundary_key], dtype=float)/1000.
+        max_separation = self.rbins[-1] + 2.*halo_radius.max()
+        if max_separation >= self.Lbox/2.:
+            raise ValueError("The largest separation of rbins plus twice the largest "
+                "halo boundary must be smaller than Lbox/2")
+
+        halo_mass_bin, self._mass, self._num_halos = _halo_mass_bins(
+            halos[self.prim_haloprop_key], num_halo_mass_bins)
+        self._halo_radius = (
+            np.bincount(halo_mass_bin, weights=halo_radius)/self._num_halos)
+
+        # Bins of halo separation used in the convolutions.
+        # Every boundary of rbins is also a boundary of the separation bins
+        min_separation = self.rbins[self.rbins > 0].min()/10.
+        self._separation_bins = np.unique(np.concatenate([[0], self.rbins,
+            np.logspace(np.log10(min_separation), np.log10(max_separation),
+                Npts_pair_separation_table)]))
+        self._rbins_idx = np.searchsorted(self._separation_bins, self.rbins)
+
+        halo_pairs = self._halo_pair_counts(halos, halo_mass_bin, preprocessed_halos,
+            (self.prim_haloprop_key, num_halo_mass_bins, halo_boundary_key))
+
+        offsets = {}
+        kernels = {}
+        for gal_type in self.gal_types:
+            offsets[gal_type] = self._profile_offsets(gal_type, Npts_radius_table)
+            if offsets[gal_type] is None:
+                kernels[gal_type] = None
+            else:
+                kernels[gal_type] = self._separation_kernel(offsets[gal_type][2])
+
+        self._one_halo_table = {}
+        self._two_halo_table = {}
+        for gal_type1 in self.gal_types:
+            for gal_type2 in self.gal_types:
+                key = (gal_type1, gal_type2)
+                self._one_halo_table[key] = self._build_one_halo_table(
+                    offsets[gal_type1], offsets[gal_type2])
+                self._two_halo_table[key] = self._build_two_halo_table(
+                    halo_pairs, kernels[gal_type1], kernels[gal_type2])
+
+    def _halo_pair_counts(self, halos, halo_mass_bin, preprocessed_halos, cache_key):
+        """ Private method returning the array of shape
+        (num_mass_bins, num_mass_bins, num_separation_bins)
+        storing the number of ordered pairs of distinct halos,
+        for every pair of mass bins, in each bin of ``self._separation_bins``.
+        If the dictionary ``preprocessed_halos`` returned by
+        `~halotools.empirical_models.mock_factories._preprocessed_halos`
+        is passed, the result is memoized in it, keyed by ``cache_key``
+        and the separation bins, and so is reused for the same halo catalog.
+        """
+        cache_key = cache_key + (tuple(self._separation_bins), )
+        if preprocessed_halos is not None:
+            cache = preprocessed_halos.setdefault('halo_pair_counts', {})
+            if cache_key in cache:
+                return cache[cache_key]
+
+        pos = np.vstack([halos['x'], halos['y'], halos['z']]).T
+        pos = np.mod(pos, self.Lbox)
+        trees = [cKDTree(pos[halo_mass_bin == i], boxsize=self.Lbox)
+            for i in range(len(self._mass))]
+
+        # Cumulative counts include the pairs at zero separation,
+        # in particular each halo paired with itself, which the differences discard
+        num_mass_bins = len(self._mass)
+        halo_pairs = np.zeros((num_mass_bins, num_mass_bins, len(self._separation_bins)-1))
+        for i in range(num_mass_bins):
+            for j in range(i, num_mass_bins):
+                cumulative_counts = trees[i].count_neighbors(trees[j], self._separation_bins)
+                halo_pairs[i, j] = np.diff(cumulative_counts)
+                halo_pairs[j, i] = halo_pairs[i, j]
+
+        if preprocessed_halos is not None:
+            cache[cache_key] = halo_pairs
+        return halo_pairs
+
+    def _profile_offsets(self, gal_type, Npts_radius_table):
+        """ Private method returning the halo profile model of ``gal_type`` and
+        its profile parameters in each mass bin,
+        together with the array of shape (num_mass_bins, Npts_radius_table)
+        storing the quantiles of the halo-centric distance of ``gal_type`` galaxies, in Mpc/h.
+        Returns None for galaxies residing at the halo center.
+        """
+        gal_prof_model = self.model.model_blueprint[gal_type]['profile']
+        halo_prof_model = gal_prof_model.halo_prof_model
+        if isinstance(halo_prof_model, halo_prof_components.TrivialProfile):
+            return None
+        elif not (hasattr(halo_prof_model, 'cumulative_mass_PDF') &
+            hasattr(halo_prof_model, 'inverse_cumulative_mass_PDF')):
+            raise ValueError("The halo profile of %s has no analytic cumulative_mass_PDF "
+                "and inverse_cumulative_mass_PDF, and so is not supported by "
+                "TabulatedHodClustering" % gal_type)
+
+        prof_params = [getattr(self.model, prof_param_key+'_'+gal_type)(
+            prim_haloprop=self._mass) for prof_param_key in gal_prof_model.prof_param_keys]
+        prof_params = np.atleast_2d(np.array(prof_params, dtype=float))
+
+        cumulative_prob = (np.arange(Npts_radius_table) + 0.5)/Npts_radius_table
+        radii = np.array([halo_prof_model.inverse_cumulative_mass_PDF(
+            cumulative_prob, *prof_params[:, i]) for i in range(len(self._mass))])
+        radii *= self._halo_radius[:, np.newaxis]
+
+        return halo_prof_model, prof_params, radii
+
+    def _build_one_halo_table(self, offsets1, offsets2):
+        """ Private method returning the array of shape (num_mass_bins, num_rbins)
+        storing, for each mass bin, the number of halos times the probability
+        that a galaxy with ``offsets1`` and a galaxy with ``offsets2`` residing
+        in the same halo have a separation in each bin of ``self.rbins``.
+        """
+        if (offsets1 is None) & (offsets2 is None):
+            # Galaxies at the center of the same halo have zero separation
+            return np.zeros((len(self._mass), len(self.rbins)-1))
+        elif (offsets1 is None) or (offsets2 is None):
+            if offsets1 is None:
+                halo_prof_model, prof_params, __ = offsets2
+            else:
+                halo_prof_model, prof_params, __ = offsets1
+            cumulative_prob = np.zeros((len(self._mass), len(self.rbins)))
+            for i in range(len(self._mass)):
+                scaled_rbins = np.minimum(self.rbins/self._halo_radius[i], 1)
+                positive = scaled_rbins > 0
+                cumulative_prob[i, positive] = halo_prof_model.cumulative_mass_PDF(
+                    scaled_rbins[positive], *prof_params[:, i])
+        else:
+            radii1, radii2 = offsets1[2], offsets2[2]
+            cumulative_prob = np.array([np.mean(_shell_overlap_cdf(
+                self.rbins[:, np.newaxis, np.newaxis],
+                radii1[i][np.newaxis, :, np.newaxis],
+                radii2[i][np.newaxis, np.newaxis, :]), axis=(1, 2))
+                for i in range(len(self._mass))])
+
+        return self._num_halos[:, np.newaxis]*np.diff(cumulative_prob, axis=1)
+
+    def _separation_kernel(self, radii):
+        """ Private method returning the array of shape
+        (num_mass_bins, num_separation_bins, num_separation_bins)
+        whose element [i, j, k] is the probability that
+        displacing one member of a pair with separation in the j^th bin
+        of ``self._separation_bins`` by a galaxy of the i^th mass bin
+        with halo-centric distance quantiles ``radii``
+        moves the separation into the k^th bin.
+        """
+        edges = self._separation_bins
+        # Separation of the pairs in each bin,
+        # assuming they uniformly fill the volume of the spherical shell
+        separation = ((edges[:-1]**3 + edges[1:]**3)/2.)**(1./3)
+        kernel = np.empty((len(self._mass), len(separation), len(separation)))
+        for i in range(len(self._mass)):
+            cumulative_prob = np.mean(_shell_overlap_cdf(
+                edges[np.newaxis, :, np.newaxis],
+                separation[:, np.newaxis, np.newaxis],
+                radii[i][np.newaxis, np.newaxis, :]), axis=2)
+            kernel[i] = np.diff(cumulative_prob, axis=1)
+        return kernel
+
+    def _build_two_halo_table(self, halo_pairs, kernel1, kernel2):
+        """ Private method returning the array of shape
+        (num_mass_bins, num_mass_bins, num_rbins)
+        whose element [i, j, k] is the number of pairs formed
+        by one galaxy displaced by ``kernel1`` in each halo of the i^th mass bin
+        and one galaxy displaced by ``kernel2`` in each other halo of the j^th mass bin
+        with a separation in the k^th bin of ``self.rbins``.
+        A kernel of None stands for galaxies residing at the halo center.
+        """
+        galaxy_pairs = halo_pairs
+        if kernel2 is not None:
+            galaxy_pairs = np.array([np.dot(galaxy_pairs[:, j], kernel2[j])
+                for j in range(len(self._mass))]).transpose((1, 0, 2))
+        if kernel1 is not None:
+            galaxy_pairs = np.array([np.dot(galaxy_pairs[i], kernel1[i])
+                for i in range(len(self._mass))])
+
+        cumulative_pairs = np.concatenate([np.zeros(galaxy_pairs.shape[:-1]+(1, )),
+            np.cumsum(galaxy_pairs, axis=-1)], axis=-1)
+        return np.diff(cumulative_pairs[..., self._rbins_idx], axis=-1)
+
+    def _mean_occupations(self, input_param_dict):
+        """ Private method returning a dictionary storing the first occupation moment
+        of each gal_type evaluated at the mean mass of each mass bin.
+        """
+        mean_occupations = {}
+        for gal_type in self.gal_types:
+            mean_occupation = getattr(self.model, 'mean_occupation_'+gal_type)
+            if input_param_dict is None:
+                mean_occupations[gal_type] = mean_occupation(prim_haloprop=self._mass)
+            else:
+                mean_occupations[gal_type] = mean_occupation(prim_haloprop=self._mass,
+                    input_param_dict=input_param_dict)
+        return mean_occupations
+
+    def number_density(self, input_param_dict=None):
+        """ Comoving number density of galaxies predicted by the model,
+        in units of :math:`(h/Mpc)^{3}`.
+
+        Parameters
+        ----------
+        input_param_dict : dict, optional
+            Parameters of the model. Default is None,
+            in which case the current ``param_dict`` of the model is used.
+
+        Returns
+        -------
+        number_density : float
+        """
+        mean_occupations = self._mean_occupations(input_param_dict)
+        num_gals = sum(np.sum(self._num_halos*mean_occupations[gal_type])
+            for gal_type in self.gal_types)
+        return num_gals/self.Lbox**3
+
+    def expected_pair_counts(self, input_param_dict=None):
+        """ Expected number of ordered pairs of galaxies
+        in each bin of ``rbins``, separated into the pairs of galaxies
+        residing in the same halo and in different halos.
+
+        Parameters
+        ----------
+        input_param_dict : dict, optional
+            Parameters of the model. Default is None,
+            in which case the current ``param_dict`` of the model is used.
+
+        Returns
+        -------
+        one_halo_pairs : array
+            Length-(len(rbins)-1) array of pair counts of galaxies in the same halo.
+
+        two_halo_pairs : array
+            Length-(len(rbins)-1) array of pair counts of galaxies in different halos.
+        """
+        mean_occupations = self._mean_occupations(input_param_dict)
+
+        one_halo_pairs = np.zeros(len(self.rbins)-1)
+        two_halo_pairs = np.zeros(len(self.rbins)-1)
+        for gal_type1 in self.gal_types:
+            for gal_type2 in self.gal_types:
+                key = (gal_type1, gal_type2)
+                mean_occupation1 = mean_occupations[gal_type1]
+                mean_occupation2 = mean_occupations[gal_type2]
+
+                # Second factorial moment of the occupations within the same halo
+                if gal_type1 != gal_type2:
+                    second_moment = mean_occupation1*mean_occupation2
+                elif self.model.occupation_bound[gal_type1] == 1:
+                    second_moment = np.zeros_like(mean_occupation1)
+                else:
+                    second_moment = mean_occupation1*mean_occupation1
+
+                one_halo_pairs += np.dot(second_moment, self._one_halo_table[key])
+                two_halo_pairs += np.einsum('i,j,ijk->k',
+                    mean_occupation1, mean_occupation2, self._two_halo_table[key])
+
+        return one_halo_pairs, two_halo_pairs
+
+    def tpcf(self, input_param_dict=None):
+        """ Real-space two-point correlation function predicted by the model.
+
+        Parameters
+        ----------
+        input_param_dict : dict, optional
+            Parameters of the model. Default is None,
+            in which case the current ``param_dict`` of the model is used.
+
+        Returns
+        -------
+        xi : array
+            Length-(len(rbins)-1) array storing the correlation function
+            in each bin of ``rbins``, estimated as the ratio of
+            the expected galaxy pair counts to those of a uniform distribution
+            with the same number density, minus one.
+        """
+        one_halo_pairs, two_halo_pairs = self.expected_pair_counts(
+            input_param_dict=input_param_dict)
+        number_density = self.number_density(input_param_dict=input_param_dict)
+
+        shell_volume = 4*np.pi*np.diff(self.rbins**3)/3.
+        random_pairs = number_density*number_density*shell_volume*self.Lbox**3
+        return (one_halo_pairs + two_halo_pairs)/random_pairs - 1.
+
+    def wp(self, rp, pi_max, input_param_dict=None,
+        Npts_los_integration_table=model_defaults.Npts_los_integration_table):
+        """ Projected two-point correlation function predicted by the model,
+        :math:`w_{\\mathrm{p}}(r_{\\mathrm{p}}) = 2\\int_{0}^{\\pi_{\\mathrm{max}}}\\xi(\\sqrt{r_{\\mathrm{p}}^{2}+\\pi^{2}})d\\pi`.
+
+        The correlation function returned by `tpcf` is interpolated
+        in :math:`\\log r` between the geometric centers of ``rbins``.
+
+        Parameters
+        ----------
+        rp : array_like
+            Projected separations in Mpc/h.
+
+        pi_max : float
+            Maximum line-of-sight separation in Mpc/h.
+            The separation :math:`\\sqrt{r_{\\mathrm{p}}^{2}+\\pi_{\\mathrm{max}}^{2}}`
+            may not exceed the largest separation of ``rbins``.
+
+        input_param_dict : dict, optional
+            Parameters of the model. Default is None,
+            in which case the current ``param_dict`` of the model is used.
+
+        Npts_los_integration_table : int, optional
+            Number of points of the line-of-sight integral.
+            Default is set in `~halotools.empirical_models.model_defaults`.
+
+        Returns
+        -------
+        wp : array
+            Array of the same length as ``rp`` storing the projected correlation function, in Mpc/h.
+        """
+        rp = np.atleast_1d(rp).astype(float)
+        if np.sqrt(rp.max()**2 + pi_max**2) > self.rbins[-1]:
+            raise ValueError("The separations of the line-of-sight integral "
+                "exceed the largest separation of rbins")
+
+        xi = self.tpcf(input_param_dict=input_param_dict)
+        rmid = np.sqrt(np.maximum(self.rbins[:-1], self.rbins[1:]/2.)*self.rbins[1:])
+
+        pi = np.linspace(0, pi_max, Npts_los_integration_table)
+        r = np.sqrt(rp[:, np.newaxis]**2 + pi[np.newaxis, :]**2)
+        xi_los = np.interp(np.log(r), np.log(rmid), xi)
+        return 2*np.trapz(xi_los, pi, axis=1)
@@ -5,6 +5,7 @@ from astropy.table import Table
 from scipy.stats import spearmanr
 
 from ..abunmatch import ConditionalAbunMatch
+from .. import abunmatch
 from .. import model_defaults
 from ...sim_manager import FakeMock
 
@@ -243,6 +244,68 @@ def test_cam_ssfr():
 	check_spearmanr(fake_mock_variable_scatter, fake_data, sm_low, sm_high, 0.835)
 
 
+def test_cam_noise_calibration():
+	""" Verify that the calibration table of ConditionalAbunMatch 
+	correctly converts the desired Spearman rank-order correlation coefficient 
+	into the weight of the noise added to the ranks. 
+	"""
+	assert np.allclose(abunmatch._cam_noise_weight([1, 0]), [0, 1])
+
+	rs = np.random.RandomState(43)
+	Npts = int(1e5)
+	u = rs.uniform(0, 1, Npts)
+	v = rs.uniform(0, 1, Npts)
+	for desired_correlation in [0.9, 0.5, 0.2]:
+		noise_weight = abunmatch._cam_noise_weight(desired_correlation)
+		corr = spearmanr(u, (1-noise_weight)*u + noise_weight*v)[0]
+		assert np.allclose(corr, desired_correlation, atol=0.01)
+
+	# Anti-correlations require the same noise weight
+	assert abunmatch._cam_noise_weight(-0.5) == abunmatch._cam_noise_weight(0.5)
+
+	# For sparsely populated bins, the expected Spearman coefficient 
+	# of the sample is the desired correlation strength
+	num_gals, num_samples = 12, 5000
+	noise_weight = abunmatch._cam_noise_weight([0.5, 0.5], [num_gals, 1e6])
+	assert noise_weight[0] < noise_weight[1]
+	u = rs.uniform(0, 1, (num_samples, num_gals))
+	v = rs.uniform(0, 1, (num_samples, num_gals))
+	noisy_u = (1-noise_weight[0])*u + noise_weight[0]*v
+	corr = [spearmanr(u[i], noisy_u[i])[0] for i in range(num_samples)]
+	assert np.allclose(np.mean(corr), 0.5, atol=0.01)
+
+def test_cam_one_point_lookup_table():
+	""" Verify that the one-point lookup table of every bin 
+	returns the galprop quantiles of the input galaxies in the bin, 
+	and that sparsely populated bins use the table of the nearest populated bin. 
+	"""
+	rs = np.random.RandomState(43)
+	Ngals = int(1e4)
+	galaxy_table = Table({'stellar_mass': rs.uniform(9, 11, Ngals), 
+		'ssfr': rs.normal(-10, 1, Ngals)})
+	sm_bins = np.array([8, 9.5, 10, 10.5, 11, 12])
+	cam = ConditionalAbunMatch(galprop_key='ssfr', prim_galprop_key='stellar_mass', 
+		sec_haloprop_key='zhalf', input_galaxy_table=galaxy_table, 
+		prim_galprop_bins=sm_bins)
+
+	lookup_table = cam.one_point_lookup_table
+	assert len(lookup_table) == len(sm_bins)+1
+
+	binned_sm = np.digitize(galaxy_table['stellar_mass'], sm_bins)
+	cumprob = np.linspace(0, 1, 35)
+	for i in range(1, 5):
+		ssfr_bini = np.sort(galaxy_table['ssfr'][binned_sm == i])
+		median = lookup_table(np.array([0.5]), np.array([i]))[0]
+		assert np.allclose(median, np.median(ssfr_bini), atol=0.02)
+		quantiles = lookup_table(cumprob, np.zeros_like(cumprob).astype(int) + i)
+		assert np.all(np.diff(quantiles) >= 0)
+		assert np.allclose(quantiles[[0, -1]], ssfr_bini[[0, -1]])
+
+	# The empty bins below and above the galaxy sample 
+	# use the tables of the first and last populated bins
+	assert np.all(lookup_table.ordinates[0] == lookup_table.ordinates[1])
+	assert np.all(lookup_table.ordinates[5] == lookup_table.ordinates[4])
+	assert np.all(lookup_table.ordinates[6] == lookup_table.ordinates[4])
 
 def test_Campbell15():
 	"""
@@ -3,8 +3,10 @@ from .. import halo_prof_components as hpc
 from astropy import cosmology
 import numpy as np
 from copy import copy
+import os, shutil, tempfile
 
-__all__ = ['test_HaloProfileModel', 'test_TrivialProfile','test_NFWProfile']
+__all__ = ['test_HaloProfileModel', 'test_TrivialProfile','test_NFWProfile', 
+    'test_inv_cumu_lookup_table_cache', 'test_nfw_velocity_dispersion']
 
 def test_HaloProfileModel():
     """ Method testing the abstract base class 
@@ -131,6 +133,63 @@ def test_NFWProfile():
     model_instance.build_inv_cumu_lookup_table()
     assert np.all(model_instance.NFWmodel_conc_lookup_table_bins == initial_NFWmodel_conc_lookup_table_bins)
 
+    # The analytic inverse of the cumulative mass PDF should agree with 
+    # cumulative_mass_PDF to much better than the lookup table precision
+    radius = np.logspace(-3, 0, 15)
+    for test_conc in test_conc_array:
+        prob = model_instance.cumulative_mass_PDF(radius, test_conc)
+        inverse_radius = model_instance.inverse_cumulative_mass_PDF(prob, test_conc)
+        assert np.allclose(inverse_radius, radius, rtol = 1e-6)
+
+    conc_array = np.linspace(1, 25, len(radius))
+    prob = model_instance.cumulative_mass_PDF(radius, conc_array)
+    inverse_radius = model_instance.inverse_cumulative_mass_PDF(prob, conc_array)
+    assert np.allclose(inverse_radius, radius, rtol = 1e-6)
+
+
+def test_inv_cumu_lookup_table_cache():
+    """ Verify that lookup tables are shared through the in-memory cache, 
+    and that tables reloaded from disk are identical to the original ones. 
+    The on-disk cache is redirected to a temporary directory. 
+    """
+    from ...sim_manager import sim_defaults
+    default_cache_dir = sim_defaults.lookup_tables_cache_dir
+    tmp_cache_dir = tempfile.mkdtemp()
+    sim_defaults.lookup_tables_cache_dir = tmp_cache_dir
+    hpc._inv_cumu_lookup_table_cache.clear()
+    try:
+        model1 = hpc.NFWProfile()
+        model1.build_inv_cumu_lookup_table(Npts_radius_table = 51)
+        assert len(os.listdir(tmp_cache_dir)) == 1
+
+        # A second instance with identical table settings reuses the cached table
+        model2 = hpc.NFWProfile()
+        model2.build_inv_cumu_lookup_table(Npts_radius_table = 51)
+        assert model2.cumu_inv_func_family is model1.cumu_inv_func_family
+        assert np.all(model2.NFWmodel_conc_lookup_table_bins == model1.NFWmodel_conc_lookup_table_bins)
+
+        # Changing the table settings requires a different table
+        model2.build_inv_cumu_lookup_table(Npts_radius_table = 61)
+        assert model2.cumu_inv_func_family is not model1.cumu_inv_func_family
+        assert len(os.listdir(tmp_cache_dir)) == 2
+
+        # Clearing the in-memory cache forces the table to be loaded from disk
+        hpc._inv_cumu_lookup_table_cache.clear()
+        model3 = hpc.NFWProfile()
+        model3.build_inv_cumu_lookup_table(Npts_radius_table = 51)
+        assert model3.cumu_inv_func_family is not model1.cumu_inv_func_family
+        assert np.all(model3.cumu_inv_func_family.ordinates == model1.cumu_inv_func_family.ordinates)
+
+        # Bypassing the cache always rebuilds the table
+        model4 = hpc.NFWProfile()
+        model4.build_inv_cumu_lookup_table(Npts_radius_table = 51, use_cache = False)
+        assert model4.cumu_inv_func_family is not model3.cumu_inv_func_family
+        assert np.allclose(model4.cumu_inv_func_family.ordinates, model1.cumu_inv_func_family.ordinates)
+    finally:
+        sim_defaults.lookup_tables_cache_dir = default_cache_dir
+        hpc._inv_cumu_lookup_table_cache.clear()
+        shutil.rmtree(tmp_cache_dir)
+
 
 
 
@@ -155,15 +214,28 @@ def test_NFWProfile():
     assert dict_persistence_check == model_instance.prof_param_table_dict
 """
 
-
-
-
-
-
-
-
-
-
-
-
-
+def test_nfw_velocity_dispersion():
+    """ Compare the tabulated velocity dispersion of `~halotools.empirical_models.NFWProfile` 
+    to the Jeans integral of the NFW profile computed with adaptive quadrature. 
+    """
+    from scipy.integrate import quad
+    nfw = hpc.NFWProfile()
+
+    def density(x, c):
+        return 1./(c*x*(1 + c*x)**2)
+    def enclosed_mass(x, c):
+        return nfw.g(c)/nfw.g(c*x)
+
+    for c in [2., 7.3, 20.]:
+        radius = np.array([0.003, 0.05, 0.3, 1.])
+        sigma = nfw.dimensionless_velocity_dispersion(radius, c)
+        for x, result in zip(radius, sigma):
+            integral = quad(lambda y: density(y, c)*enclosed_mass(y, c)/y**2, x, np.inf)[0]
+            correct_sigma = np.sqrt(integral/density(x, c))
+            assert np.allclose(result, correct_sigma, rtol=5e-3)
+
+    # Arrays of concentrations are interpolated between the tabulated concentrations 
+    conc = np.array([2., 7.3, 20.])
+    sigma = nfw.dimensionless_velocity_dispersion(np.zeros(3) + 0.3, conc)
+    for i in range(3):
+        assert np.allclose(sigma[i], nfw.dimensionless_velocity_dispersion(0.3, conc[i]))
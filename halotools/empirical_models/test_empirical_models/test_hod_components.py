@@ -9,7 +9,7 @@ from .. import gal_prof_factory
 from astropy.table import Table
 from copy import copy
 
-__all__ = ['test_Zheng07Cens','test_Kravtsov04Sats']
+__all__ = ['test_Zheng07Cens','test_Kravtsov04Sats', 'test_memoized_mean_occupation']
 
 
 def test_Zheng07Cens():
@@ -66,6 +66,13 @@ def test_Zheng07Cens():
 		expected_result = 0.48599999
 		np.testing.assert_allclose(mc_occ.mean(), expected_result, rtol=1e-5, atol=1.e-5)
 
+		# A random number generator can be passed in place of an integer seed
+		random_state = np.random.RandomState(43)
+		mc_occ2 = model.mc_occupation(prim_haloprop=masses, seed=random_state)
+		assert np.all(mc_occ2 == mc_occ)
+		mc_occ3 = model.mc_occupation(prim_haloprop=masses, seed=random_state)
+		assert np.any(mc_occ3 != mc_occ)
+
 		# Now check that the model is ~ 1.0 when evaluated for a cluster
 		masses = np.ones(Npts)*5.e15
 		mc_occ = model.mc_occupation(prim_haloprop=masses, seed=43)
@@ -324,15 +331,50 @@ def test_Kravtsov04Sats():
 	nsat_new = default_satmodel_with_cens.mean_occupation(prim_haloprop=midmass)
 	assert nsat_new < nsat_orig
 
-
-
-
-
-
-
-
-
-
-
-
-
+def test_memoized_mean_occupation():
+	""" Function to test that the first occupation moments are memoized 
+	on the values of the relevant parameters and the identity of the input halos. 
+	"""
+	sat_model = hod_components.Leauthaud11Sats()
+	cen_model = sat_model.central_occupation_model
+	mass = np.logspace(10, 15, 100)
+	param_dict = copy(cen_model.param_dict)
+	param_dict.update(sat_model.param_dict)
+
+	mean_ncen = cen_model.mean_occupation(prim_haloprop=mass, input_param_dict=param_dict)
+	mean_nsat = sat_model.mean_occupation(prim_haloprop=mass, input_param_dict=param_dict)
+	assert sat_model.mean_occupation(prim_haloprop=mass, input_param_dict=param_dict) is mean_nsat
+	assert mean_nsat.flags.writeable == False
+
+	# Changing a satellite parameter leaves the centrals untouched
+	param_dict['alphasat_satellites'] *= 1.1
+	new_mean_nsat = sat_model.mean_occupation(prim_haloprop=mass, input_param_dict=param_dict)
+	assert np.all(new_mean_nsat[mass > 1e13] > mean_nsat[mass > 1e13])
+	assert cen_model.mean_occupation(prim_haloprop=mass, input_param_dict=param_dict) is mean_ncen
+
+	# Changing a central parameter changes both populations
+	param_dict['m10_centrals'] += 0.1
+	assert np.any(cen_model.mean_occupation(
+		prim_haloprop=mass, input_param_dict=param_dict) != mean_ncen)
+	assert np.any(sat_model.mean_occupation(
+		prim_haloprop=mass, input_param_dict=param_dict) != new_mean_nsat)
+
+	# Changing the state of the stellar-to-halo-mass model changes both populations
+	cen_model.smhm_model.redshift = 2.
+	mean_ncen_z2 = cen_model.mean_occupation(prim_haloprop=mass, input_param_dict=param_dict)
+	mean_nsat_z2 = sat_model.mean_occupation(prim_haloprop=mass, input_param_dict=param_dict)
+	cen_model_z2 = hod_components.Leauthaud11Cens(redshift=2.)
+	sat_model_z2 = hod_components.Leauthaud11Sats(redshift=2.)
+	assert np.allclose(mean_ncen_z2, 
+		cen_model_z2.mean_occupation(prim_haloprop=mass, input_param_dict=param_dict))
+	assert np.allclose(mean_nsat_z2, 
+		sat_model_z2.mean_occupation(prim_haloprop=mass, input_param_dict=param_dict))
+
+	# A different array with the same values is not mistaken for the memoized one
+	cen_model = hod_components.Zheng07Cens()
+	mean_ncen = cen_model.mean_occupation(prim_haloprop=mass)
+	mass2 = copy(mass)
+	mass2[0] = 1e15
+	assert cen_model.mean_occupation(prim_haloprop=mass2)[0] > mean_ncen[0]
+	cen_model.param_dict['logMmin_centrals'] += 1
+	assert np.all(cen_model.mean_occupation(prim_haloprop=mass) <= mean_ncen)
@@ -3,8 +3,9 @@
 import numpy as np 
 from .. import preloaded_models
 from .. import model_factories
+from ...sim_manager.generate_random_sim import FakeSim
 
-__all__ = ['test_Kravtsov04_composite']
+__all__ = ['test_Kravtsov04_composite', 'test_expected_number_density']
 
 def test_Kravtsov04_composite():
 	""" Method to test the basic behavior of 
@@ -42,8 +43,43 @@ def test_Kravtsov04_composite():
 	satocc_restored = model.mean_occupation_satellites(prim_haloprop=testmass2)
 	assert satocc_restored == satocc_orig
 
+def test_expected_number_density():
+	""" Verify that the number density predicted by 
+	`~halotools.empirical_models.model_factories.HodModelFactory.expected_number_density` 
+	agrees with the sum of the first occupation moments, 
+	and with the number density of a populated mock. 
+	"""
+	model = preloaded_models.Kravtsov04(threshold = -20)
+	sim = FakeSim(num_halos_per_massbin = int(1e4))
+	model.populate_mock(snapshot = sim, seed = 43, use_cache = True)
+	halos = model.mock.halos
 
+	ngals, fsat, ngals_dict = model.expected_number_density()
+	ncens = np.sum(model.mean_occupation_centrals(halos=halos))/sim.Lbox**3
+	nsats = np.sum(model.mean_occupation_satellites(halos=halos))/sim.Lbox**3
+	assert np.allclose(ngals_dict['centrals'], ncens)
+	assert np.allclose(ngals_dict['satellites'], nsats)
+	assert np.allclose(ngals, ncens + nsats)
+	assert np.allclose(fsat, nsats/(ncens + nsats))
 
+	ngals_binned, fsat_binned, __ = model.expected_number_density(num_halo_mass_bins=100)
+	assert np.allclose(ngals_binned, ngals, rtol=1e-3)
+	assert np.allclose(fsat_binned, fsat, rtol=1e-3)
 
+	ngals_mock = len(model.mock.galaxy_table)/float(sim.Lbox**3)
+	assert np.allclose(ngals_mock, ngals, rtol=0.05)
 
+	# Subhalos and halos below the completeness limit of the snapshot are not populated
+	ngals_snapshot, fsat_snapshot, __ = model.expected_number_density(snapshot = sim)
+	assert np.allclose(ngals_snapshot, ngals)
+	assert np.allclose(fsat_snapshot, fsat)
+	# The snapshot prediction uses the pre-processed halos cached by the mock
+	assert len(sim._preprocessed_halos_cache) == 1
+	cached_halos = list(sim._preprocessed_halos_cache.values())[0]['halos']
+	assert np.shares_memory(cached_halos['mvir'], halos['mvir'])
+	ngals_raw, __, __ = model.expected_number_density(halos = sim.halos, Lbox = sim.Lbox)
+	assert ngals_raw > ngals_snapshot
 
+	# Predictions respond to changes in param_dict 
+	model.param_dict['logMmin_centrals'] += 0.5
+	assert model.expected_number_density(num_halo_mass_bins=100)[0] < ngals_binned
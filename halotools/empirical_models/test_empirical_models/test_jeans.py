@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+import numpy as np 
+from scipy.integrate import quad
+from .. import jeans 
+
+__all__ = ['test_sigmasq', 'test_sigmasq_los']
+
+def test_sigmasq():
+	""" Compare `~halotools.empirical_models.jeans.sigmasq` to the analytic solution 
+	for a power-law tracer density :math:`N_{sat}\\propto r^{-\\alpha}` 
+	in a singular isothermal mass profile :math:`M(<r) = Ar`, 
+	:math:`\\sigma^{2}(r) = \\frac{GA}{\\alpha}(1 - (r/r_{max})^{\\alpha})`, 
+	and verify that batches of halos are computed row by row. 
+	"""
+	rr = np.logspace(-3, 0, 300)
+	alpha = np.array([2, 3.5])[:, np.newaxis]
+	nsat = rr**-alpha
+	mass_normalization = np.array([1.e12, 1.e14])[:, np.newaxis]
+	massprof = mass_normalization*rr
+
+	rr_compute = np.logspace(-2.5, -0.5, 20)
+	sigma2 = jeans.sigmasq(rr, nsat, massprof, rr_compute=rr_compute)
+	assert sigma2.shape == (2, len(rr_compute))
+	correct_sigma2 = jeans.gee*mass_normalization/alpha*(1 - rr_compute**alpha)
+	np.testing.assert_allclose(sigma2, correct_sigma2, rtol=1e-3)
+
+	for i in range(2):
+		np.testing.assert_allclose(sigma2[i], 
+			jeans.sigmasq(rr, nsat[i], massprof[i], rr_compute=rr_compute))
+
+	# Radii outside the tabulated profile have zero dispersion 
+	assert np.all(jeans.sigmasq(rr, nsat, massprof, rr_compute=[2, 3]) == 0)
+
+def test_sigmasq_los():
+	""" Compare `~halotools.empirical_models.jeans.sigmasq_los` 
+	to the projections of the analytic solution computed with adaptive quadrature. 
+	"""
+	rr = np.logspace(-3, 0, 300)
+	alpha = 3.
+	nsat = rr**-alpha
+	mass_normalization = 1.e13
+	massprof = mass_normalization*rr
+	sigma2 = lambda r: jeans.gee*mass_normalization/alpha*(1 - r**alpha)
+
+	rap_compute = np.logspace(-2, -0.2, 5)
+	sigma2_los = jeans.sigmasq_los(rr, nsat, massprof, rap_compute)
+
+	for rap, result in zip(rap_compute, sigma2_los):
+		numerator = quad(lambda z: (rap**2 + z**2)**(-alpha/2.)*sigma2(np.sqrt(rap**2 + z**2)), 
+			0, np.sqrt(1 - rap**2))[0]
+		denominator = quad(lambda z: (rap**2 + z**2)**(-alpha/2.), 0, np.sqrt(1 - rap**2))[0]
+		np.testing.assert_allclose(result, numerator/denominator, rtol=1e-3)
+
+	batch_result = jeans.sigmasq_los(rr, np.array([nsat, nsat]), 
+		np.array([massprof, 2*massprof]), rap_compute, los_integral_limit=0.5)
+	np.testing.assert_allclose(batch_result[1], 2*batch_result[0])
+	assert batch_result[0, -1] == 0
@@ -4,10 +4,13 @@ import numpy as np
 from .. import preloaded_models
 from .. import model_factories
 from .. import mock_factories
+from .. import model_defaults
 from .. import preloaded_models
 from ...sim_manager.generate_random_sim import FakeSim
 
-__all__ = ['test_preloaded_hod_mocks']
+__all__ = ['test_preloaded_hod_mocks', 'test_hod_mock_reuse_buffers', 
+    'test_hod_mock_chunked_populate', 'test_hod_mock_preprocessed_halos_cache', 
+    'test_hod_mock_velocities']
 
 
 def test_preloaded_hod_mocks():
@@ -67,11 +70,161 @@ def test_preloaded_hod_mocks():
         test_hod_mock_attrs(model, sim)
 
 
+def test_hod_mock_reuse_buffers():
+    """ Verify that re-populating a mock with ``reuse_buffers=True`` 
+    produces the same galaxy population as the default `populate` 
+    for the same seed, and that the persistent buffers 
+    only grow when a realization does not fit. 
+    """
+    sim = FakeSim()
+    model = preloaded_models.Kravtsov04()
+    mock = mock_factories.HodMockFactory(snapshot=sim, model=model, populate=False)
+
+    mock.populate(seed=43)
+    table1 = mock.galaxy_table
+
+    mock.populate(reuse_buffers=True, seed=43)
+    table2 = mock.galaxy_table
+    assert len(table1) == len(table2)
+    for key in table1.keys():
+        assert np.all(table1[key] == table2[key])
+
+    for i in range(3):
+        buffer_capacity = mock._buffer_capacity
+        xbuffer = mock._galaxy_buffers['x']
+        mock.populate(reuse_buffers=True)
+        assert mock.Ngals <= mock._buffer_capacity
+        if mock.Ngals <= buffer_capacity:
+            assert mock._galaxy_buffers['x'] is xbuffer
+        assert np.all(mock.galaxy_table['x'] >= 0)
+        assert np.all(mock.galaxy_table['x'] <= mock.snapshot.Lbox)
+
+
+def test_hod_mock_chunked_populate():
+    """ Verify that populating a mock in chunks is reproducible for fixed 
+    ``seed`` and ``num_chunks``, independent of the number of processes. 
+    """
+    sim = FakeSim()
+    model = preloaded_models.Kravtsov04()
+    mock = mock_factories.HodMockFactory(snapshot=sim, model=model, populate=False)
 
+    mock.populate(num_chunks=4, seed=43)
+    table1 = mock.galaxy_table
+    mock.populate(num_chunks=4, N_threads=2, seed=43)
+    table2 = mock.galaxy_table
 
+    assert len(table1) == len(table2)
+    for key in ['x', 'y', 'z', 'vx', 'vy', 'vz', 'gal_type', 'halo_mvir', 'halo_NFWmodel_conc']:
+        assert np.all(table1[key] == table2[key])
 
+    assert np.all(table1['x'] >= 0)
+    assert np.all(table1['x'] <= mock.snapshot.Lbox)
 
+    mock.populate(num_chunks=4, seed=44)
+    sats1 = table1['x'][table1.gal_type_mask('satellites')]
+    sats3 = mock.galaxy_table['x'][mock.galaxy_table.gal_type_mask('satellites')]
+    assert (len(sats1) != len(sats3)) or np.any(sats1 != sats3)
 
 
-
-
+def test_hod_mock_preprocessed_halos_cache():
+    """ Verify that mocks built from the same snapshot and model with ``use_cache=True`` 
+    share the pre-processed halo catalog, unless the new halo properties 
+    or the state of the halo profile functions differ, and that the cache is bounded. 
+    """
+    sim = FakeSim()
+    model = preloaded_models.Kravtsov04()
+
+    def shares_catalog(mock1, mock2):
+        return mock1._halo_columns['NFWmodel_conc'] is mock2._halo_columns['NFWmodel_conc']
+
+    # The cache is opt-in 
+    mock0 = mock_factories.HodMockFactory(snapshot=sim, model=model, populate=False)
+    assert not hasattr(sim, '_preprocessed_halos_cache')
+
+    mock1 = mock_factories.HodMockFactory(snapshot=sim, model=model, 
+        populate=False, use_cache=True)
+    mock2 = mock_factories.HodMockFactory(snapshot=sim, model=model, 
+        populate=False, use_cache=True)
+    assert shares_catalog(mock1, mock2)
+    assert not shares_catalog(mock0, mock1)
+    assert np.all(mock0.halos['NFWmodel_conc'] == mock1.halos['NFWmodel_conc'])
+
+    # Each mock has its own table of the shared columns 
+    assert mock2.halos is not mock1.halos
+    mock1.halos['zhalf_copy'] = mock1.halos['zhalf']
+    assert 'zhalf_copy' not in mock2.halos.keys()
+
+    def zhalf_squared(halos):
+        return halos['zhalf']**2
+    mock4 = mock_factories.HodMockFactory(snapshot=sim, model=model, populate=False, 
+        new_haloprop_func_dict = {'zhalf_squared': zhalf_squared}, use_cache=True)
+    assert not shares_catalog(mock4, mock1)
+    assert 'zhalf_squared' in mock4.halos.keys()
+    assert 'zhalf_squared' in mock4._halo_columns
+
+    mock1.populate(seed=43)
+    table1 = mock1.galaxy_table
+    mock0.populate(seed=43)
+    for key in ['x', 'y', 'z', 'halo_mvir', 'halo_NFWmodel_conc']:
+        assert np.all(table1[key] == mock0.galaxy_table[key])
+
+    # Changing the state of the concentration-mass model invalidates the cached catalog 
+    conc_mass_model = model.NFWmodel_conc_halos.__self__
+    redshift = conc_mass_model.redshift
+    conc_mass_model.redshift = redshift + 1.
+    mock5 = mock_factories.HodMockFactory(snapshot=sim, model=model, 
+        populate=False, use_cache=True)
+    assert not shares_catalog(mock5, mock1)
+    assert np.all(mock5.halos['NFWmodel_conc'] < mock1.halos['NFWmodel_conc'])
+    conc_mass_model.redshift = redshift
+    mock6 = mock_factories.HodMockFactory(snapshot=sim, model=model, 
+        populate=False, use_cache=True)
+    assert shares_catalog(mock6, mock1)
+
+    # Cosmologies are distinguished by their exact parameters, not their rounded repr 
+    from astropy import cosmology
+    conc_mass_model.cosmology = cosmology.FlatLambdaCDM(H0=67.74, Om0=0.3089)
+    mock7 = mock_factories.HodMockFactory(snapshot=sim, model=model, 
+        populate=False, use_cache=True)
+    conc_mass_model.cosmology = cosmology.FlatLambdaCDM(H0=67.71, Om0=0.3091)
+    mock8 = mock_factories.HodMockFactory(snapshot=sim, model=model, 
+        populate=False, use_cache=True)
+    assert not shares_catalog(mock8, mock7)
+
+    # Only the most recently used catalogs are kept 
+    for i in range(model_defaults.preprocessed_halos_cache_size + 2):
+        mock_factories.HodMockFactory(snapshot=sim, model=preloaded_models.Kravtsov04(), 
+            populate=False, use_cache=True)
+    assert len(sim._preprocessed_halos_cache) == model_defaults.preprocessed_halos_cache_size
+
+def test_hod_mock_velocities():
+    """ Verify that centrals move with their host halo, and that the velocities 
+    of satellites relative to their host halo are Gaussian with the dispersion 
+    of the NFW Jeans solution, for every mode of `populate`. 
+    """
+    sim = FakeSim()
+    model = preloaded_models.Kravtsov04()
+    mock = mock_factories.HodMockFactory(snapshot=sim, model=model, populate=False)
+    nfw_model = model.model_blueprint['satellites']['profile'].halo_prof_model
+
+    for populate_kwargs in [{}, {'reuse_buffers': True}, {'num_chunks': 3}]:
+        mock.populate(seed=43, **populate_kwargs)
+        gals = mock.galaxy_table
+
+        cens = gals[gals.gal_type_mask('centrals')]
+        for key in ['vx', 'vy', 'vz']:
+            assert np.allclose(cens[key], cens['halo_'+key], rtol=1e-5)
+
+        sats = gals[gals.gal_type_mask('satellites')]
+        halo_radius = sats['halo_rvir']/1000.
+        dx, dy, dz = [np.asarray(sats[key] - sats['halo_'+key]) for key in ['x', 'y', 'z']]
+        for d in [dx, dy, dz]:
+            d -= sim.Lbox*np.round(d/sim.Lbox)
+        scaled_radius = np.minimum(np.sqrt(dx*dx + dy*dy + dz*dz)/halo_radius, 1)
+        virial_velocity = np.sqrt(4.2994e-9*sats['halo_mvir']/halo_radius)
+        sigma = virial_velocity*nfw_model.dimensionless_velocity_dispersion(
+            scaled_radius, sats['halo_NFWmodel_conc'])
+        for key in ['vx', 'vy', 'vz']:
+            normalized_velocity = (sats[key] - sats['halo_'+key])/sigma
+            assert np.allclose(np.mean(normalized_velocity), 0, atol=0.05)
+            assert np.allclose(np.std(normalized_velocity), 1, rtol=0.05)
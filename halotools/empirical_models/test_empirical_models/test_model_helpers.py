@@ -1,6 +1,9 @@
 #!/usr/bin/env python
 from .. import model_helpers as occuhelp 
 import numpy as np 
+from astropy.table import Table 
+
+from .. import hod_components, smhm_components
 
 def test_enforce_periodicity_of_box():
 
@@ -16,4 +19,63 @@ def test_enforce_periodicity_of_box():
 
 	newcoords = occuhelp.enforce_periodicity_of_box(coords, box_length)
 	assert np.all(newcoords >= 0)
-	assert np.all(newcoords <= box_length)
\ No newline at end of file
+	assert np.all(newcoords <= box_length)
+
+def test_tabulated_function_family():
+
+	abcissa = np.linspace(0, 1, 501)
+	slopes = np.linspace(1, 5, 20)
+	func_table = np.array([occuhelp.custom_spline(abcissa, slope*abcissa**2, k=3) 
+		for slope in slopes])
+	func_family = occuhelp.TabulatedFunctionFamily.from_func_table(func_table, abcissa)
+	assert len(func_family) == len(func_table)
+
+	Npts = int(1e4)
+	x = np.random.uniform(0, 1, Npts)
+	func_indices = np.random.randint(0, len(slopes), Npts)
+
+	spline_result = occuhelp.call_func_table(func_table, x, func_indices)
+	family_result = occuhelp.call_func_table(func_family, x, func_indices)
+	assert np.allclose(family_result, spline_result, atol = 1e-5)
+	assert np.allclose(family_result, slopes[func_indices]*x**2, atol = 1e-5)
+
+	# Points beyond the abcissa are linearly extrapolated
+	linear_family = occuhelp.TabulatedFunctionFamily(abcissa, np.array([2*abcissa]))
+	assert np.allclose(linear_family(np.array([-1, 2]), np.zeros(2, dtype=int)), [-2, 4])
+
+def test_tabulate_mean_function():
+	""" Verify that mean functions evaluated on a table of the primary halo property 
+	agree with the exact evaluation on every halo. 
+	"""
+	rs = np.random.RandomState(43)
+	halos = Table({'mvir': 10**rs.uniform(10, 15, int(1e5))})
+	halos['mpeak'] = halos['mvir']
+
+	exact_model = hod_components.Leauthaud11Sats()
+	tabulated_model = hod_components.Leauthaud11Sats(mean_function_tabulation='grid')
+	exact_nsat = exact_model.mean_occupation(halos=halos)
+	tabulated_nsat = tabulated_model.mean_occupation(halos=halos)
+	assert np.allclose(tabulated_nsat, exact_nsat, rtol=1e-3, atol=1e-5)
+
+	param_dict = {'alphasat_satellites': 1.2}
+	exact_nsat = exact_model.mean_occupation(halos=halos, input_param_dict=param_dict)
+	tabulated_nsat = tabulated_model.mean_occupation(halos=halos, input_param_dict=param_dict)
+	assert np.allclose(tabulated_nsat, exact_nsat, rtol=1e-3, atol=1e-5)
+
+	exact_model = smhm_components.Moster13SmHm(redshift=0)
+	tabulated_model = smhm_components.Moster13SmHm(redshift=0, mean_function_tabulation='grid')
+	assert np.allclose(tabulated_model.mean_stellar_mass(halos=halos), 
+		exact_model.mean_stellar_mass(halos=halos), rtol=1e-4)
+
+	# Quantized halo masses are evaluated exactly on the unique values
+	mass = 10**np.round(rs.uniform(10, 15, int(1e4)), 2)
+	exact_model = hod_components.Zheng07Cens()
+	tabulated_model = hod_components.Zheng07Cens(mean_function_tabulation='unique')
+	assert np.allclose(tabulated_model.mean_occupation(prim_haloprop=mass), 
+		exact_model.mean_occupation(prim_haloprop=mass))
+
+	try:
+		occuhelp.tabulate_mean_function(exact_model.mean_occupation, 'mvir', method='splines')
+		assert False
+	except ValueError:
+		pass
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+import numpy as np 
+from .. import occupation_sampling 
+
+__all__ = ['test_nearest_integer_occupation', 'test_poisson_occupation', 
+	'test_negative_binomial_occupation', 'test_binomial_occupation']
+
+def test_nearest_integer_occupation():
+	first_moment = np.zeros(int(1e4)) + 0.3
+	out = np.zeros(len(first_moment), dtype=int)
+	result = occupation_sampling.nearest_integer_occupation(first_moment, seed=43, out=out)
+	assert result is out
+	assert set(result).issubset([0, 1])
+	np.testing.assert_allclose(result.mean(), 0.3, atol=0.02)
+
+	result2 = occupation_sampling.nearest_integer_occupation(first_moment, seed=43)
+	assert np.all(result2 == result)
+
+def test_poisson_occupation():
+	first_moment = np.zeros(int(1e4)) + 4.
+	first_moment[0:10] = 0
+	first_moment[10:20] = -1
+	out = np.zeros(len(first_moment), dtype=int)
+	result = occupation_sampling.poisson_occupation(first_moment, 
+		seed=np.random.RandomState(43), out=out)
+	assert result is out
+	assert np.all(result[0:20] == 0)
+	np.testing.assert_allclose(result[20:].mean(), 4., rtol=0.05)
+	np.testing.assert_allclose(result[20:].var(), 4., rtol=0.1)
+
+def test_negative_binomial_occupation():
+	first_moment = np.zeros(int(1e5)) + 4.
+	first_moment[0:10] = 0
+	first_moment[10:20] = -1
+	dispersion = 0.25
+	result = occupation_sampling.negative_binomial_occupation(first_moment, dispersion, seed=43)
+	assert np.all(result[0:20] == 0)
+	np.testing.assert_allclose(result[20:].mean(), 4., rtol=0.05)
+	np.testing.assert_allclose(result[20:].var(), 4. + dispersion*16., rtol=0.1)
+
+	dispersion = np.zeros(len(first_moment)) + 0.25
+	result2 = occupation_sampling.negative_binomial_occupation(first_moment, dispersion, seed=43)
+	assert np.all(result2 == result)
+
+def test_binomial_occupation():
+	first_moment = np.zeros(int(1e5)) + 2.
+	result = occupation_sampling.binomial_occupation(first_moment, 4, seed=43)
+	assert np.all(result <= 4)
+	np.testing.assert_allclose(result.mean(), 2., rtol=0.05)
+	np.testing.assert_allclose(result.var(), 1., rtol=0.1)
+
+	# Halos with zero trials have zero galaxies
+	result = occupation_sampling.binomial_occupation([0., 1., 3.], [0, 2, 0], seed=1)
+	assert np.all(result[[0, 2]] == 0)
+	assert 0 <= result[1] <= 2
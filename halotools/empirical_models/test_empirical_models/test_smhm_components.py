@@ -4,10 +4,12 @@ import numpy as np
 from astropy.table import Table 
 
 from .. import smhm_components
+from ..abunmatch import AbunMatchSmHm
 from .. import model_defaults
 
 
-__all__ = ['test_Moster13SmHm_initialization', 'test_LogNormalScatterModel_initialization']
+__all__ = ['test_Moster13SmHm_initialization', 'test_LogNormalScatterModel_initialization', 
+	'test_AbunMatchSmHm']
 
 def test_Moster13SmHm_initialization():
 	""" Function testing the initialization of 
@@ -205,16 +207,59 @@ def test_LogNormalScatterModel_behavior():
 	disp = np.std(scatter_realization)
 	np.testing.assert_almost_equal(disp, 0.3, decimal=2)
 
-
-
-
-
-
-
-
-
-
-
-
-
-
+def test_AbunMatchSmHm():
+	""" Function testing that `~halotools.empirical_models.abunmatch.AbunMatchSmHm` 
+	recovers the stellar-to-halo-mass relation that produced the input stellar mass function. 
+	"""
+	log_mh = np.linspace(10, 16, 601)
+	halo_mf = 10**(-1 - 0.9*(log_mh - 10) - 10**(log_mh - 14.5))
+	true_relation = lambda x: 10.5 + 0.5*(x - 12) - 0.3*np.log10(1 + 10**(x - 12))
+
+	# Convolve the true relation with the scatter to build the stellar mass function
+	scatter = 0.2
+	log_sm = np.linspace(9, 12.5, 71)
+	z = (log_sm - true_relation(log_mh)[:, np.newaxis])/scatter
+	kernel = np.exp(-z*z/2.)/(np.sqrt(2*np.pi)*scatter)
+	smf = np.sum(halo_mf[:, np.newaxis]*kernel, axis=0)*(log_mh[1] - log_mh[0])
+
+	model = AbunMatchSmHm(10**log_sm, smf, scatter_level=scatter, 
+		subhalo_abundance_abcissa=10**log_mh, subhalo_abundance_ordinates=halo_mf)
+	log_mh_test = np.linspace(11.5, 13.5, 10)
+	mstar = model.mean_stellar_mass(prim_haloprop=10**log_mh_test)
+	assert np.allclose(np.log10(mstar), true_relation(log_mh_test), atol=0.02)
+
+	# Batches of abundance functions are matched at once
+	table = model.build_mean_relation_table([smf, smf, smf/2.], [scatter, 0, scatter])
+	assert len(table) == 3
+	assert np.allclose(table.ordinates[0], model.mean_relation_table.ordinates[0])
+	idx = np.zeros(len(log_mh_test), dtype=int)
+	assert np.all(table(log_mh_test, idx+2) < table(log_mh_test, idx))
+
+	# Ignoring the scatter biases the relation high
+	mstar_noscatter = model.mean_stellar_mass(prim_haloprop=10**log_mh_test, 
+		input_param_dict={'scatter_model_param1': 0})
+	assert np.all(np.log10(mstar_noscatter) > true_relation(log_mh_test) + 0.05)
+	assert np.allclose(model.mean_relation_table.ordinates[0], table.ordinates[1])
+
+	# The sorted halo property is cached on the snapshot
+	class DummySnapshot(object):
+		Lbox = 100.
+		halos = Table({'mpeak': 10**np.random.RandomState(43).uniform(11, 14, int(1e4))})
+	snapshot = DummySnapshot()
+	model = AbunMatchSmHm(10**log_sm, smf, snapshot=snapshot, prim_haloprop_key='mpeak')
+	assert 'mpeak' in snapshot._sorted_log_haloprop_cache
+
+	# A halo catalog with a resolution limit cannot host the faint end of the 
+	# stellar mass function, but the relation of the resolved halos is still recovered 
+	Lbox = 200.
+	resolved = log_mh >= 11
+	halo_cdf = np.cumsum(halo_mf[resolved])*(log_mh[1] - log_mh[0])
+	num_halos = int(halo_cdf[-1]*Lbox**3)
+	u = np.random.RandomState(43).uniform(0, halo_cdf[-1], num_halos)
+	halos = Table({'mpeak': 10**np.interp(u, halo_cdf, log_mh[resolved])})
+	model = AbunMatchSmHm(10**log_sm, smf, scatter_level=scatter, 
+		halos=halos, Lbox=Lbox, prim_haloprop_key='mpeak')
+	log_mh_test = np.linspace(11.8, 13.5, 10)
+	mstar = model.mean_stellar_mass(prim_haloprop=10**log_mh_test)
+	assert np.all(np.isfinite(model.mean_relation_table.ordinates))
+	assert np.allclose(np.log10(mstar), true_relation(log_mh_test), atol=0.03)
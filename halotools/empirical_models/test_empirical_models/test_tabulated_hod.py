@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+
+import numpy as np
+from scipy.spatial import cKDTree
+from .. import preloaded_models
+from ..tabulated_hod import TabulatedHodClustering
+from ...sim_manager.generate_random_sim import FakeSim
+
+__all__ = ['test_tabulated_hod_clustering']
+
+class ClusteredFakeSim(FakeSim):
+	""" Version of `~halotools.sim_manager.FakeSim` with half of the halos
+	distributed in clumps, and with the halo boundary stored in kpc/h,
+	so that both the one-halo and two-halo terms of the clustering are non-trivial.
+	"""
+	@property
+	def halos(self):
+		halos = FakeSim.halos.fget(self)
+		halos['rvir'] *= 1000.
+
+		random_state = np.random.RandomState(self.seed)
+		num_halos = len(halos)
+		clump_centers = random_state.uniform(0, self.Lbox, (300, 3))
+		clump = random_state.randint(0, len(clump_centers), num_halos)
+		clustered = random_state.uniform(0, 1, num_halos) < 0.5
+		for idim, key in enumerate(['x', 'y', 'z']):
+			clumped_pos = clump_centers[clump, idim] + random_state.normal(0, 3, num_halos)
+			halos[key] = np.where(clustered, np.mod(clumped_pos, self.Lbox), halos[key])
+		return halos
+
+def test_tabulated_hod_clustering():
+	""" Verify that the galaxy pair counts predicted by
+	`~halotools.empirical_models.TabulatedHodClustering`
+	agree with the pair counts of populated mocks,
+	and that the predictions respond to changes in ``param_dict``.
+	"""
+	model = preloaded_models.Kravtsov04(threshold = -20)
+	sim = ClusteredFakeSim(num_halos_per_massbin = int(2e3))
+	model.populate_mock(snapshot = sim, seed = 43)
+	rbins = np.logspace(-1, 1, 8)
+	engine = TabulatedHodClustering(model, rbins)
+
+	ngals, __, __ = model.expected_number_density()
+	assert np.allclose(engine.number_density(), ngals)
+
+	one_halo_pairs, two_halo_pairs = engine.expected_pair_counts()
+	num_mocks = 4
+	mock_pairs = np.zeros(len(rbins)-1)
+	for seed in range(num_mocks):
+		model.populate_mock(seed = seed)
+		gals = model.mock.galaxy_table
+		pos = np.vstack([gals['x'], gals['y'], gals['z']]).T
+		tree = cKDTree(np.mod(pos, sim.Lbox), boxsize = sim.Lbox)
+		mock_pairs += np.diff(tree.count_neighbors(tree, rbins))/float(num_mocks)
+	assert np.allclose(one_halo_pairs + two_halo_pairs, mock_pairs, rtol = 0.05)
+	assert one_halo_pairs[0] > two_halo_pairs[0]
+	assert one_halo_pairs[-1] == 0
+
+	# The halo pair counts are memoized with the pre-processed halos of the mock
+	assert len(model.mock._preprocessed_halos['halo_pair_counts']) == 1
+	engine2 = TabulatedHodClustering(model, rbins)
+	assert np.allclose(engine2.tpcf(), engine.tpcf())
+
+	# Subhalos and halos below the completeness limit of the snapshot are not populated
+	engine3 = TabulatedHodClustering(model, rbins, snapshot = sim)
+	assert np.allclose(engine3.number_density(), ngals)
+	one_halo_pairs3, two_halo_pairs3 = engine3.expected_pair_counts()
+	assert np.allclose(one_halo_pairs3 + two_halo_pairs3, mock_pairs, rtol = 0.05)
+	assert np.allclose(engine3.tpcf(), engine.tpcf())
+	preprocessed_halos = list(sim._preprocessed_halos_cache.values())[0]
+	assert len(preprocessed_halos['halo_pair_counts']) == 1
+
+	xi = engine.tpcf()
+	wp = engine.wp([0.5, 1, 2], 5)
+	model.param_dict['alpha_satellites'] += 0.2
+	assert np.all(engine.tpcf()[:3] > xi[:3])
+	assert np.all(engine.wp([0.5, 1, 2], 5) > wp)
@@ -10,15 +10,94 @@ import sys
 import numpy as np
 from math import pi, gamma
 from .pair_counters.rect_cuboid_pairs import npairs, xy_z_npairs, jnpairs, s_mu_npairs
+from ..utils.array_utils import get_random_state, random_indices_without_replacement
+from ..utils.spherical_geometry import spherical_to_cartesian, chord_to_cartesian
 ##########################################################################################
 
-__all__=['tpcf','tpcf_jackknife','redshift_space_tpcf','wp','s_mu_tpcf']
+__all__=['tpcf','tpcf_jackknife','jackknife_covariance_matrix','redshift_space_tpcf','wp',\
+         's_mu_tpcf','w_theta']
 __author__ = ['Duncan Campbell']
 
 
+def _downsample_samples(sample1, sample2, randoms, max_sample_size, seed, labels=None):
+    """
+    Randomly down-sample the inputs to at most max_sample_size points each. 
+    
+    All draws come from a single random stream built from the input seed, so that 
+    the same seed always selects the same points. If sample2 is identical to sample1, 
+    the down-sampled sample1 is also returned as sample2.
+    
+    If labels is not None, it must be a length-3 sequence of per-point arrays 
+    (or None) attached to sample1, sample2 and randoms, e.g. jackknife tags. 
+    These are down-sampled along with the points and returned as a fourth output.
+    """
+    random_state = get_random_state(seed)
+    return_labels = labels is not None
+    if labels is None: labels = (None, None, None)
+    
+    def downsample(sample, label, name):
+        if (sample is None) or (len(sample)<=max_sample_size):
+            return sample, label
+        inds = random_indices_without_replacement(len(sample), max_sample_size,\
+                                                  seed=random_state)
+        print('down sampling {0}...'.format(name))
+        if label is not None: label = np.asarray(label)[inds]
+        return sample[inds], label
+    
+    if (sample2 is sample1) or np.all(sample1==sample2):
+        sample1, label1 = downsample(sample1, labels[0], 'sample1')
+        sample2, label2 = sample1, label1
+    else:
+        sample1, label1 = downsample(sample1, labels[0], 'sample1')
+        sample2, label2 = downsample(sample2, labels[1], 'sample2')
+    randoms, label_randoms = downsample(randoms, labels[2], 'randoms')
+    
+    if return_labels:
+        return sample1, sample2, randoms, (label1, label2, label_randoms)
+    else:
+        return sample1, sample2, randoms
+
+
+def jackknife_covariance_matrix(sub, diagonal_only=False):
+    """
+    Calculate the jackknife covariance matrix from a set of leave-one-out estimates.
+    
+    The covariance is computed as a single matrix product, 
+    :math:`C_{ij} = \\frac{N-1}{N}\\sum_{k}(x_{k,i}-\\bar{x}_{i})(x_{k,j}-\\bar{x}_{j})`, 
+    so that it is cheap enough to be called inside likelihood evaluations.
+    
+    Parameters
+    ----------
+    sub : array_like
+        N_sub_vol x Nbins array. Row k contains the statistic measured on the full 
+        sample with the k-th subvolume removed.
+    
+    diagonal_only : boolean, optional
+        If True, only the diagonal of the covariance matrix, i.e. the jackknife 
+        variance in each bin, is calculated and returned as a length-Nbins array. 
+        Default is False.
+    
+    Returns
+    -------
+    cov : array_like
+        Nbins x Nbins covariance matrix, or length-Nbins array of variances if 
+        diagonal_only is True.
+    """
+    
+    sub = np.atleast_2d(sub)
+    N_sub_vol = sub.shape[0]
+    after_subtraction = sub - np.mean(sub, axis=0)
+    if diagonal_only==True:
+        cov = np.einsum('ki,ki->i', after_subtraction, after_subtraction)
+    else:
+        cov = np.dot(after_subtraction.T, after_subtraction)
+    
+    return ((N_sub_vol-1)/N_sub_vol)*cov
+
+
 def tpcf(sample1, rbins, sample2=None, randoms=None, period=None,\
          do_auto=True, do_cross=True, estimator='Natural', N_threads=1,\
-         max_sample_size=int(1e6)):
+         max_sample_size=int(1e6), seed=None):
     """ 
     Calculate the real space two-point correlation function, :math:`\\xi(r)`.
     
@@ -60,6 +139,11 @@ def tpcf(sample1, rbins, sample2=None, randoms=None, period=None,\
         
         If sample size exeeds max_sample_size, the sample will be randomly down-sampled
         such that the subsample is (roughly) equal to max_sample_size. 
+    
+    seed : int or random number generator, optional 
+        Random number seed (or `numpy.random.RandomState` / `numpy.random.Generator`) 
+        used to down-sample the inputs. Default is None, in which case 
+        the global numpy random state is used. 
         
     Returns 
     -------
@@ -109,19 +193,9 @@ def tpcf(sample1, rbins, sample2=None, randoms=None, period=None,\
             raise ValueError("period should have shape (k,)")
             return None
     
-    #down sample is sample size exceeds max_sample_size.
-    if (len(sample2)>max_sample_size) & (not np.all(sample1==sample2)):
-        inds = np.arange(0,len(sample2))
-        np.random.shuffle(inds)
-        inds = inds[0:max_sample_size]
-        sample2 = sample2[inds]
-        print('down sampling sample2...')
-    if len(sample1)>max_sample_size:
-        inds = np.arange(0,len(sample1))
-        np.random.shuffle(inds)
-        inds = inds[0:max_sample_size]
-        sample1 = sample1[inds]
-        print('down sampling sample1...')
+    #down sample if sample size exceeds max_sample_size.
+    sample1, sample2, randoms = _downsample_samples(sample1, sample2, randoms,\
+                                                    max_sample_size, seed)
     
     #check radial bins
     if np.shape(rbins) == ():
@@ -341,7 +415,9 @@ def tpcf(sample1, rbins, sample2=None, randoms=None, period=None,\
 
 def tpcf_jackknife(sample1, randoms, rbins, Nsub=[5,5,5], Lbox=[250.0,250.0,250.0],\
                    sample2=None, period=None, do_auto=True, do_cross=True,\
-                   estimator='Natural', N_threads=1, max_sample_size=int(1e6)):
+                   estimator='Natural', N_threads=1, max_sample_size=int(1e6),\
+                   seed=None, jtags1=None, jtags2=None, jtags_randoms=None,\
+                   covariance='full'):
     """
     Calculate the two-point correlation function, :math:`\\xi(r)` and the covariance 
     matrix.
@@ -394,13 +470,37 @@ def tpcf_jackknife(sample1, randoms, rbins, Nsub=[5,5,5], Lbox=[250.0,250.0,250.
         
         If sample size exeeds max_sample_size, the sample will be randomly down-sampled 
         such that the subsample is (roughly) equal to max_sample_size. 
+    
+    seed : int or random number generator, optional 
+        Random number seed (or `numpy.random.RandomState` / `numpy.random.Generator`) 
+        used to down-sample the inputs. Default is None, in which case 
+        the global numpy random state is used. 
+    
+    jtags1 : array_like, optional
+        length N1 array of positive integer labels defining the jackknife subvolume 
+        of each point in sample1, e.g. regions of a survey footprint. Labels need not be 
+        contiguous; each distinct label defines one subvolume. 
+        If passed, `Nsub` and `Lbox` are ignored and jtags_randoms must also be passed.
+        The label '0' is reserved and should not be used.
+    
+    jtags2 : array_like, optional
+        length N2 array of integer jackknife labels for sample2. Required if jtags1 
+        and sample2 are passed.
+    
+    jtags_randoms : array_like, optional
+        length Nran array of integer jackknife labels for randoms.
+    
+    covariance : string, optional
+        'full' to return the full Nrbins x Nrbins covariance matrix, or 'diagonal' to 
+        return only the length-Nrbins array of jackknife variances. Default is 'full'.
 
     Returns 
     -------
     correlation_function(s), cov_matrix : array_like
         array containing correlation function :math:`\\xi(r)` computed in each of the Nrbins 
         defined by input `rbins`.
-        Nrbins x Nrbins array containing the covariance matrix of `\\xi(r)`
+        Nrbins x Nrbins array containing the covariance matrix of `\\xi(r)`, or 
+        length-Nrbins array containing its diagonal if covariance='diagonal'.
 
     """
     
@@ -436,25 +536,28 @@ def tpcf_jackknife(sample1, randoms, rbins, Nsub=[5,5,5], Lbox=[250.0,250.0,250.
         elif np.shape(period)[0] != np.shape(sample1)[-1]:
             raise ValueError("period should have shape (k,)")
             return None
-    #down sample is sample size exceeds max_sample_size.
-    if (len(sample2)>max_sample_size) & (not np.all(sample1==sample2)):
-        inds = np.arange(0,len(sample2))
-        np.random.shuffle(inds)
-        inds = inds[0:max_sample_size]
-        sample2 = sample2[inds]
-        print('down sampling sample2...')
-    if len(sample1)>max_sample_size:
-        inds = np.arange(0,len(sample1))
-        np.random.shuffle(inds)
-        inds = inds[0:max_sample_size]
-        sample1 = sample1[inds]
-        print('down sampling sample1...')
-    if len(randoms)>max_sample_size:
-        inds = np.arange(0,len(randoms))
-        np.random.shuffle(inds)
-        inds = inds[0:max_sample_size]
-        sample1 = randoms[inds]
-        print('down sampling randoms...')
+    #process user-defined jackknife labels
+    if (jtags1 is None) & ((jtags2 is not None) | (jtags_randoms is not None)):
+        raise ValueError('If jtags2 or jtags_randoms is passed, jtags1 must also be passed.')
+    if jtags1 is not None:
+        if jtags_randoms is None:
+            raise ValueError('If jtags1 is passed, jtags_randoms must also be passed.')
+        if jtags2 is None:
+            if sample2 is sample1: jtags2 = jtags1
+            else: raise ValueError('If jtags1 and sample2 are passed, jtags2 must also be passed.')
+        jtags1 = np.asarray(jtags1).astype(int)
+        jtags2 = np.asarray(jtags2).astype(int)
+        jtags_randoms = np.asarray(jtags_randoms).astype(int)
+        if (len(jtags1)!=len(sample1)) | (len(jtags2)!=len(sample2)) |\
+           (len(jtags_randoms)!=len(randoms)):
+            raise ValueError('jackknife labels must have the same length as the samples.')
+    if covariance not in ['full', 'diagonal']:
+        raise ValueError("covariance must be either 'full' or 'diagonal'.")
+    
+    #down sample if sample size exceeds max_sample_size.
+    sample1, sample2, randoms, (jtags1, jtags2, jtags_randoms) = \
+        _downsample_samples(sample1, sample2, randoms, max_sample_size, seed,\
+                            labels=(jtags1, jtags2, jtags_randoms))
     if np.shape(Nsub)[0]!=np.shape(sample1)[-1]:
         raise ValueError("Nsub should have shape (k,) or be a single integer")
     
@@ -518,10 +621,8 @@ def tpcf_jackknife(sample1, randoms, rbins, Nsub=[5,5,5], Lbox=[250.0,250.0,250.
         return j_index_1, j_index_2, j_index_random, int(N_sub_vol)
     
     def get_subvolume_numbers(j_index,N_sub_vol):
-        #need every label to be in there at least once
-        temp = np.hstack((j_index,np.arange(1,N_sub_vol+1,1)))
-        labels, N = np.unique(temp,return_counts=True)
-        N = N-1 #remove the place holder I added two lines above.
+        #number of points carrying each label in [1,N_sub_vol]
+        N = np.bincount(j_index, minlength=N_sub_vol+1)[1:N_sub_vol+1]
         return N
     
     def jnpair_counts(sample1, sample2, j_index_1, j_index_2, N_sub_vol, rbins,\
@@ -574,20 +675,29 @@ def tpcf_jackknife(sample1, randoms, rbins, Nsub=[5,5,5], Lbox=[250.0,250.0,250.
     def TP_estimator(DD,DR,RR,ND1,ND2,NR1,NR2,estimator):
         """
         two point correlation function estimator
+        
+        If the pair counts are N_sub_vol x Nrbins arrays, the number counts are 
+        length N_sub_vol arrays, and all leave-one-out estimators are evaluated at once.
         """
+        #cast number counts to column vectors so that they broadcast against the rows 
+        #of the 2-D pair count arrays
+        if np.ndim(DD)==2:
+            ND1, ND2, NR1, NR2 = [np.asarray(N, dtype=float)[:,np.newaxis]\
+                                  for N in (ND1, ND2, NR1, NR2)]
+        
         if estimator == 'Natural':
             factor = ND1*ND2/(NR1*NR2)
             #DD/RR-1
-            xi = (1.0/factor)*(DD/RR).T - 1.0
+            xi = (1.0/factor)*(DD/RR) - 1.0
         elif estimator == 'Davis-Peebles':
             factor = ND1*ND2/(ND1*NR2)
             #DD/DR-1
-            xi = (1.0/factor)*(DD/DR).T - 1.0
+            xi = (1.0/factor)*(DD/DR) - 1.0
         elif estimator == 'Hewett':
             factor1 = ND1*ND2/(NR1*NR2)
             factor2 = ND1*NR2/(NR1*NR2)
             #(DD-DR)/RR
-            xi = (1.0/factor1)*(DD/RR).T - (1.0/factor2)*(DR/RR).T
+            xi = (1.0/factor1)*(DD/RR) - (1.0/factor2)*(DR/RR)
         elif estimator == 'Hamilton':
             #DDRR/DRDR-1
             xi = (DD*RR)/(DR*DR) - 1.0
@@ -595,10 +705,10 @@ def tpcf_jackknife(sample1, randoms, rbins, Nsub=[5,5,5], Lbox=[250.0,250.0,250.
             factor1 = ND1*ND2/(NR1*NR2)
             factor2 = ND1*NR2/(NR1*NR2)
             #(DD - 2.0*DR + RR)/RR
-            xi = (1.0/factor1)*(DD/RR).T - (1.0/factor2)*2.0*(DR/RR).T + 1.0
+            xi = (1.0/factor1)*(DD/RR) - (1.0/factor2)*2.0*(DR/RR) + 1.0
         else: 
             raise ValueError("unsupported estimator!")
-        return xi.T #transpose 2 times to get the multiplication to work
+        return xi
     
     def TP_estimator_requirements(estimator):
         """
@@ -628,42 +738,27 @@ def tpcf_jackknife(sample1, randoms, rbins, Nsub=[5,5,5], Lbox=[250.0,250.0,250.
             raise ValueError("unsupported estimator!")
         return do_DD, do_DR, do_RR
     
-    def jackknife_errors(sub,full,N_sub_vol):
-        """
-        Calculate jackknife errors.
-        """
-        after_subtraction =  sub - np.mean(sub,axis=0)
-        squared = after_subtraction**2.0
-        error2 = ((N_sub_vol-1)/N_sub_vol)*squared.sum(axis=0)
-        error = error2**0.5
-        
-        return error
-    
-    def covariance_matrix(sub,full,N_sub_vol):
-        """
-        Calculate the full covariance matrix.
-        """
-        Nr = full.shape[0] # Nr is the number of radial bins
-        cov = np.zeros((Nr,Nr)) # 2D array that keeps the covariance matrix 
-        after_subtraction = sub - np.mean(sub,axis=0)
-        tmp = 0
-        for i in range(Nr):
-            for j in range(Nr):
-                tmp = 0.0
-                for k in range(N_sub_vol):
-                    tmp = tmp + after_subtraction[k,i]*after_subtraction[k,j]
-                cov[i,j] = (((N_sub_vol-1)/N_sub_vol)*tmp)
-    
-        return cov
-    
     do_DD, do_DR, do_RR = TP_estimator_requirements(estimator)
     
     N1 = len(sample1)
     N2 = len(sample2)
     NR = len(randoms)
     
-    j_index_1, j_index_2, j_index_random, N_sub_vol = \
+    if jtags1 is None:
+        j_index_1, j_index_2, j_index_random, N_sub_vol = \
                                get_subvolume_labels(sample1, sample2, randoms, Nsub, Lbox)
+    else:
+        if min(np.min(jtags1), np.min(jtags2), np.min(jtags_randoms))<1:
+            raise ValueError("jackknife labels must be >=1; '0' is a reserved label.")
+        #relabel the subvolumes as 1,...,N_sub_vol so that non-contiguous labels 
+        #do not create empty subvolumes
+        labels, j_index = np.unique(np.concatenate((jtags1, jtags2, jtags_randoms)),\
+                                    return_inverse=True)
+        N_sub_vol = len(labels)
+        j_index = j_index + 1
+        j_index_1 = j_index[:len(jtags1)]
+        j_index_2 = j_index[len(jtags1):len(jtags1)+len(jtags2)]
+        j_index_random = j_index[len(jtags1)+len(jtags2):]
     
     #number of points in each subvolume
     NR_subs = get_subvolume_numbers(j_index_random,N_sub_vol)
@@ -724,15 +819,11 @@ def tpcf_jackknife(sample1, randoms, rbins, Nsub=[5,5,5], Lbox=[250.0,250.0,250.
     xi_22_sub = TP_estimator(D2D2_sub, D2R_sub, RR_sub, N2_subs, N2_subs, NR_subs,\
                              NR_subs, estimator)
     
-    #calculate the errors
-    xi_11_err = jackknife_errors(xi_11_sub,xi_11_full,N_sub_vol)
-    xi_12_err = jackknife_errors(xi_12_sub,xi_12_full,N_sub_vol)
-    xi_22_err = jackknife_errors(xi_22_sub,xi_22_full,N_sub_vol)
-    
     #calculate the covariance matrix
-    xi_11_cov = covariance_matrix(xi_11_sub,xi_11_full,N_sub_vol)
-    xi_12_cov = covariance_matrix(xi_12_sub,xi_12_full,N_sub_vol)
-    xi_22_cov = covariance_matrix(xi_22_sub,xi_22_full,N_sub_vol)
+    diagonal_only = (covariance=='diagonal')
+    xi_11_cov = jackknife_covariance_matrix(xi_11_sub, diagonal_only=diagonal_only)
+    xi_12_cov = jackknife_covariance_matrix(xi_12_sub, diagonal_only=diagonal_only)
+    xi_22_cov = jackknife_covariance_matrix(xi_22_sub, diagonal_only=diagonal_only)
     
     if np.all(sample1==sample2):
         return xi_11_full,xi_11_cov
@@ -747,7 +838,7 @@ def tpcf_jackknife(sample1, randoms, rbins, Nsub=[5,5,5], Lbox=[250.0,250.0,250.
 
 def redshift_space_tpcf(sample1, rp_bins, pi_bins, sample2=None, randoms=None,\
                         period=None, do_auto=True, do_cross=True, estimator='Natural',\
-                        N_threads=1, max_sample_size=int(1e6)):
+                        N_threads=1, max_sample_size=int(1e6), seed=None):
     """ 
     Calculate the redshift space correlation function, :math:`\\xi(r_p, \\pi)`.
     
@@ -796,6 +887,11 @@ def redshift_space_tpcf(sample1, rp_bins, pi_bins, sample2=None, randoms=None,\
         
         If sample size exeeds max_sample_size, the sample will be randomly down-sampled 
         such that the subsample is (roughly) equal to max_sample_size. 
+    
+    seed : int or random number generator, optional 
+        Random number seed (or `numpy.random.RandomState` / `numpy.random.Generator`) 
+        used to down-sample the inputs. Default is None, in which case 
+        the global numpy random state is used. 
 
     Returns 
     -------
@@ -849,19 +945,9 @@ def redshift_space_tpcf(sample1, rp_bins, pi_bins, sample2=None, randoms=None,\
             raise ValueError("period should have shape (k,)")
             return None
     
-    #down sample is sample size exceeds max_sample_size.
-    if (len(sample2)>max_sample_size) & (not np.all(sample1==sample2)):
-        inds = np.arange(0,len(sample2))
-        np.random.shuffle(inds)
-        inds = inds[0:max_sample_size]
-        sample2 = sample2[inds]
-        print('down sampling sample2...')
-    if len(sample1)>max_sample_size:
-        inds = np.arange(0,len(sample1))
-        np.random.shuffle(inds)
-        inds = inds[0:max_sample_size]
-        sample1 = sample1[inds]
-        print('down sampling sample1...')
+    #down sample if sample size exceeds max_sample_size.
+    sample1, sample2, randoms = _downsample_samples(sample1, sample2, randoms,\
+                                                    max_sample_size, seed)
     
     #check radial bins
     if np.shape(rp_bins) == ():
@@ -1089,7 +1175,7 @@ def redshift_space_tpcf(sample1, rp_bins, pi_bins, sample2=None, randoms=None,\
 
 def wp(sample1, rp_bins, pi_bins, sample2=None, randoms=None, period=None,\
        do_auto=True, do_cross=True, estimator='Natural', N_threads=1,\
-       max_sample_size=int(1e6)):
+       max_sample_size=int(1e6), seed=None):
     """ 
     Calculate the projected correlation function, :math:`\\w_p`.
     
@@ -1137,6 +1223,11 @@ def wp(sample1, rp_bins, pi_bins, sample2=None, randoms=None, period=None,\
         
         If sample size exceeds max_sample_size, the sample will be randomly down-sampled 
         such that the subsample is (roughly) equal to max_sample_size.
+    
+    seed : int or random number generator, optional 
+        Random number seed (or `numpy.random.RandomState` / `numpy.random.Generator`) 
+        used to down-sample the inputs. Default is None, in which case 
+        the global numpy random state is used. 
 
     Returns 
     -------
@@ -1169,7 +1260,7 @@ def wp(sample1, rp_bins, pi_bins, sample2=None, randoms=None, period=None,\
                                  sample2 = sample2, randoms=randoms,\
                                  period = period, do_auto=do_auto, do_cross=do_cross,\
                                  estimator=estimator, N_threads=N_threads,\
-                                 max_sample_size=max_sample_size)
+                                 max_sample_size=max_sample_size, seed=seed)
     
     #process the output of the redshift space TPCF function
     if sample2 is None: 
@@ -1219,7 +1310,7 @@ def wp(sample1, rp_bins, pi_bins, sample2=None, randoms=None, period=None,\
 
 def s_mu_tpcf(sample1, s_bins, mu_bins, sample2=None, randoms=None,\
               period=None, do_auto=True, do_cross=True, estimator='Natural',\
-              N_threads=1, max_sample_size=int(1e6)):
+              N_threads=1, max_sample_size=int(1e6), seed=None):
     """ 
     Calculate the redshift space correlation function, :math:`\\xi(s, \\mu)`.
     
@@ -1270,6 +1361,11 @@ def s_mu_tpcf(sample1, s_bins, mu_bins, sample2=None, randoms=None,\
         
         If sample size exeeds max_sample_size, the sample will be randomly down-sampled 
         such that the subsample is (roughly) equal to max_sample_size. 
+    
+    seed : int or random number generator, optional 
+        Random number seed (or `numpy.random.RandomState` / `numpy.random.Generator`) 
+        used to down-sample the inputs. Default is None, in which case 
+        the global numpy random state is used. 
 
     Returns 
     -------
@@ -1323,19 +1419,9 @@ def s_mu_tpcf(sample1, s_bins, mu_bins, sample2=None, randoms=None,\
             raise ValueError("period should have shape (k,)")
             return None
     
-    #down sample is sample size exceeds max_sample_size.
-    if (len(sample2)>max_sample_size) & (not np.all(sample1==sample2)):
-        inds = np.arange(0,len(sample2))
-        np.random.shuffle(inds)
-        inds = inds[0:max_sample_size]
-        sample2 = sample2[inds]
-        print('down sampling sample2...')
-    if len(sample1)>max_sample_size:
-        inds = np.arange(0,len(sample1))
-        np.random.shuffle(inds)
-        inds = inds[0:max_sample_size]
-        sample1 = sample1[inds]
-        print('down sampling sample1...')
+    #down sample if sample size exceeds max_sample_size.
+    sample1, sample2, randoms = _downsample_samples(sample1, sample2, randoms,\
+                                                    max_sample_size, seed)
     
     #check radial bins
     if np.shape(s_bins) == ():
@@ -1563,3 +1649,165 @@ def s_mu_tpcf(sample1, s_bins, mu_bins, sample2=None, randoms=None,\
             xi_11 = TP_estimator(D1D1,D1R,D1R,N1,N1,NR,NR,estimator)
             xi_22 = TP_estimator(D2D2,D2R,D2R,N2,N2,NR,NR,estimator)
             return xi_11
+
+
+def w_theta(sample1, theta_bins, sample2=None, randoms=None, do_auto=True, do_cross=True,\
+            estimator='Natural', N_threads=1, max_sample_size=int(1e6), seed=None):
+    """ 
+    Calculate the angular two-point correlation function, :math:`w(\\theta)`.
+    
+    Angular positions are mapped to 3-d unit vectors, and angular separations are 
+    mapped to chord lengths on the unit sphere, :math:`C = 2\\sin(\\theta/2)`, so that 
+    pairs are counted with the non-periodic 3-d cell pair counter, in parallel if 
+    N_threads > 1.
+    
+    Parameters 
+    ----------
+    sample1 : array_like
+        Npts x 2 numpy array containing the (ra, dec) angular positions of Npts, 
+        in degrees.
+    
+    theta_bins : array_like
+        numpy array of boundaries, in degrees, defining the angular bins in which pairs 
+        are counted.
+    
+    sample2 : array_like, optional
+        Npts x 2 numpy array containing (ra, dec) angular positions of Npts, in degrees.
+    
+    randoms : array_like, optional
+        Nran x 2 numpy array containing (ra, dec) angular positions of Nran, in degrees. 
+        If no randoms are provided, analytic randoms uniformly distributed over 
+        the full sky are used (only valid for full-sky samples).
+    
+    do_auto: boolean, optional
+        do auto-correlation?  Default is True.
+    
+    do_cross: boolean, optional
+        do cross-correlation?  Default is True.
+    
+    estimator: string, optional
+        options: 'Natural', 'Davis-Peebles', 'Hewett' , 'Hamilton', 'Landy-Szalay'
+    
+    N_threads: int, optional
+        number of threads to use in calculation. Default is 1. A string 'max' may be used
+        to indicate that the pair counters should use all available cores on the machine.
+    
+    max_sample_size : int, optional
+        Defines maximum size of the sample that will be passed to the pair counter. 
+        
+        If sample size exeeds max_sample_size, the sample will be randomly down-sampled 
+        such that the subsample is (roughly) equal to max_sample_size. 
+    
+    seed : int or random number generator, optional 
+        Random number seed (or `numpy.random.RandomState` / `numpy.random.Generator`) 
+        used to down-sample the inputs. Default is None, in which case 
+        the global numpy random state is used. 
+    
+    Returns 
+    -------
+    correlation_function : array_like
+        array containing correlation function :math:`w(\\theta)` computed in each of the 
+        bins defined by input `theta_bins`.
+        
+        If sample2 is passed as input, three arrays of length len(theta_bins)-1 are 
+        returned: :math:`w_{11}(\\theta)`, :math:`w_{12}(\\theta)`, 
+        :math:`w_{22}(\\theta)`. If do_auto or do_cross is set to False, the 
+        appropriate result is not returned.
+    
+    Notes
+    -----
+    The angular positions produced by `~halotools.mock_observables.mock_survey.ra_dec_z` 
+    are in radians, and must be converted to degrees with `numpy.degrees` before being 
+    passed to `w_theta`.
+    """
+    
+    def list_estimators():
+        estimators = ['Natural', 'Davis-Peebles', 'Hewett' , 'Hamilton', 'Landy-Szalay']
+        return estimators
+    estimators = list_estimators()
+    
+    def unit_vectors(sample, name):
+        """
+        Map (ra, dec) angular positions to Npts x 3 cartesian points on the unit sphere.
+        """
+        sample = np.asarray(sample, dtype=np.float64)
+        if (sample.ndim!=2) or (np.shape(sample)[-1]!=2):
+            raise ValueError('{0} must be of shape (Npts,2).'.format(name))
+        x, y, z = spherical_to_cartesian(sample[:,0], sample[:,1])
+        return np.vstack((x, y, z)).T
+    
+    #process input parameters
+    sample1 = unit_vectors(sample1, 'sample1')
+    if sample2 is not None: sample2 = unit_vectors(sample2, 'sample2')
+    if randoms is not None: randoms = unit_vectors(randoms, 'randoms')
+    theta_bins = np.asarray(theta_bins)
+    
+    #check angular bins
+    if np.shape(theta_bins) == ():
+        theta_bins = np.array([theta_bins])
+    if theta_bins.ndim != 1:
+        raise ValueError('theta_bins must be a 1-D array')
+    if len(theta_bins)<2:
+        raise ValueError('theta_bins must be of lenght >=2.')
+    if (np.min(theta_bins)<0.0) | (np.max(theta_bins)>180.0):
+        raise ValueError('theta_bins must be in the range [0,180] degrees.')
+    if estimator not in estimators: 
+        raise ValueError('Must specify a supported estimator. Supported estimators are:{0}'
+        .format(estimators))
+    
+    chord_bins = chord_to_cartesian(theta_bins, radians=False)
+    
+    #With randoms, w(theta) is the correlation function of points on the unit sphere
+    if randoms is not None:
+        return tpcf(sample1, chord_bins, sample2=sample2, randoms=randoms, period=None,\
+                    do_auto=do_auto, do_cross=do_cross, estimator=estimator,\
+                    N_threads=N_threads, max_sample_size=max_sample_size, seed=seed)
+    
+    #Without randoms, use analytic randoms covering the full sky.
+    if sample2 is None: sample2 = sample1
+    elif np.all(sample1==sample2):
+        print("Warning: sample1 and sample2 are exactly the same, only the\
+               auto-correlation will be returned.")
+    if (type(do_auto) is not bool) | (type(do_cross) is not bool):
+        raise ValueError('do_auto and do_cross keywords must be of type boolean.')
+    
+    #down sample if sample size exceeds max_sample_size.
+    sample1, sample2, randoms = _downsample_samples(sample1, sample2, randoms,\
+                                                    max_sample_size, seed)
+    
+    def pair_counts(sample1, sample2):
+        """
+        Count data pairs. Points are shifted into the [0,2] cube enclosing the unit sphere.
+        """
+        counts = npairs(sample1+1.0, sample2+1.0, chord_bins, Lbox=2.0,\
+                        N_threads=N_threads)
+        return np.diff(counts)
+    
+    #fraction of the sphere covered by each annulus in theta
+    dOmega = -np.diff(np.cos(np.radians(theta_bins)))/2.0
+    
+    N1 = len(sample1)
+    N2 = len(sample2)
+    
+    #for analytic randoms all estimators reduce to DD/RR - 1, where RR is the number 
+    #of pairs times dOmega. Self-pairs are excluded from the auto-correlation counts, 
+    #so that a sample of N points has N(N-1) pairs.
+    def analytic_estimator(DD, NP):
+        return DD/(NP*dOmega) - 1.0
+    
+    if np.all(sample1==sample2):
+        w_11 = analytic_estimator(pair_counts(sample1, sample1), N1*(N1-1))
+        return w_11
+    
+    if do_auto==True:
+        w_11 = analytic_estimator(pair_counts(sample1, sample1), N1*(N1-1))
+        w_22 = analytic_estimator(pair_counts(sample2, sample2), N2*(N2-1))
+    if do_cross==True:
+        w_12 = analytic_estimator(pair_counts(sample1, sample2), N1*N2)
+    
+    if (do_auto==True) & (do_cross==True): 
+        return w_11, w_12, w_22
+    elif (do_cross==True):
+        return w_12
+    elif (do_auto==True):
+        return w_11, w_22
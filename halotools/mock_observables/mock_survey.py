@@ -8,16 +8,109 @@ from __future__ import division, print_function
 ####import modules########################################################################
 import sys
 import numpy as np
-from scipy.interpolate import interp1d
 from astropy import cosmology
 from astropy.constants import c #the speed of light
+from ..sim_manager.sim_defaults import default_cosmology
+from ..utils.cosmology_utils import cosmology_key
+
+HAS_H5PY = False
+try:
+    import h5py
+    HAS_H5PY = True
+except ImportError:
+    pass
 ##########################################################################################
 
 
-__all__=['distant_observer_redshift', 'ra_dec_z']
+__all__=['distant_observer_redshift', 'ra_dec_z', 'lightcone_generator', 'write_lightcone',\
+         'redshift_distance_table', 'comoving_distance_to_redshift']
 __author__ = ['Duncan Campbell']
 
 
+#lookup tables of comoving distance vs. redshift, keyed by cosmology
+_redshift_distance_tables = {}
+
+
+def redshift_distance_table(cosmo, z_max=1.0, dz=0.001):
+    """
+    Return a lookup table of comoving distance as a function of redshift.
+    
+    Tables are cached for each cosmology, identified by the exact values of its parameters 
+    (see `~halotools.utils.cosmology_key`), so that `cosmo.comoving_distance` is only 
+    evaluated the first time a cosmology is used, or when a larger redshift range or 
+    finer spacing than that of the cached table is requested.
+    
+    Parameters
+    ----------
+    cosmo: astropy.cosmology object
+    
+    z_max: float, optional
+        maximum redshift of the table. Default is 1.0.
+    
+    dz: float, optional
+        maximum spacing in redshift of the table. Default is 0.001.
+    
+    Returns
+    -------
+    z_table: np.array
+        regularly spaced redshifts in the range [0, z_max] or wider.
+    
+    r_table: np.array
+        comoving distance in Mpc/h units at each redshift in z_table.
+    """
+    
+    key = cosmology_key(cosmo)
+    
+    if key in _redshift_distance_tables:
+        z_table, r_table = _redshift_distance_tables[key]
+        if (z_table[-1] >= z_max) & (z_table[1]-z_table[0] <= dz*(1.0+1e-8)):
+            return z_table, r_table
+        #extend the existing table rather than shrinking its range or precision
+        z_max = max(z_max, z_table[-1])
+        dz = min(dz, z_table[1]-z_table[0])
+    
+    z_table = np.linspace(0.0, z_max, int(np.ceil(z_max/dz))+1)
+    r_table = cosmo.comoving_distance(z_table).value*cosmo.h
+    _redshift_distance_tables[key] = (z_table, r_table)
+    
+    return z_table, r_table
+
+
+def comoving_distance_to_redshift(r, cosmo, dz=0.001):
+    """
+    Calculate the cosmological redshift corresponding to a comoving distance.
+    
+    The inversion is done by interpolating the cached table returned by 
+    `redshift_distance_table`, which is extended as needed to cover the input distances.
+    
+    Parameters
+    ----------
+    r: array_like
+        comoving distance in Mpc/h units
+    
+    cosmo: astropy.cosmology object
+    
+    dz: float, optional
+        maximum spacing in redshift of the lookup table. Default is 0.001.
+    
+    Returns
+    -------
+    z: np.array
+        cosmological redshift
+    """
+    
+    r = np.asarray(r)
+    z_max = 1.0
+    z_table, r_table = redshift_distance_table(cosmo, z_max=z_max, dz=dz)
+    while np.max(r) > r_table[-1]:
+        if z_table[-1] > 1000.0:
+            raise ValueError("Input comoving distances exceed the range of the lookup table")
+        z_max = 2.0*z_table[-1]
+        z_table, r_table = redshift_distance_table(cosmo, z_max=z_max, dz=dz)
+    
+    return np.interp(r, r_table, z_table)
+
+
 def distant_observer_redshift(x, v, period=None, cosmo=None):
     """
     Calculate observed redshifts using the distant observer approximation.
@@ -27,7 +120,9 @@ def distant_observer_redshift(x, v, period=None, cosmo=None):
     z_cosmo = z*H0/c
     
     where z is the 'z' position, H0 is the Hubble constant at z=0, and c is the speed of
-    light.  Note that this is an approximation
+    light.  Note that this is an approximation. If a cosmology is passed, the cosmological 
+    redshift is instead calculated exactly from the comoving distance 'z', using the 
+    cached lookup tables of `redshift_distance_table`.
     
     Parameters
     ----------
@@ -40,6 +135,9 @@ def distant_observer_redshift(x, v, period=None, cosmo=None):
     period: array_like, optional
         periodic boundary conditions of simulation box
     
+    cosmo: astropy.cosmology object, optional
+        If None (the default), the linear approximation z_cosmo = z*H0/c is used.
+    
     Returns
     -------
     redshift: np.array
@@ -52,14 +150,20 @@ def distant_observer_redshift(x, v, period=None, cosmo=None):
     v_los = v[:,2]
     
     #compute cosmological redshift (h=1, note that positions are in Mpc/h)
-    z_cos = x[:,2]*100.0/c_km_s
+    if cosmo is None:
+        z_cos = x[:,2]*100.0/c_km_s
+    else:
+        z_cos = comoving_distance_to_redshift(x[:,2], cosmo)
     
     #redshift is combination of cosmological and peculiar velocities
     z = z_cos+(v_los/c_km_s)*(1.0+z_cos)
     
     #reflect galaxies around PBC
     if period is not None:
-        z_cos_max = period[2]*100.00/c_km_s #maximum cosmological redshift
+        if cosmo is None:
+            z_cos_max = period[2]*100.00/c_km_s #maximum cosmological redshift
+        else:
+            z_cos_max = comoving_distance_to_redshift(period[2], cosmo)
         flip = (z > z_cos_max)
         z[flip] = z[flip] - z_cos_max
         flip = (z < 0.0)
@@ -112,10 +216,7 @@ def ra_dec_z(x, v, cosmo=None):
     vr = v[:,0]*st*cp + v[:,1]*st*sp + v[:,2]*ct
     
     #compute cosmological redshift and add contribution from perculiar velocity
-    yy = np.arange(0,1.0,0.001)
-    xx = cosmo.comoving_distance(yy).value
-    f = interp1d(xx, yy, kind='cubic')
-    z_cos = f(r)
+    z_cos = comoving_distance_to_redshift(r*cosmo.h, cosmo)
     redshift = z_cos+(vr/c_km_s)*(1.0+z_cos)
 
     #calculate spherical coordinates
@@ -127,5 +228,243 @@ def ra_dec_z(x, v, cosmo=None):
     dec = (np.pi/2.0) - theta
     
     return ra, dec, redshift
+
+
+def lightcone_generator(x, v, period, z_min=0.0, z_max=0.5, ra_range=[0.0, 2.0*np.pi],\
+                        dec_range=[-np.pi/2.0, np.pi/2.0], cosmo=None):
+    """
+    Build a lightcone by tiling space with periodic replicas of a simulation box, 
+    yielding the galaxies of one replica at a time.
+    
+    The observer is placed at (0,0,0). Only the replicas of the box that intersect 
+    the requested redshift shell and angular footprint are processed, so memory usage 
+    is set by the size of a single box rather than by the size of the survey.
+    
+    Parameters
+    ----------
+    x: array_like
+        Npts x 3 numpy array containing 3-d positions in Mpc/h units, in the range 
+        [0, period).
+    
+    v: array_like
+        Npts x 3 numpy array containing 3-d velocities of shape (N,3) in km/s
+    
+    period: array_like
+        length 3 array (or a single number) defining the periodic boundary conditions 
+        of the simulation box in Mpc/h units.
+    
+    z_min, z_max: float, optional
+        range of observed redshift of the lightcone. Default is [0.0, 0.5].
+    
+    ra_range: array_like, optional
+        [ra_min, ra_max] of the footprint in radians. If ra_min > ra_max, the footprint 
+        wraps through ra=0. Default is the full sky.
+    
+    dec_range: array_like, optional
+        [dec_min, dec_max] of the footprint in radians. Default is the full sky.
+    
+    cosmo: astropy.cosmology object, optional
+        default is `~halotools.sim_manager.sim_defaults.default_cosmology`
+    
+    Returns
+    -------
+    chunk: generator
+        Each iteration yields a dictionary for one replica of the box with keys: 
+        'ra' and 'dec' in radians; 'redshift', the observed redshift including 
+        the peculiar velocity along the line-of-sight; 'redshift_cosmo', the cosmological 
+        redshift; 'index', the row of each galaxy in the input x and v; 
+        'replica', the length-3 integer offset of the replica in units of period.
+    
+    Examples
+    --------
+    >>> Lbox = 250.0
+    >>> x = np.random.random((1000,3))*Lbox
+    >>> v = np.random.normal(0.0, 300.0, (1000,3))
+    >>> ngals = 0
+    >>> for chunk in lightcone_generator(x, v, Lbox, z_max=0.1):
+    ...     ngals += len(chunk['redshift'])
+    """
+    
+    x = np.asarray(x)
+    v = np.asarray(v)
+    period = np.asarray(period).astype("float64")
+    if np.shape(period) == ():
+        period = np.array([period]*3)
+    elif np.shape(period) != (3,):
+        raise ValueError("period should have shape (3,)")
+    if (z_min<0.0) | (z_max<=z_min):
+        raise ValueError("Must have 0 <= z_min < z_max")
+    if cosmo is None:
+        cosmo = default_cosmology
+    c_km_s = c.to('km/s').value
+    
+    #Peculiar velocities move galaxies across the boundaries of the redshift shell, 
+    #so select galaxies in a comoving shell padded by the largest possible displacement.
+    #Since H(z)>=H0, the padding in Mpc/h is at most v_max*(1+z_max)/100.
+    v_max = np.max(np.sqrt(np.sum(v**2, axis=1)))
+    dr_pad = v_max*(1.0+z_max)/100.0
+    
+    z_table, r_table = redshift_distance_table(cosmo,\
+                                               z_max + 2.0*v_max*(1.0+z_max)/c_km_s)
+    r_min = max(np.interp(z_min, z_table, r_table) - dr_pad, 0.0)
+    r_max = np.interp(z_max, z_table, r_table) + dr_pad
+    
+    for replica in _lightcone_replicas(period, r_min, r_max, ra_range, dec_range):
+        
+        #shift the box and keep only the galaxies in the padded shell
+        xr = x + replica*period
+        r = np.sqrt(np.sum(xr**2, axis=1))
+        idx = np.where((r >= r_min) & (r <= r_max) & (r > 0.0))[0]
+        xr = xr[idx]
+        r = r[idx]
+        
+        #angular positions
+        ra = np.arctan2(xr[:,1], xr[:,0]) % (2.0*np.pi)
+        dec = np.arcsin(xr[:,2]/r)
+        
+        #compute cosmological redshift and add contribution from perculiar velocity
+        v_los = np.sum(xr*v[idx], axis=1)/r
+        z_cos = np.interp(r, r_table, z_table)
+        redshift = z_cos + (v_los/c_km_s)*(1.0+z_cos)
+        
+        keep = (redshift >= z_min) & (redshift < z_max)
+        keep &= _in_angular_range(ra, ra_range[0], ra_range[1])
+        keep &= (dec >= dec_range[0]) & (dec <= dec_range[1])
+        
+        yield {'ra':ra[keep], 'dec':dec[keep], 'redshift':redshift[keep],\
+               'redshift_cosmo':z_cos[keep], 'index':idx[keep], 'replica':replica}
+
+
+def write_lightcone(output_fname, x, v, period, overwrite=False, **kwargs):
+    """
+    Build a lightcone with `lightcone_generator` and stream it to an hdf5 file, 
+    one replica of the box at a time.
+    
+    Parameters
+    ----------
+    output_fname: string
+        Filename (including absolute path) of the output hdf5 file.
+    
+    x: array_like
+        Npts x 3 numpy array containing 3-d positions in Mpc/h units
+    
+    v: array_like
+        Npts x 3 numpy array containing 3-d velocities of shape (N,3) in km/s
+    
+    period: array_like
+        periodic boundary conditions of simulation box in Mpc/h units
+    
+    overwrite: bool, optional
+        If False (the default), an existing file at output_fname raises an IOError.
+    
+    kwargs: 
+        z_min, z_max, ra_range, dec_range, cosmo: passed to `lightcone_generator`.
+    
+    Returns
+    -------
+    Ngals: int
+        number of galaxies written to the output file. The file has one dataset per 
+        key of the chunks yielded by `lightcone_generator`, with 'replica' 
+        stored for each galaxy as an Ngals x 3 array.
+    """
+    
+    if HAS_H5PY==False:
+        raise ImportError("Must have h5py installed to use the write_lightcone function")
+    
+    import os
+    if os.path.exists(output_fname) & (overwrite==False):
+        raise IOError("The following file already exists: \n%s\n"
+            "Set overwrite=True to replace it." % output_fname)
+    
+    columns = {'ra':np.float64, 'dec':np.float64, 'redshift':np.float64,\
+               'redshift_cosmo':np.float64, 'index':np.int64}
+    
+    f = h5py.File(output_fname, 'w')
+    try:
+        for key, dtype in columns.items():
+            f.create_dataset(key, shape=(0,), maxshape=(None,), dtype=dtype, chunks=True)
+        f.create_dataset('replica', shape=(0,3), maxshape=(None,3), dtype=np.int64,\
+                         chunks=True)
+        
+        Ngals = 0
+        for chunk in lightcone_generator(x, v, period, **kwargs):
+            N = len(chunk['index'])
+            if N == 0: continue
+            for key in columns.keys():
+                f[key].resize((Ngals+N,))
+                f[key][Ngals:Ngals+N] = chunk[key]
+            f['replica'].resize((Ngals+N,3))
+            f['replica'][Ngals:Ngals+N] = np.tile(chunk['replica'], (N,1))
+            Ngals += N
+        
+        for key in ['z_min', 'z_max', 'ra_range', 'dec_range']:
+            if key in kwargs.keys(): f.attrs[key] = kwargs[key]
+        f.attrs['period'] = period
+    finally:
+        f.close()
+    
+    return Ngals
+
+
+def _in_angular_range(theta, theta_min, theta_max):
+    """
+    Return a boolean array indicating whether the angles theta (radians) are inside the 
+    arc running counter-clockwise from theta_min to theta_max.
+    """
+    if (theta_max - theta_min) >= 2.0*np.pi:
+        return np.ones(np.shape(theta), dtype=bool)
+    twopi = 2.0*np.pi
+    return ((theta - theta_min) % twopi) <= ((theta_max - theta_min) % twopi)
+
+
+def _lightcone_replicas(period, r_min, r_max, ra_range, dec_range):
+    """
+    Generate the integer offsets (in units of period) of the box replicas that intersect 
+    the comoving shell [r_min, r_max] and the angular footprint.
+    
+    The footprint test is conservative: it may keep a replica with no galaxies inside the 
+    footprint, but never discards a replica that has some.
+    """
     
+    n_max = np.ceil(r_max/period).astype(int)
+    full_ra = (ra_range[1] - ra_range[0]) >= 2.0*np.pi
     
+    for i in range(-n_max[0], n_max[0]):
+        for j in range(-n_max[1], n_max[1]):
+            for k in range(-n_max[2], n_max[2]):
+                replica = np.array([i, j, k])
+                lo = replica*period
+                hi = lo + period
+                
+                #distance from the observer to the nearest and farthest points of the box
+                d_near = np.sqrt(np.sum((np.clip(0.0, lo, hi))**2))
+                d_far = np.sqrt(np.sum(np.maximum(np.abs(lo), np.abs(hi))**2))
+                if (d_near > r_max) | (d_far < r_min):
+                    continue
+                
+                #declination range of the box
+                rho_near = np.sqrt(np.sum((np.clip(0.0, lo[0:2], hi[0:2]))**2))
+                rho_far = np.sqrt(np.sum(np.maximum(np.abs(lo[0:2]), np.abs(hi[0:2]))**2))
+                if hi[2] >= 0.0: dec_hi = np.arctan2(hi[2], rho_near)
+                else: dec_hi = np.arctan2(hi[2], rho_far)
+                if lo[2] >= 0.0: dec_lo = np.arctan2(lo[2], rho_far)
+                else: dec_lo = np.arctan2(lo[2], rho_near)
+                if (dec_lo > dec_range[1]) | (dec_hi < dec_range[0]):
+                    continue
+                
+                #right ascension range of the box. If the box straddles the z-axis 
+                #it covers all ra; otherwise the range is spanned by its corners.
+                if (full_ra==False) & (rho_near > 0.0):
+                    corners_x = np.array([lo[0], lo[0], hi[0], hi[0]])
+                    corners_y = np.array([lo[1], hi[1], lo[1], hi[1]])
+                    ra_center = np.arctan2(lo[1]+hi[1], lo[0]+hi[0])
+                    dra = np.arctan2(corners_y, corners_x) - ra_center
+                    dra = (dra + np.pi) % (2.0*np.pi) - np.pi
+                    ra_lo = (ra_center + np.min(dra)) % (2.0*np.pi)
+                    ra_hi = (ra_center + np.max(dra)) % (2.0*np.pi)
+                    overlap = (_in_angular_range(ra_lo, ra_range[0], ra_range[1]) |\
+                               _in_angular_range(ra_range[0], ra_lo, ra_hi))
+                    if overlap==False:
+                        continue
+                
+                yield replica
@@ -105,6 +105,9 @@ class rect_cuboid_cells():
                                                 self.num_divs[1],\
                                                 self.num_divs[2]))
         
+        #cellIDs of the subvolumes that contain at least one point
+        self.nonempty_cells = np.unique(particle_indices)
+        
         idx_sorted = np.argsort(particle_indices)
         bin_indices = np.searchsorted(particle_indices[idx_sorted], 
                                       np.arange(np.prod(self.num_divs)))
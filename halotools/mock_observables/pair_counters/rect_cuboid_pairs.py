@@ -142,17 +142,18 @@ def npairs(data1, data2, rbins, Lbox=None, period=None, verbose=False, N_threads
         print("cell size= {0}".format(grid1.dL))
         print("number of cells = {0}".format(np.prod(grid1.num_divs)))
     
-    #number of cells
-    Ncell1 = np.prod(grid1.num_divs)
+    #only cells of grid1 containing points can contribute pairs. For points filling a 
+    #small fraction of the enclosing box, e.g. on a sphere, most cells are empty.
+    icells1 = grid1.nonempty_cells
     
     #create a function to call with only one argument
     engine = partial(_npairs_engine, grid1, grid2, rbins, period, PBCs)
     
     #do the pair counting
     if N_threads>1:
-        counts = np.sum(pool.map(engine,range(Ncell1)),axis=0)
+        counts = np.sum(pool.map(engine,icells1),axis=0)
     if N_threads==1:
-        counts = np.sum(map(engine,range(Ncell1)),axis=0)
+        counts = np.sum(map(engine,icells1),axis=0)
     
     return counts
 
@@ -6,7 +6,7 @@ import sys
 from ..clustering import tpcf
 
 __all__=['test_TPCF_auto', 'test_TPCF_estimator', 'test_TPCF_sample_size_limit',\
-         'test_TPCF_randoms', 'test_TPCF_period_API']
+         'test_TPCF_randoms', 'test_TPCF_period_API', 'test_TPCF_downsampling_seed']
 
 ####two point correlation function########################################################
 
@@ -130,4 +130,18 @@ def test_TPCF_period_API():
     
     assert len(result_1)==3, "One or more correlation functions returned erroneously."
     assert len(result_2)==3, "One or more correlation functions returned erroneously."
-##########################################################################################
\ No newline at end of file
+##########################################################################################
+
+
+def test_TPCF_downsampling_seed():
+
+    sample1 = np.random.random((1000,3))
+    randoms = np.random.random((1000,3))
+    rbins = np.linspace(0,0.4,5)
+    
+    result_1 = tpcf(sample1, rbins, randoms=randoms, period = None, 
+                    max_sample_size=int(1e2), estimator='Natural', seed=43)
+    result_2 = tpcf(sample1, rbins, randoms=randoms, period = None, 
+                    max_sample_size=int(1e2), estimator='Natural', seed=43)
+    
+    assert np.all(result_1==result_2), "down-sampling is not reproducible with a fixed seed."
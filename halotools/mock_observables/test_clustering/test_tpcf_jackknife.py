@@ -3,9 +3,11 @@
 from __future__ import division, print_function
 import numpy as np
 import sys
-from ..clustering import tpcf_jackknife, tpcf
+import pytest
+from ..clustering import tpcf_jackknife, tpcf, jackknife_covariance_matrix
 
-__all__=['test_tpcf_jackknife']
+__all__=['test_tpcf_jackknife', 'test_tpcf_jackknife_cov_matrix',\
+         'test_jackknife_covariance_matrix', 'test_tpcf_jackknife_user_labels']
 
 
 def test_tpcf_jackknife():
@@ -39,4 +41,62 @@ def test_tpcf_jackknife_cov_matrix():
     result_1,err = tpcf_jackknife(sample1, randoms, rbins, Nsub=5, Lbox=Lbox, period = period, N_threads=1)
     
     print(err)
-    assert np.shape(err)==(nbins,nbins), "correlation functions do not match"
\ No newline at end of file
+    assert np.shape(err)==(nbins,nbins), "correlation functions do not match"
+
+
+def test_jackknife_covariance_matrix():
+    
+    N_sub_vol, nbins = 27, 4
+    sub = np.random.random((N_sub_vol,nbins))
+    
+    after_subtraction = sub - np.mean(sub,axis=0)
+    cov_loop = np.zeros((nbins,nbins))
+    for i in range(nbins):
+        for j in range(nbins):
+            cov_loop[i,j] = np.sum(after_subtraction[:,i]*after_subtraction[:,j])
+    cov_loop *= (N_sub_vol-1)/N_sub_vol
+    
+    cov = jackknife_covariance_matrix(sub)
+    var = jackknife_covariance_matrix(sub, diagonal_only=True)
+    
+    assert np.allclose(cov, cov_loop), "covariance matrix is incorrect"
+    assert np.allclose(var, np.diag(cov_loop)), "variances are incorrect"
+
+
+def test_tpcf_jackknife_user_labels():
+    
+    Npts=100
+    sample1 = np.random.random((Npts,3))
+    randoms = np.random.random((Npts*10,3))
+    period = np.array([1,1,1])
+    Lbox = np.array([1,1,1])
+    rbins = np.linspace(0.0,0.1,5)
+    nbins = len(rbins)-1
+    
+    #label points by slabs in x, equivalent to Nsub=[5,1,1]
+    jtags1 = np.floor(sample1[:,0]*5).astype(int) + 1
+    jtags_randoms = np.floor(randoms[:,0]*5).astype(int) + 1
+    
+    result_1,cov_1 = tpcf_jackknife(sample1, randoms, rbins, Nsub=[5,1,1], Lbox=Lbox,\
+                                    period = period, N_threads=1)
+    result_2,cov_2 = tpcf_jackknife(sample1, randoms, rbins, period = period, N_threads=1,\
+                                    jtags1=jtags1, jtags_randoms=jtags_randoms)
+    result_3,var_3 = tpcf_jackknife(sample1, randoms, rbins, period = period, N_threads=1,\
+                                    jtags1=jtags1, jtags_randoms=jtags_randoms,\
+                                    covariance='diagonal')
+    
+    assert np.allclose(result_1,result_2), "correlation functions do not match"
+    assert np.allclose(cov_1,cov_2), "covariance matrices do not match"
+    assert np.shape(var_3)==(nbins,), "diagonal covariance has the wrong shape"
+    assert np.allclose(var_3,np.diag(cov_2)), "variances do not match"
+    
+    #non-contiguous labels define the same subvolumes
+    result_4,cov_4 = tpcf_jackknife(sample1, randoms, rbins, period = period, N_threads=1,\
+                                    jtags1=jtags1*7, jtags_randoms=jtags_randoms*7)
+    assert np.allclose(result_2,result_4), "correlation functions do not match"
+    assert np.allclose(cov_2,cov_4), "covariance matrices do not match"
+    
+    #jtags2 or jtags_randoms without jtags1 is an error
+    with pytest.raises(ValueError):
+        tpcf_jackknife(sample1, randoms, rbins, period = period, N_threads=1,\
+                       jtags_randoms=jtags_randoms)
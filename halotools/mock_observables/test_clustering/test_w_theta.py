@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+
+from __future__ import division, print_function
+import numpy as np
+import sys
+from ..clustering import w_theta
+
+__all__=['test_w_theta_auto', 'test_w_theta_cross', 'test_w_theta_randoms',\
+         'test_w_theta_normalization']
+
+####angular correlation function##########################################################
+
+def random_sky(N):
+    ra = np.random.uniform(0.0, 360.0, N)
+    dec = np.degrees(np.arcsin(np.random.uniform(-1.0, 1.0, N)))
+    return np.vstack((ra, dec)).T
+
+def test_w_theta_auto():
+    
+    sample1 = random_sky(1000)
+    theta_bins = np.linspace(0.0, 30.0, 5)
+    
+    result = w_theta(sample1, theta_bins)
+    
+    assert result.ndim == 1, "More than one correlation function returned erroneously."
+    assert len(result) == len(theta_bins)-1, "correlation function has the wrong length."
+    assert np.all(np.abs(result) < 0.2), "random points on the sky should be uncorrelated."
+
+def test_w_theta_cross():
+    
+    sample1 = random_sky(1000)
+    sample2 = random_sky(1000)
+    theta_bins = np.linspace(0.0, 30.0, 5)
+    
+    result = w_theta(sample1, theta_bins, sample2=sample2)
+    
+    assert len(result)==3, "One or more correlation functions returned erroneously."
+
+def test_w_theta_randoms():
+    
+    sample1 = random_sky(1000)
+    randoms = random_sky(1000)
+    theta_bins = np.linspace(0.0, 30.0, 5)
+    
+    result = w_theta(sample1, theta_bins, randoms=randoms, estimator='Landy-Szalay')
+    
+    assert result.ndim == 1, "More than one correlation function returned erroneously."
+    assert np.all(np.abs(result) < 0.2), "random points on the sky should be uncorrelated."
+
+def test_w_theta_normalization():
+    
+    sample1 = random_sky(100)
+    sample2 = random_sky(50)
+    theta_bins = np.array([0.0, 180.0])
+    
+    #a single bin covering the full sky contains every distinct pair exactly once
+    w_11, w_12, w_22 = w_theta(sample1, theta_bins, sample2=sample2)
+    
+    assert np.allclose(w_11, 0.0), "auto-correlation counts are normalized incorrectly."
+    assert np.allclose(w_22, 0.0), "auto-correlation counts are normalized incorrectly."
+    assert np.allclose(w_12, 0.0), "cross-correlation counts are normalized incorrectly."
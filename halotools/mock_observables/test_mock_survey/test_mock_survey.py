@@ -3,7 +3,8 @@
 from __future__ import division, print_function
 import numpy as np
 import sys
-from ..mock_survey import distant_observer_redshift, ra_dec_z
+from ..mock_survey import distant_observer_redshift, ra_dec_z, lightcone_generator
+from ..mock_survey import redshift_distance_table, comoving_distance_to_redshift
 
 def test_distant_observer():
     
@@ -43,3 +44,58 @@ def test_ra_dec_z():
     assert len(z)==N
     assert np.all(ra<2.0*np.pi) & np.all(ra>0.0), "ra range is incorrect"
     assert np.all(dec>-1.0*np.pi/2.0) & np.all(dec<np.pi/2.0), "ra range is incorrect"
+
+
+def test_lightcone_generator():
+    
+    N=1000
+    Lbox = 100.0
+    x = np.random.random((N,3))*Lbox
+    v = np.random.normal(0.0, 300.0, (N,3))
+    z_min, z_max = 0.01, 0.05
+    ra_range = [5.5, 1.0] #wraps through ra=0
+    dec_range = [-0.3, 0.8]
+    
+    ngals = 0
+    replicas = []
+    for chunk in lightcone_generator(x, v, Lbox, z_min=z_min, z_max=z_max,\
+                                     ra_range=ra_range, dec_range=dec_range):
+        ngals += len(chunk['index'])
+        replicas.append(tuple(chunk['replica']))
+        assert np.all(chunk['redshift']>=z_min) & np.all(chunk['redshift']<z_max)
+        assert np.all((chunk['ra']>=ra_range[0]) | (chunk['ra']<=ra_range[1]))
+        assert np.all(chunk['dec']>=dec_range[0]) & np.all(chunk['dec']<=dec_range[1])
+        assert np.all(chunk['index']>=0) & np.all(chunk['index']<N)
+    
+    assert ngals > N, "lightcone should contain several replicas of the box"
+    assert len(set(replicas))==len(replicas), "replicas should be visited only once"
+
+
+def test_comoving_distance_to_redshift():
+    
+    from astropy import cosmology
+    cosmo = cosmology.FlatLambdaCDM(H0=70.0, Om0=0.3)
+    
+    z_table, r_table = redshift_distance_table(cosmo, z_max=0.5)
+    assert z_table[-1]>=0.5
+    
+    #the cached table is returned for the same cosmology
+    z_table2, r_table2 = redshift_distance_table(cosmology.FlatLambdaCDM(H0=70.0, Om0=0.3),\
+                                                 z_max=0.5)
+    assert z_table2 is z_table
+    
+    #a cached table that already covers the requested range is also reused
+    z_table3, r_table3 = redshift_distance_table(cosmo, z_max=0.2)
+    assert z_table3 is z_table
+    
+    #cosmologies whose repr agree, but whose parameters differ, have distinct tables
+    cosmo1 = cosmology.FlatLambdaCDM(H0=67.74, Om0=0.3089)
+    cosmo2 = cosmology.FlatLambdaCDM(H0=67.71, Om0=0.3091)
+    z_table1, r_table1 = redshift_distance_table(cosmo1, z_max=1.0)
+    z_table2, r_table2 = redshift_distance_table(cosmo2, z_max=1.0)
+    assert np.allclose(r_table2, cosmo2.comoving_distance(z_table2).value*cosmo2.h)
+    assert not np.allclose(r_table1, r_table2, rtol=1e-5)
+    
+    z = np.array([0.1, 0.5, 1.5, 3.0])
+    r = cosmo.comoving_distance(z).value*cosmo.h
+    assert np.allclose(comoving_distance_to_redshift(r, cosmo), z, rtol=1e-4)
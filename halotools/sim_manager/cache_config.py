@@ -4,7 +4,7 @@ various files used throughout the halotools package.
 """
 
 __all__ = (
-    ['get_halotools_cache_dir','get_catalogs_dir']
+    ['get_halotools_cache_dir','get_catalogs_dir', 'get_lookup_tables_dir']
     )
 
 import os
@@ -190,6 +190,35 @@ def get_catalogs_dir(catalog_type, **kwargs):
                 return halo_finder_dirname
 
 
+def get_lookup_tables_dir():
+    """ Find the path to the subdirectory of the halotools cache directory 
+    where lookup tables used by the empirical models are stored, 
+    e.g., the inverse cumulative mass profiles of halo profile models. 
+
+    If the directory doesn't exist, make it, then return the path. 
+
+    Returns
+    -------
+    dirname : str
+        Path to the halotools directory storing lookup tables.
+
+    """
+    default_cache_dir = sim_defaults.lookup_tables_cache_dir
+
+    # Check to see whether we are using the package default or user-provided cache directory
+    if default_cache_dir != 'pkg_default':
+        if not os.path.isdir(default_cache_dir):
+            errmsg = ('Cache dirname ' + default_cache_dir + ' stored in '
+            'sim_defaults module is not a directory')
+            raise IOError(errmsg)
+        else:
+            return default_cache_dir
+    else:
+        lookup_tables_dirname = os.path.join(get_halotools_cache_dir(), 'lookup_tables')
+        defensively_create_subdir(lookup_tables_dirname)
+        return lookup_tables_dirname
+
+
 def processed_halocats_web_location(**kwargs):
     """ Method returns the web location where pre-processed 
     halo catalog binaries generated by, and for use with, 
@@ -13,6 +13,7 @@ from astropy import cosmology
 raw_halocat_cache_dir = 'pkg_default'
 processed_halocat_cache_dir = 'pkg_default'
 particles_cache_dir = 'pkg_default'
+lookup_tables_cache_dir = 'pkg_default'
 
 ### Default halo catalog (used in read_nbody)
 # The following parameters are used by the 
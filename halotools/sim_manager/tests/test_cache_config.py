@@ -8,7 +8,7 @@ from .. import cache_config
 
 __all__ = (
 	['test_cache_config', 'test_catalogs_config', 'test_should_not_create_dir', 
-	'test_supported_simnames', 'test_supported_halo_finders']
+	'test_supported_simnames', 'test_supported_halo_finders', 'test_lookup_tables_config']
 	)
 
 def test_cache_config():
@@ -85,10 +85,12 @@ def test_supported_halo_finders():
 		if sim == 'bolshoi':
 			assert 'bdm' in hflist
 
+def test_lookup_tables_config():
+	""" Verify that the lookup_tables Halotools cache directory 
+	is detected, and that it is a subdirectory of Halotools cache. 
+	"""
+	halotools_cache = cache_config.get_halotools_cache_dir()
 
-
-
-
-
-
-
+	lookup_tables_subdir = cache_config.get_lookup_tables_dir()
+	assert os.path.exists(lookup_tables_subdir)
+	assert os.path.join(halotools_cache, 'lookup_tables') == lookup_tables_subdir
@@ -10,4 +10,5 @@ from .match import *
 from .spherical_geometry import *
 from .array_utils import *
 from .io_utils import *
-from .table_utils import *
\ No newline at end of file
+from .table_utils import *
+from .cosmology_utils import *
\ No newline at end of file
@@ -5,7 +5,8 @@ Modules performing small, commonly used tasks throughout the package.
 
 """
 
-__all__ = ['array_like_length', 'find_idx_nearest_val', 'randomly_downsample_data']
+__all__ = ['array_like_length', 'find_idx_nearest_val', 'randomly_downsample_data', 
+    'get_random_state', 'spawn_seeds', 'random_indices_without_replacement']
 
 import numpy as np
 import collections
@@ -95,46 +96,167 @@ def find_idx_nearest_val(array, value):
             return idx_nearest
 
 
-def randomly_downsample_data(array, num_downsample):
-    """ Method returns a length-num_downsample random downsampling of the input array.
+def get_random_state(seed=None):
+    """ Method returns a random number generator built from the input seed. 
 
     Parameters 
     ----------
-    array : array
+    seed : None, int, or random number generator, optional 
+        If None, the global numpy random state is returned, so that 
+        calls to `numpy.random.seed` continue to control the Monte Carlo. 
+        If an int, a new `numpy.random.RandomState` seeded with that int is returned. 
+        If an instance of `numpy.random.RandomState` or `numpy.random.Generator` 
+        (or any object with ``uniform``, ``normal`` and ``poisson`` methods), 
+        the input is returned unchanged, so that a single stream 
+        can be shared by several functions. 
 
-    num_downsample : int 
-        Size of the desired downsampled version of the data
+    Returns 
+    -------
+    random_state : object 
+        Random number generator exposing the `numpy.random.RandomState` 
+        sampling methods ``uniform``, ``normal``, ``poisson`` and ``permutation``. 
+
+    Examples 
+    --------
+    >>> rng = get_random_state(43)
+    >>> x = rng.uniform(0, 1, 10)
+    >>> rng2 = get_random_state(rng)
+    >>> rng2 is rng
+    True
+    """
+    if seed is None:
+        return np.random.mtrand._rand
+    elif isinstance(seed, (int, np.integer)):
+        return np.random.RandomState(seed)
+    elif all(hasattr(seed, method) for method in ('uniform', 'normal', 'poisson')):
+        return seed
+    else:
+        raise TypeError("Input seed must be None, an int, "
+            "or a numpy random number generator")
+
+def spawn_seeds(seed, num_streams):
+    """ Method returns integer seeds for ``num_streams`` statistically independent 
+    random number streams derived from a single input seed. 
+
+    When available, `numpy.random.SeedSequence` is used to spawn the child seeds, 
+    so that the streams are independent even for consecutive input seeds. 
+
+    Parameters 
+    ----------
+    seed : None, int, or random number generator 
+        Master seed. Interpreted as in `get_random_state`; 
+        if None, the child seeds are drawn from the global numpy random state. 
+
+    num_streams : int 
+        Number of child seeds to generate. 
 
     Returns 
     -------
-    downsampled_array : array or Astropy Table
-        Random downsampling of the input array
+    seeds : list 
+        List of ``num_streams`` integers, each of which can be passed as the 
+        ``seed`` argument of any function in the package. 
 
     Examples 
     --------
-    >>> x = np.linspace(0, 1000, num=1e5)
-    >>> desired_sample_size = 1e3
-    >>> downsampled_x = randomly_downsample_data(x, desired_sample_size)
+    >>> chunk_seeds = spawn_seeds(43, 4)
+    >>> rng = get_random_state(chunk_seeds[0])
     """
+    if not isinstance(seed, (int, np.integer)):
+        seed = int(get_random_state(seed).uniform(0, 2**31-1))
 
-    input_array_length = array_like_length(array) 
-    if num_downsample > input_array_length:
-        raise SyntaxError("Length of the desired downsampling = %i, "
-            "which exceeds input array length = %i " % (num_downsample, input_array_length))
+    if hasattr(np.random, 'SeedSequence'):
+        children = np.random.SeedSequence(seed).spawn(num_streams)
+        return [int(child.generate_state(1)[0]) for child in children]
     else:
-        randomizer = np.random.random(input_array_length)
-        idx_sorted = np.argsort(randomizer)
-        return array[idx_sorted[0:num_downsample]]
+        return [int(s) for s in np.random.RandomState(seed).randint(0, 2**31-1, size=num_streams)]
 
+def random_indices_without_replacement(npts, num_selected, seed=None):
+    """ Method returns num_selected distinct random integers in the interval [0, npts). 
 
+    Unlike ``np.random.permutation(npts)[0:num_selected]``, 
+    no length-npts array is created when num_selected is small compared to npts: 
+    indices are drawn with replacement in batches and duplicates are discarded, 
+    so that the memory and cpu cost scale with num_selected. 
 
+    Parameters 
+    ----------
+    npts : int 
+        Size of the array being sampled from. 
 
+    num_selected : int 
+        Number of distinct indices to return. 
 
+    seed : None, int, or random number generator, optional 
+        Controls the random draws; see `get_random_state`. 
 
+    Returns 
+    -------
+    indices : array 
+        Integer array of length num_selected. The indices are distinct and 
+        appear in random order, so that every subset of size num_selected 
+        is equally likely. 
 
+    Examples 
+    --------
+    >>> idx = random_indices_without_replacement(int(1e6), 100, seed=43)
+    """
+    npts, num_selected = int(npts), int(num_selected)
+    if (num_selected < 0) or (num_selected > npts):
+        raise ValueError("Cannot select %i distinct indices "
+            "from an array of length %i" % (num_selected, npts))
+
+    random_state = get_random_state(seed)
+
+    # When more than half of the array is requested, 
+    # a full permutation is as cheap as the rejection loop below
+    if 2*num_selected > npts:
+        return random_state.permutation(npts)[0:num_selected]
+
+    indices = np.zeros(0, dtype=np.int64)
+    while len(indices) < num_selected:
+        num_remaining = num_selected - len(indices)
+        # Oversample slightly to account for collisions
+        num_draws = int(num_remaining*(1. + 2.*num_selected/float(npts))) + 1
+        draws = np.floor(random_state.uniform(0, npts, num_draws)).astype(np.int64)
+        draws = np.minimum(draws, npts-1)
+        indices = np.concatenate((indices, draws))
+        # Keep only the first appearance of each index. 
+        # Ordering by first appearance preserves the randomness of the ordering. 
+        __, idx_first = np.unique(indices, return_index=True)
+        indices = indices[np.sort(idx_first)]
+
+    return indices[0:num_selected]
+
+def randomly_downsample_data(array, num_downsample, seed=None):
+    """ Method returns a length-num_downsample random downsampling of the input array.
 
+    Parameters 
+    ----------
+    array : array
 
+    num_downsample : int 
+        Size of the desired downsampled version of the data
 
+    seed : None, int, or random number generator, optional 
+        Controls the random draws; see `get_random_state`. 
 
+    Returns 
+    -------
+    downsampled_array : array or Astropy Table
+        Random downsampling of the input array
 
+    Examples 
+    --------
+    >>> x = np.linspace(0, 1000, num=1e5)
+    >>> desired_sample_size = 1e3
+    >>> downsampled_x = randomly_downsample_data(x, desired_sample_size)
+    """
 
+    input_array_length = array_like_length(array) 
+    if num_downsample > input_array_length:
+        raise SyntaxError("Length of the desired downsampling = %i, "
+            "which exceeds input array length = %i " % (num_downsample, input_array_length))
+    else:
+        idx = random_indices_without_replacement(
+            input_array_length, num_downsample, seed=seed)
+        return array[idx]
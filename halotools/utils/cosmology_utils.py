@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Module containing functions used to identify astropy cosmology objects. 
+"""
+
+import numpy as np
+
+__all__ = ['cosmology_key']
+
+# Parameters of the dark energy equation of state of the astropy cosmology classes
+_dark_energy_params = ['w0', 'wa', 'wp', 'zp', 'wz']
+
+def cosmology_key(cosmo):
+    """ Return a hashable key identifying a cosmology by the exact values of its parameters, 
+    for use in the keys of caches of quantities that depend on the cosmology. 
+
+    Two cosmologies have the same key only if they are instances of the same class 
+    with identical parameters. The ``repr`` of a cosmology is not a valid key, 
+    since it rounds the parameters, so that distinct cosmologies may share the same ``repr``. 
+
+    Parameters 
+    ----------
+    cosmo : object 
+        Astropy cosmology object, e.g., `~astropy.cosmology.FlatLambdaCDM`. 
+
+    Returns 
+    -------
+    key : tuple 
+
+    Examples 
+    --------
+    >>> from astropy.cosmology import FlatLambdaCDM
+    >>> key1 = cosmology_key(FlatLambdaCDM(H0=67.74, Om0=0.3089))
+    >>> key2 = cosmology_key(FlatLambdaCDM(H0=67.71, Om0=0.3091))
+    >>> key1 == key2
+    False
+    """
+    if cosmo.m_nu is None:
+        m_nu = None
+    else:
+        m_nu = tuple(np.atleast_1d(cosmo.m_nu.value))
+
+    key = [cosmo.__class__, cosmo.H0.value, cosmo.Om0, cosmo.Ode0, 
+        cosmo.Tcmb0.value, cosmo.Neff, m_nu, cosmo.Ob0]
+    for param in _dark_energy_params:
+        if hasattr(cosmo, param):
+            key.append((param, getattr(cosmo, param)))
+    return tuple(key)
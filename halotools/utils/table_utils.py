@@ -5,11 +5,12 @@ Modules performing small, commonly used tasks throughout the package.
 
 """
 
-__all__ = ['SampleSelector']
+__all__ = ['SampleSelector', 'GalaxyTable']
 
 import numpy as np
 import collections
 from astropy.table import Table
+from astropy.extern import six
 
 from ..sim_manager.generate_random_sim import FakeSim
 
@@ -192,20 +193,195 @@ class SampleSelector(object):
             
 
 
+class GalaxyTable(object):
+    """ Lightweight columnar container used to store mock galaxy catalogs. 
+
+    Columns are stored as contiguous numpy arrays in an ordered dictionary, 
+    so that accessing, slicing and pickling a `GalaxyTable` carries none of the 
+    overhead of an Astropy `~astropy.table.Table`. The ``gal_type`` column 
+    is stored internally as an array of small integers indexing ``gal_types``; 
+    accessing ``table['gal_type']`` returns the decoded array of strings, 
+    while the integer codes are available through ``gal_type_codes``. 
+    Use `to_astropy_table` to convert to an Astropy Table. 
+
+    Properties inherited from the host halo can be registered as lazy columns 
+    with `add_lazy_column`. A lazy column is only stored as the length-Nhalos 
+    source array together with the per-galaxy ``host_halo_index`` column; 
+    the length-Ngals galaxy column is gathered from the source on first access, 
+    so that inherited properties which are never accessed cost no memory. 
+
+    Examples 
+    --------
+    >>> table = GalaxyTable(gal_types = ['centrals', 'satellites'])
+    >>> table['x'] = np.linspace(0, 1, 4)
+    >>> table['gal_type'] = np.array([0, 0, 1, 1], dtype='i2')
+    >>> satellites = table[table.gal_type_mask('satellites')]
+    >>> astropy_table = table.to_astropy_table()
+
+    >>> table['host_halo_index'] = np.array([0, 1, 1, 1])
+    >>> table.add_lazy_column('halo_mvir', np.array([1.e12, 1.e14]))
+    >>> halo_mvir = table['halo_mvir']
+    """
 
+    host_index_key = 'host_halo_index'
 
+    def __init__(self, columns=None, gal_types=None):
+        """
+        Parameters 
+        ----------
+        columns : dict, optional 
+            Dictionary of equal-length arrays used to initialize the table. 
+            An integer ``gal_type`` entry is interpreted as codes into ``gal_types``. 
+            Default is an empty table. 
+
+        gal_types : list of strings, optional 
+            Names of the galaxy populations encoded by the ``gal_type`` column. 
+            Default is an empty list, in which case any string-valued ``gal_type`` 
+            column assigned to the table will define the list. 
+        """
+        self._columns = collections.OrderedDict()
+        self._lazy_columns = collections.OrderedDict()
+        if gal_types is None:
+            self.gal_types = []
+        else:
+            self.gal_types = list(gal_types)
 
+        if columns is not None:
+            for key in columns.keys():
+                self[key] = columns[key]
 
+    def __len__(self):
+        if len(self._columns) == 0:
+            return 0
+        else:
+            return len(next(iter(self._columns.values())))
 
+    def __contains__(self, key):
+        return (key in self._columns) or (key in self._lazy_columns)
 
+    def keys(self):
+        """ List of column names of the table, including lazy columns. 
+        """
+        return list(self._columns.keys()) + [key for key in self._lazy_columns.keys() 
+            if key not in self._columns]
 
+    @property 
+    def colnames(self):
+        return self.keys()
 
+    @property 
+    def gal_type_codes(self):
+        """ Integer array storing the index into ``gal_types`` of each galaxy. 
+        """
+        return self._columns['gal_type']
 
+    def gal_type_mask(self, gal_type):
+        """ Boolean mask selecting the galaxies of the input ``gal_type``. 
+        """
+        return self._columns['gal_type'] == self.gal_types.index(gal_type)
 
+    def add_lazy_column(self, key, source):
+        """ Register a column whose values are gathered from ``source`` 
+        using the ``host_halo_index`` column, the first time the column is accessed. 
 
+        Parameters 
+        ----------
+        key : string 
+            Name of the new column, e.g., ``halo_mvir``. 
 
+        source : array 
+            Array storing the property of every halo, e.g., ``halos['mvir']``. 
+            The array is referenced, not copied, and should not be modified afterwards. 
+        """
+        if self.host_index_key not in self._columns:
+            raise KeyError("Lazy columns require the table to have "
+                "a ``%s`` column" % self.host_index_key)
+        self._columns.pop(key, None)
+        self._lazy_columns[key] = source
+
+    def __getitem__(self, item):
+        """ Return a column if ``item`` is a string. Otherwise, ``item`` can be 
+        a slice, boolean mask or integer index array, and a new `GalaxyTable` 
+        is returned with the corresponding rows of every column. 
+        Slicing returns views, exactly as for numpy arrays; 
+        lazy columns that have not yet been accessed remain lazy. 
+        """
+        if isinstance(item, six.string_types):
+            if item == 'gal_type':
+                return np.asarray(self.gal_types)[self._columns['gal_type']]
+            elif (item not in self._columns) and (item in self._lazy_columns):
+                self._columns[item] = np.take(self._lazy_columns[item], 
+                    self._columns[self.host_index_key])
+            return self._columns[item]
+        else:
+            result = GalaxyTable(gal_types=self.gal_types)
+            for key, column in self._columns.items():
+                result._columns[key] = column[item]
+            result._lazy_columns.update(self._lazy_columns)
+            return result
+
+    def __setitem__(self, key, value):
+        value = np.asarray(value)
+        if (len(self._columns) > 0) & (key not in self._columns):
+            if len(value) != len(self):
+                raise ValueError("Input column %s has length %i, "
+                    "but the table has length %i" % (key, len(value), len(self)))
+
+        if key == 'gal_type':
+            if value.dtype.kind not in ('i', 'u'):
+                value = self._encode_gal_types(value)
+            elif (len(value) > 0) and (value.max() >= len(self.gal_types)):
+                raise ValueError("Integer gal_type codes must index the "
+                    "%i elements of gal_types" % len(self.gal_types))
+
+        self._columns[key] = value
+        self._lazy_columns.pop(key, None)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._columns.pop(key, None)
+        self._lazy_columns.pop(key, None)
+
+    def _encode_gal_types(self, names):
+        """ Private method converting an array of gal_type strings into integer codes, 
+        appending any previously unseen gal_type to ``gal_types``. 
+        """
+        unique_names, inverse = np.unique(names, return_inverse=True)
+        for name in unique_names:
+            if name not in self.gal_types:
+                self.gal_types.append(name)
+        unique_codes = np.array([self.gal_types.index(name) for name in unique_names], 
+            dtype='i2')
+        return unique_codes[inverse].astype('i2')
+
+    def copy(self):
+        """ Return a deep copy of the table. 
+        """
+        result = GalaxyTable(gal_types=self.gal_types)
+        for key, column in self._columns.items():
+            result._columns[key] = column.copy()
+        result._lazy_columns.update(self._lazy_columns)
+        return result
 
+    def to_astropy_table(self, copy=True):
+        """ Convert to an Astropy `~astropy.table.Table`. 
 
+        The ``gal_type`` column of the returned table stores the gal_type strings, 
+        and every lazy column is materialized. 
 
+        Parameters 
+        ----------
+        copy : bool, optional 
+            If False, the columns of the returned table share memory 
+            with the columns of ``self``. Default is True. 
 
+        Returns 
+        -------
+        table : `~astropy.table.Table`
+        """
+        keys = self.keys()
+        return Table([self[key] for key in keys], names=keys, copy=copy)
 
+    def __repr__(self):
+        return "<GalaxyTable length=%i columns=%s>" % (len(self), self.keys())
@@ -3,7 +3,7 @@ import numpy as np
 
 from .. import array_utils
 
-__all__ = ['test_find_idx_nearest_val']
+__all__ = ['test_find_idx_nearest_val', 'test_random_indices_without_replacement']
 
 def test_find_idx_nearest_val():
 
@@ -51,6 +51,24 @@ def test_find_idx_nearest_val():
 	assert np.all(result >= 10)
 	assert np.all(result <= 11)
 
+def test_random_indices_without_replacement():
 
+	npts, num_selected = int(1e5), int(1e3)
+	idx = array_utils.random_indices_without_replacement(npts, num_selected, seed=43)
+	assert len(idx) == num_selected
+	assert len(np.unique(idx)) == num_selected
+	assert np.all(idx >= 0) & np.all(idx < npts)
 
+	idx2 = array_utils.random_indices_without_replacement(npts, num_selected, seed=43)
+	assert np.all(idx == idx2)
+
+	# Dense regime 
+	idx = array_utils.random_indices_without_replacement(10, 8, seed=43)
+	assert len(np.unique(idx)) == 8
+
+	# Passing a random state continues its stream 
+	rng = array_utils.get_random_state(43)
+	idx3 = array_utils.random_indices_without_replacement(npts, num_selected, seed=rng)
+	idx4 = array_utils.random_indices_without_replacement(npts, num_selected, seed=rng)
+	assert np.any(idx3 != idx4)
 
@@ -0,0 +1,24 @@
+#!/usr/bin/env python
+from astropy import cosmology
+
+from ..cosmology_utils import cosmology_key
+
+__all__ = ['test_cosmology_key']
+
+def test_cosmology_key():
+	""" Verify that cosmologies share a key only if their parameters are identical, 
+	including cosmologies whose ``repr`` agree. 
+	"""
+	cosmo1 = cosmology.FlatLambdaCDM(H0=67.74, Om0=0.3089)
+	cosmo2 = cosmology.FlatLambdaCDM(H0=67.71, Om0=0.3091)
+	assert repr(cosmo1) == repr(cosmo2)
+	assert cosmology_key(cosmo1) != cosmology_key(cosmo2)
+	assert cosmology_key(cosmo1) == cosmology_key(cosmology.FlatLambdaCDM(H0=67.74, Om0=0.3089))
+	hash(cosmology_key(cosmology.Planck13))
+
+	# Cosmologies of different classes, or with different dark energy, are distinct 
+	assert cosmology_key(cosmology.LambdaCDM(H0=67.74, Om0=0.3089, Ode0=0.6911)) != (
+		cosmology_key(cosmo1))
+	wcdm1 = cosmology.FlatwCDM(H0=70, Om0=0.3, w0=-0.9)
+	wcdm2 = cosmology.FlatwCDM(H0=70, Om0=0.3, w0=-0.95)
+	assert cosmology_key(wcdm1) != cosmology_key(wcdm2)
@@ -4,7 +4,7 @@ import numpy as np
 from unittest import TestCase
 from functools import partial
 
-from ..table_utils import SampleSelector
+from ..table_utils import SampleSelector, GalaxyTable
 from astropy.table import Table
 
 class TestSampleSelector(TestCase):
@@ -51,9 +51,64 @@ class TestSampleSelector(TestCase):
 		self.assertRaises(TypeError, f)
 
 
+class TestGalaxyTable(TestCase):
+	"""
+	"""
+
+	def setUp(self):
+		self.table = GalaxyTable(gal_types=['centrals', 'satellites'])
+		self.table['x'] = np.linspace(0, 9, 10)
+		self.table['gal_type'] = np.array([0]*4 + [1]*6, dtype='i2')
 
+	def test_gal_type_decoding(self):
+		assert np.all(self.table['gal_type'][0:4] == 'centrals')
+		assert np.all(self.table['gal_type'][4:] == 'satellites')
+		assert self.table.gal_type_codes.dtype.kind == 'i'
 
+		sats = self.table[self.table.gal_type_mask('satellites')]
+		assert len(sats) == 6
+		assert np.all(sats['x'] == np.arange(4, 10))
 
+		t = GalaxyTable()
+		t['gal_type'] = np.array(['satellites', 'centrals', 'satellites'], dtype=object)
+		assert t.gal_types == ['centrals', 'satellites']
+		assert np.all(t.gal_type_codes == [1, 0, 1])
 
+	def test_slicing(self):
+		view = self.table[2:5]
+		view['x'][:] = -1
+		assert np.all(self.table['x'][2:5] == -1)
+
+		table_copy = self.table.copy()
+		table_copy['x'][:] = 0
+		assert np.all(self.table['x'][2:5] == -1)
+
+		f = partial(self.table.__setitem__, 'y', np.zeros(3))
+		self.assertRaises(ValueError, f)
 
+	def test_to_astropy_table(self):
+		t = self.table.to_astropy_table()
+		assert type(t) is Table
+		assert t.colnames == ['x', 'gal_type']
+		assert np.all(t['gal_type'][4:] == 'satellites')
 
+	def test_lazy_columns(self):
+		halo_mvir = np.array([1.e12, 1.e13, 1.e14])
+		self.table['host_halo_index'] = np.array([0, 1, 2, 2, 0, 0, 1, 1, 2, 2])
+		self.table.add_lazy_column('halo_mvir', halo_mvir)
+		assert 'halo_mvir' in self.table
+		assert 'halo_mvir' in self.table.keys()
+		assert 'halo_mvir' not in self.table._columns
+
+		sats = self.table[self.table.gal_type_mask('satellites')]
+		assert np.all(sats['halo_mvir'] == [1.e12, 1.e12, 1.e13, 1.e13, 1.e14, 1.e14])
+		assert 'halo_mvir' not in self.table._columns
+
+		assert np.all(self.table['halo_mvir'] == halo_mvir[self.table['host_halo_index']])
+		assert 'halo_mvir' in self.table._columns
+
+		t = self.table.to_astropy_table()
+		assert 'halo_mvir' in t.keys()
+
+		f = partial(GalaxyTable().add_lazy_column, 'halo_mvir', halo_mvir)
+		self.assertRaises(KeyError, f)